@@ -1,10 +1,16 @@
 from fastapi import APIRouter
 
 from .auth.security import router as auth_router
+from .endpoints.alerts import router as alert_router
 from .endpoints.currency import router as currency_router
+from .endpoints.media import router as media_router
+from .endpoints.orders import router as order_router
 from .endpoints.users import router as user_router
 
 router = APIRouter(prefix="/api")
 router.include_router(auth_router)
 router.include_router(user_router)
 router.include_router(currency_router)
+router.include_router(alert_router)
+router.include_router(order_router)
+router.include_router(media_router)
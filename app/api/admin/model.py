@@ -1,18 +1,27 @@
+import math
+from pathlib import Path
+
 from fastapi import APIRouter
-from sqladmin import ModelView
+from sqladmin import BaseView, ModelView, expose
 from sqladmin.authentication import AuthenticationBackend
-from sqlalchemy import select
+from sqlalchemy import Select, select
 from starlette.requests import Request
+from starlette.responses import Response
 
+from app.api.admin.pagination import KeysetPaginationMixin
 from app.api.auth.security import create_access_token, verify_password
 from app.api.models import Balance, User
 from app.core import sessionmanager
 from app.core.config import settings
+from app.services.profiler import profiler
+from app.services.reports import holdings_report
 
 router = APIRouter(include_in_schema=False)
 
+TEMPLATES_DIR = str(Path(__file__).parent / "templates")
+
 
-class UserModelView(ModelView, model=User):
+class UserModelView(KeysetPaginationMixin, ModelView, model=User):
 
     """Представление модели пользователя в админской панели."""
 
@@ -25,11 +34,11 @@ class UserModelView(ModelView, model=User):
         User.is_admin,
         User.image_path,
     ]
-    column_sortable_list = [User.id]
+    column_sortable_list = [User.id, User.username, User.created_at]
     column_searchable_list = [User.username, User.email]
 
 
-class BalanceModelView(ModelView, model=Balance):
+class BalanceModelView(KeysetPaginationMixin, ModelView, model=Balance):
     """Представление модели баланса в админской панели."""
 
     column_list = [
@@ -39,9 +48,103 @@ class BalanceModelView(ModelView, model=Balance):
         Balance.user_id,
         Balance.user,
     ]
-    column_sortable_list = [Balance.id]
+    column_sortable_list = [Balance.id, Balance.currency]
     column_searchable_list = [Balance.currency]
 
+    def search_query(self, stmt: Select, term: str) -> Select:
+        """Поиск балансов по префиксу кода валюты."""
+        return stmt.filter(Balance.currency.startswith(term.upper(), autoescape=True))
+
+
+class HoldingsDashboardView(BaseView):
+    """
+    Дашборд админской панели: сводка балансов по валютам и крупнейшие пользователи.
+
+    Сводка берется из holding_totals, а крупнейшие пользователи оцениваются по
+    первым строкам user_totals, поэтому страница открывается быстро независимо
+    от количества пользователей.
+    """
+
+    name = "Holdings"
+    icon = "fa-solid fa-chart-pie"
+
+    @expose("/dashboard", methods=["GET"], identity="dashboard")
+    async def dashboard(self, request: Request):
+        holdings, updated = await holdings_report.holdings()
+        return await self.templates.TemplateResponse(
+            request,
+            "dashboard.html",
+            context={
+                "source": settings.RATES.SOURCE,
+                "holdings": holdings,
+                "total": sum(item.value or 0 for item in holdings),
+                "updated": updated,
+                "top_users": await holdings_report.top_users(),
+            },
+        )
+
+
+class ProfilerView(BaseView):
+    """
+    Профилирование работающего воркера из админской панели.
+
+    Профиль воркера снимается с того воркера, который обработал запрос
+    страницы. Для профилирования отдельного запроса страница выдает
+    подписанный токен для заголовка X-Profile; профиль такого запроса
+    скачивается по идентификатору из заголовка ответа X-Profile-Id.
+    """
+
+    name = "Profiler"
+    icon = "fa-solid fa-fire"
+
+    @expose("/profiler", methods=["GET"], identity="profiler")
+    async def profiler_page(self, request: Request):
+        return await self.templates.TemplateResponse(
+            request,
+            "profiler.html",
+            context={
+                "worker": profiler.worker,
+                "busy": profiler.busy,
+                "max_seconds": profiler.max_seconds,
+                "token": profiler.token(),
+                "token_ttl": profiler.TOKEN_TTL,
+            },
+        )
+
+    @expose("/profiler/run", methods=["GET"], identity="profiler_run")
+    async def profiler_run(self, request: Request):
+        try:
+            seconds = float(request.query_params.get("seconds", 10))
+        except ValueError:
+            seconds = math.nan
+        if not math.isfinite(seconds):
+            return Response("seconds must be a finite number", status_code=400)
+        try:
+            profile = await profiler.profile(seconds)
+        except RuntimeError as e:
+            return Response(str(e), status_code=409)
+        return self._download(profile, request.query_params.get("format"), "worker")
+
+    @expose("/profiler/result", methods=["GET"], identity="profiler_result")
+    async def profiler_result(self, request: Request):
+        profile_id = request.query_params.get("id", "")
+        profile = await profiler.load(profile_id)
+        if profile is None:
+            return Response("profile not found", status_code=404)
+        return self._download(profile, request.query_params.get("format"), profile_id)
+
+    @staticmethod
+    def _download(profile, format: str | None, name: str) -> Response:
+        body, media_type = profile.render(format or "speedscope")
+        extension = "folded" if format == "collapsed" else "speedscope.json"
+        return Response(
+            body,
+            media_type=media_type,
+            headers={
+                "Content-Disposition": f'attachment; filename="{name}.{extension}"'
+            },
+        )
+
 
 class AdminAuth(AuthenticationBackend):
     """
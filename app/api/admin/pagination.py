@@ -0,0 +1,193 @@
+import json
+from dataclasses import dataclass
+
+from sqladmin.pagination import PageControl, Pagination
+from sqlalchemy import Select, cast, func, literal, or_, select, text, tuple_
+from sqlalchemy.orm import joinedload
+from starlette.datastructures import URL
+from starlette.requests import Request
+
+
+@dataclass
+class KeysetPagination(Pagination):
+    """
+    Страница списка с курсорами вместо номеров страниц.
+
+    Ссылки ведут только на соседние страницы: следующая строится по ключу
+    последней строки (after), предыдущая — по ключу первой (before). Номер
+    страницы передается в ссылках только для отображения.
+    """
+
+    first: str | None = None
+    last: str | None = None
+    more: bool = False
+
+    @property
+    def has_previous(self) -> bool:
+        return self.page > 1 and self.first is not None
+
+    @property
+    def has_next(self) -> bool:
+        return self.more and self.last is not None
+
+    def add_pagination_urls(self, base_url: URL) -> None:
+        base_url = base_url.remove_query_params(["after", "before"])
+        if self.has_previous:
+            url = base_url.include_query_params(page=self.page - 1, before=self.first)
+            self.page_controls.append(PageControl(self.page - 1, str(url)))
+        self.page_controls.append(PageControl(self.page, str(base_url)))
+        if self.has_next:
+            url = base_url.include_query_params(page=self.page + 1, after=self.last)
+            self.page_controls.append(PageControl(self.page + 1, str(url)))
+
+
+class KeysetPaginationMixin:
+    """
+    Keyset-пагинация и приблизительный подсчет строк для ModelView.
+
+    Вместо OFFSET страница выбирается условием (sort_column, pk) > (ключ последней
+    строки) по индексу, поэтому открытие любой следующей страницы стоит столько же,
+    сколько первой. Сортировка допускается только по NOT NULL колонкам из
+    column_sortable_list, к ним добавляется первичный ключ для однозначности.
+
+    Общее количество строк без поиска берется из статистики pg_class.reltuples,
+    если таблица больше count_threshold строк. При поиске строки считаются точно
+    не дальше count_threshold, а дальше используется оценка планировщика.
+
+    Attributes:
+        count_threshold (int): Размер таблицы или выборки, после которого точный
+            COUNT(*) заменяется оценкой.
+    """
+
+    count_threshold: int = 10_000
+
+    def _keyset_columns(self, request: Request):
+        pk = self.pk_columns[0]
+        column = self.model.__table__.c.get(request.query_params.get("sortBy"))
+        if column is None or column.nullable or column.key not in self._sort_fields:
+            column = pk
+        is_desc = request.query_params.get("sort", "asc") == "desc"
+        return column, pk, is_desc
+
+    @staticmethod
+    def _encode(value, pk) -> str:
+        return json.dumps([str(value), pk], separators=(",", ":"))
+
+    def _decode(self, cursor: str, column):
+        value, pk = json.loads(cursor)
+        return tuple_(cast(literal(value), column.type), literal(pk))
+
+    async def _estimate(self, stmt: Select) -> int:
+        """Оценка количества строк выборки по плану запроса."""
+        async with self.session_maker() as session:
+            connection = await session.connection()
+            query = stmt.compile(
+                dialect=connection.dialect, compile_kwargs={"literal_binds": True}
+            )
+            result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {query}")
+            plan = result.scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    async def count(self, request: Request, stmt: Select | None = None) -> int:
+        """
+        Количество строк для подписи "Showing ... of N".
+
+        Args:
+            request (Request): Запрос к странице списка.
+            stmt (Select | None): Выборка с условиями поиска или None для всей таблицы.
+
+        Returns:
+            int: Точное количество, если оно не больше count_threshold, иначе оценка.
+        """
+        if stmt is None:
+            async with self.session_maker() as session:
+                estimate = (
+                    await session.execute(
+                        text(
+                            "SELECT reltuples::bigint FROM pg_class "
+                            "WHERE oid = CAST(:table AS regclass)"
+                        ),
+                        {"table": self.model.__table__.name},
+                    )
+                ).scalar()
+            if estimate is not None and estimate > self.count_threshold:
+                return estimate
+            return await super().count(request)
+
+        capped = select(func.count()).select_from(
+            stmt.limit(self.count_threshold + 1).subquery()
+        )
+        count = await super().count(request, capped)
+        if count > self.count_threshold:
+            return max(count, await self._estimate(stmt))
+        return count
+
+    async def list(self, request: Request) -> Pagination:
+        """
+        Страница списка по курсору из параметров after или before.
+
+        Args:
+            request (Request): Запрос к странице списка.
+
+        Returns:
+            Pagination: Строки страницы со ссылками на соседние страницы.
+        """
+        page = int(request.query_params.get("page", 1))
+        page_size = int(request.query_params.get("pageSize", 0))
+        page_size = min(page_size or self.page_size, max(self.page_size_options))
+        search = request.query_params.get("search")
+        after = request.query_params.get("after")
+        before = request.query_params.get("before")
+
+        stmt = self.list_query(request)
+        if search:
+            stmt = self.search_query(stmt=stmt, term=search)
+        count = await self.count(request, stmt if search else None)
+
+        column, pk, is_desc = self._keyset_columns(request)
+        backward = before is not None
+        key = tuple_(column, pk)
+        if after is not None or backward:
+            cursor = self._decode(before if backward else after, column)
+            stmt = stmt.where(key < cursor if is_desc != backward else key > cursor)
+        elif page > 1:
+            stmt = stmt.offset((page - 1) * page_size)
+
+        descending = is_desc != backward
+        order = [column.desc(), pk.desc()] if descending else [column.asc(), pk.asc()]
+        stmt = stmt.order_by(*order).limit(page_size + 1)
+        for relation in self._list_relations:
+            stmt = stmt.options(joinedload(relation))
+
+        rows = list(await self._run_query(stmt))
+        more = len(rows) > page_size
+        rows = rows[:page_size]
+        if backward:
+            rows.reverse()
+            more = True
+
+        keys = [
+            self._encode(getattr(row, column.key), getattr(row, pk.key)) for row in rows
+        ]
+        return KeysetPagination(
+            rows=rows,
+            page=page,
+            page_size=page_size,
+            count=count,
+            first=keys[0] if keys else None,
+            last=keys[-1] if keys else None,
+            more=more,
+        )
+
+    def search_query(self, stmt: Select, term: str) -> Select:
+        """
+        Поиск подстроки без приведения колонок к строке, чтобы работали
+        триграммные индексы (pg_trgm).
+        """
+        expressions = [
+            getattr(self.model, field).icontains(term, autoescape=True)
+            for field in self._search_fields
+        ]
+        return stmt.filter(or_(*expressions))
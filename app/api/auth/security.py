@@ -1,3 +1,4 @@
+import logging
 from datetime import datetime, timedelta
 
 import jwt
@@ -12,6 +13,9 @@ from app.api.models import User
 from app.api.schemas import DataToken, Token
 from app.core.config import settings
 from app.core.database import get_db_session
+from app.core.tracing import tracer
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
@@ -55,13 +59,14 @@ def verify_access_token(token: str, credentials_exception):
     :return: Данные пользователя из токена.
     """
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        with tracer.span("jwt.decode"):
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         id: str = payload.get("user_id")
         if id is None:
             raise credentials_exception
         token_data = DataToken(id=id)
     except PyJWTError as e:
-        print(e)
+        logger.info("invalid access token: %s", e)
         raise credentials_exception
     return token_data
 
@@ -79,8 +84,6 @@ async def login(
     :return: Токен доступа и тип токена.
     """
 
-    print(userdetails)
-    print(userdetails.username, userdetails.password)
     stmt = select(User).filter(userdetails.username == User.username)
     result = await session.execute(stmt)
     user = result.scalar_one_or_none()
@@ -92,5 +95,7 @@ async def login(
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect password"
         )
-    access_token = create_access_token(data={"user_id": user.id})
+    access_token = create_access_token(
+        data={"user_id": user.id, "tier": "admin" if user.is_admin else "user"}
+    )
     return {"access_token": access_token, "token_type": "Bearer"}
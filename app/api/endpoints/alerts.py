@@ -0,0 +1,98 @@
+from fastapi import APIRouter, Depends, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.models import Alert, User
+from app.api.schemas import AlertSchema, ResponseAlert
+from app.core.database import get_db_session
+from app.exceptions import BadRequestException
+from app.services import RedisClient
+from app.services.alerts import alert_engine
+from app.utils.users import get_current_user
+
+router = APIRouter(prefix="/alerts", tags=["Alerts"])
+
+
+@router.post("/", response_model=ResponseAlert, status_code=status.HTTP_201_CREATED)
+async def create_alert(
+    alert: AlertSchema,
+    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_db_session),
+):
+    """
+    Создание ценового алерта для текущего пользователя.
+
+    Алерт срабатывает один раз, когда курс пары пересекает порог в заданном направлении
+    (above — вверх, below — вниз). Уведомление приходит через WebSocket и на электронную почту.
+    Если условие уже выполнено при текущем курсе, алерт срабатывает сразу.
+
+    Параметры:
+    - alert (AlertSchema): Валютная пара (например, EURUSD), направление и порог.
+
+    Возвращает:
+    - response (ResponseAlert): Созданный алерт.
+
+    Вызывает BadRequestException, если одна из валют пары не поддерживается.
+
+    Требуется аутентификация.
+    """
+
+    pair = alert.pair.upper()
+    cache = await RedisClient.get_currencies()
+    if pair[:3] not in cache or pair[3:] not in cache or pair[:3] == pair[3:]:
+        raise BadRequestException(detail="Incorrect currency pair")
+
+    new_alert = Alert(
+        user_id=user.id,
+        pair=pair,
+        direction=alert.direction,
+        threshold=alert.threshold,
+    )
+    session.add(new_alert)
+    await session.commit()
+    await alert_engine.publish("add", new_alert)
+    return new_alert
+
+
+@router.get("/", response_model=list[ResponseAlert])
+async def list_alerts(
+    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_db_session),
+):
+    """
+    Список ценовых алертов текущего пользователя, включая уже сработавшие.
+
+    Требуется аутентификация.
+    """
+
+    stmt = select(Alert).where(Alert.user_id == user.id).order_by(Alert.id)
+    result = await session.execute(stmt)
+    return result.scalars().all()
+
+
+@router.delete("/{alert_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_alert(
+    alert_id: int,
+    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_db_session),
+):
+    """
+    Удаление ценового алерта текущего пользователя.
+
+    Параметры:
+    - alert_id (int): Идентификатор алерта.
+
+    Вызывает BadRequestException, если алерт не найден.
+
+    Требуется аутентификация.
+    """
+
+    stmt = select(Alert).where(Alert.id == alert_id, Alert.user_id == user.id)
+    alert = (await session.execute(stmt)).scalar_one_or_none()
+    if alert is None:
+        raise BadRequestException(detail="Alert not found", status_code=404)
+
+    await session.delete(alert)
+    await session.commit()
+    if alert.triggered_at is None:
+        await alert_engine.publish("remove", alert)
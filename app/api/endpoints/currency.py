@@ -1,15 +1,17 @@
-import json
 from datetime import date, datetime
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Header, Query
+from fastapi.responses import StreamingResponse
 from fastapi_cache.decorator import cache
-from fastapi_limiter.depends import RateLimiter
 
 from app.api.models import User
 from app.api.schemas import ResponseCurrency
 from app.core.config import settings
 from app.services import RedisClient
 from app.services.httpclientsession import http_client
+from app.services.limiter import RateLimiter
+from app.services.redis_tools import prefetch
+from app.services.sse import rate_events
 from app.utils.currencies import check_currencies, check_time, get_exchange
 from app.utils.users import get_current_user
 
@@ -44,6 +46,30 @@ async def get_exchange_rates(
     return response_data
 
 
+@router.get("/stream")
+async def stream_rates(
+    last_event_id: str | None = Header(default=None),
+    user: User = Depends(get_current_user),
+):
+    """
+    Поток курсов валют в формате Server-Sent Events для авторизованных пользователей.
+    Предназначен для клиентов, которым недоступен WebSocket: вместо опроса /exchange_rate
+    сервер сам присылает изменения курсов после каждого фонового обновления.
+
+    Параметры:
+    - Last-Event-ID (заголовок): идентификатор последнего полученного события. При переподключении
+      клиент получает пропущенные изменения, а если они уже недоступны — полный снимок курсов.
+
+    Возвращает поток событий: snapshot — все курсы относительно базовой валюты, delta — только изменившиеся курсы.
+    """
+
+    return StreamingResponse(
+        rate_events.stream(last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/show_convert", dependencies=[Depends(RateLimiter(times=1, seconds=5))])
 @check_time
 @check_currencies
@@ -91,10 +117,16 @@ async def show_convert(
     return data
 
 
-@router.get("/show_change", dependencies=[Depends(RateLimiter(times=1, seconds=5))])
+@router.get(
+    "/show_change",
+    dependencies=[
+        Depends(RateLimiter(times=1, seconds=5)),
+        Depends(prefetch("currencies")),
+    ],
+)
+@cache(expire=24 * 60 * 60)
 @check_time
 @check_currencies
-@cache(expire=24 * 60 * 60)
 async def show_change(
     start_date: date = Query(
         default=date.today(),
@@ -135,10 +167,16 @@ async def show_change(
     return data
 
 
-@router.get("/historical", dependencies=[Depends(RateLimiter(times=1, seconds=5))])
+@router.get(
+    "/historical",
+    dependencies=[
+        Depends(RateLimiter(times=1, seconds=5)),
+        Depends(prefetch("currencies")),
+    ],
+)
+@cache(expire=24 * 60 * 60)
 @check_time
 @check_currencies
-@cache(expire=24 * 60 * 60)
 async def show_historical(
     historical_date: date = Query(
         default=date.today(),
@@ -185,14 +223,19 @@ async def show_list(
 
     Возвращает список валют в формате код валюты: страна. Этот список может использоваться для выбора валют при выполнении других запросов.
     """
-    data = await RedisClient.get_currency("currencies")
-    return json.loads(data)
+    return await RedisClient.get_currencies()
 
 
-@router.get("/timeframe", dependencies=[Depends(RateLimiter(times=1, seconds=5))])
+@router.get(
+    "/timeframe",
+    dependencies=[
+        Depends(RateLimiter(times=1, seconds=5)),
+        Depends(prefetch("currencies")),
+    ],
+)
+@cache(expire=300)
 @check_time
 @check_currencies
-@cache(expire=300)
 async def show_timeframe(
     start_date: date = Query(
         default=date.today(),
@@ -0,0 +1,82 @@
+import asyncio
+import re
+
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import FileResponse, Response
+
+from app.services.media import MEDIA_TYPES, media_store
+
+router = APIRouter(prefix="/media", tags=["Media"])
+
+NAME = re.compile(r"^[0-9a-f]{64}\.(png|jpg)$")
+
+# Файлы с именем по хешу содержимого никогда не меняются.
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Оригинал вместо еще не готовой миниатюры: скоро по тому же адресу будет миниатюра.
+PENDING = "public, max-age=60"
+# Изображение по умолчанию может быть заменено при обновлении приложения.
+DEFAULT = "public, max-age=86400"
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    """Совпадает ли ETag с одним из значений заголовка If-None-Match."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+@router.get("/{name}", response_class=Response)
+async def get_media(name: str, request: Request, original: bool = False):
+    """
+    Изображение профиля пользователя.
+
+    По умолчанию отдается миниатюра, с original=true — исходный файл.
+    ETag — хеш содержимого (у миниатюры — с размером), и оба значения
+    выводятся из имени, поэтому повторный запрос с If-None-Match получает 304
+    без обращения к диску. Проверяется файл только у клиента, получившего
+    оригинал вместо еще не готовой миниатюры: не появилась ли она. Файлы отдаются через FileResponse:
+    сервер с поддержкой расширения ASGI http.response.pathsend отправляет их
+    через sendfile без копирования в Python. Изображение по умолчанию
+    хранится в памяти.
+
+    Параметры:
+    - name (str): Имя файла из image_path пользователя ({sha256}.png, {sha256}.jpg или profile.png).
+    - original (bool, optional): Отдать исходное изображение вместо миниатюры.
+
+    Возвращает:
+    - response (Response): Изображение или 304 Not Modified.
+
+    Вызывает HTTPException со статусом 404, если изображение не найдено.
+    """
+
+    if name == media_store.default.name:
+        body, etag, media_type = await media_store.default_avatar(original)
+        headers = {"ETag": etag, "Cache-Control": DEFAULT}
+        if _not_modified(request, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(body, media_type=media_type, headers=headers)
+
+    if not NAME.match(name):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    path = media_store.root / name
+    cache_control = IMMUTABLE
+    if not original:
+        # ETag миниатюры выводится из имени, поэтому клиент, у которого она
+        # уже есть, получает 304 без проверки файла.
+        thumbnail = media_store.thumbnail_path(path)
+        headers = {"ETag": f'"{thumbnail.stem}"', "Cache-Control": IMMUTABLE}
+        if _not_modified(request, headers["ETag"]):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        if await asyncio.to_thread(thumbnail.exists):
+            return FileResponse(
+                thumbnail, media_type=MEDIA_TYPES[thumbnail.suffix], headers=headers
+            )
+        cache_control = PENDING
+    headers = {"ETag": f'"{path.stem}"', "Cache-Control": cache_control}
+    if _not_modified(request, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if not await asyncio.to_thread(path.is_file):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    return FileResponse(path, media_type=MEDIA_TYPES[path.suffix], headers=headers)
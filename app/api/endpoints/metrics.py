@@ -0,0 +1,24 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.services.metrics import metrics_exporter
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics():
+    """
+    Метрики приложения в текстовом формате Prometheus.
+
+    Счетчики и гистограммы просуммированы по всем воркерам, измерители
+    (запросы в работе, пул соединений, WebSocket) выдаются по каждому живому
+    воркеру с меткой worker.
+
+    Возвращает:
+    - response (str): Метрики в формате text/plain; version=0.0.4.
+    """
+    return PlainTextResponse(
+        await metrics_exporter.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
@@ -0,0 +1,120 @@
+from datetime import timezone
+
+from fastapi import APIRouter, Depends, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.models import Order, User
+from app.api.schemas import OrderSchema, ResponseOrder
+from app.core.database import get_db_session
+from app.exceptions import BadRequestException
+from app.services import RedisClient
+from app.services.orders import order_engine
+from app.utils.users import get_current_user
+
+router = APIRouter(prefix="/orders", tags=["Orders"])
+
+
+@router.post("/", response_model=ResponseOrder, status_code=status.HTTP_201_CREATED)
+async def create_order(
+    order: OrderSchema,
+    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_db_session),
+):
+    """
+    Создание ордера на условную или отложенную конвертацию валюты.
+
+    Ордер конвертирует amount из валюты source в валюту currency:
+    - при condition="le" — когда курс source/currency (сколько currency стоит 1 source) станет не больше trigger_rate;
+    - при condition="ge" — когда этот курс станет не меньше trigger_rate;
+    - при указании execute_at — в заданное время (UTC) по текущему курсу.
+
+    Средства не резервируются: если в момент исполнения их не хватает, ордер отклоняется.
+    Об исполнении пользователь получает уведомление через WebSocket и на электронную почту.
+
+    Параметры:
+    - order (OrderSchema): Параметры ордера.
+
+    Возвращает:
+    - response (ResponseOrder): Созданный ордер.
+
+    Вызывает BadRequestException, если валюта не поддерживается или у пользователя нет валюты source.
+
+    Требуется аутентификация.
+    """
+
+    source, currency = order.source.upper(), order.currency.upper()
+    cache = await RedisClient.get_currencies()
+    if source not in cache or currency not in cache or source == currency:
+        raise BadRequestException(detail="Incorrect currency code!")
+    if not any(b.currency == source for b in user.balances):
+        raise BadRequestException(detail="You don't have this currency")
+
+    execute_at = order.execute_at
+    if execute_at is not None and execute_at.tzinfo is not None:
+        execute_at = execute_at.astimezone(timezone.utc).replace(tzinfo=None)
+
+    new_order = Order(
+        user_id=user.id,
+        source=source,
+        currency=currency,
+        amount=order.amount,
+        condition=order.condition,
+        trigger_rate=order.trigger_rate,
+        execute_at=execute_at,
+        fills=[],
+    )
+    session.add(new_order)
+    await session.commit()
+    await order_engine.publish("add", new_order)
+    return new_order
+
+
+@router.get("/", response_model=list[ResponseOrder])
+async def list_orders(
+    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_db_session),
+):
+    """
+    Список ордеров текущего пользователя вместе с их исполнениями.
+
+    Требуется аутентификация.
+    """
+
+    stmt = select(Order).where(Order.user_id == user.id).order_by(Order.id)
+    result = await session.execute(stmt)
+    return result.scalars().all()
+
+
+@router.delete("/{order_id}", response_model=ResponseOrder)
+async def cancel_order(
+    order_id: int,
+    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_db_session),
+):
+    """
+    Отмена открытого ордера текущего пользователя.
+
+    Параметры:
+    - order_id (int): Идентификатор ордера.
+
+    Вызывает BadRequestException, если ордер не найден или уже не открыт.
+
+    Требуется аутентификация.
+    """
+
+    stmt = (
+        select(Order)
+        .where(Order.id == order_id, Order.user_id == user.id)
+        .with_for_update()
+    )
+    order = (await session.execute(stmt)).scalar_one_or_none()
+    if order is None:
+        raise BadRequestException(detail="Order not found", status_code=404)
+    if order.status != "open":
+        raise BadRequestException(detail="Order is not open")
+
+    order.status = "cancelled"
+    await session.commit()
+    await order_engine.publish("cancel", order)
+    return order
@@ -1,33 +1,24 @@
-import shutil
 from decimal import Decimal
-from pathlib import Path
-
-from fastapi import (
-    APIRouter,
-    BackgroundTasks,
-    Depends,
-    File,
-    Form,
-    Query,
-    Request,
-    UploadFile,
-    status,
-)
+
+from fastapi import APIRouter, Depends, File, Form, Query, Request, UploadFile, status
 from fastapi.responses import JSONResponse
 from fastapi.websockets import WebSocket
-from fastapi_limiter.depends import RateLimiter
 from passlib.context import CryptContext
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.models import User
-from app.api.schemas import BalanceSchema, ResponseUserBalance
+from app.api.schemas import BalanceSchema, ResponseUserBalance, ResponseValuation
 from app.core.database import get_db_session
+from app.core.tracing import tracer
 from app.exceptions import BadRequestException
 from app.services import RedisClient
+from app.services.limiter import RateLimiter
+from app.services.media import media_store
+from app.services.valuation import valuation_service
 from app.services.websocket_manager import websocket_, ws_manager
-from app.utils.balances import find_or_create_balance
+from app.utils.balances import create_balances, find_or_create_balance, lock_balances
 from app.utils.currencies import check_currencies, get_exchange
-from app.utils.send_email import send_email_async
+from app.utils.send_email import enqueue_email
 from app.utils.users import (
     check_password_and_username,
     create_response_user_balance,
@@ -71,17 +62,17 @@ async def create_user(
     - password (str): Пароль для аккаунта, должен содержать минимум 8 символов, включать в себя
                       заглавные и строчные буквы, а также цифры.
     - email (str): Электронная почта пользователя.
-    - image (UploadFile, optional): Файл изображения профиля пользователя. Допустимые форматы: .jpg, .jpeg, .png.
+    - image (UploadFile, optional): Файл изображения профиля пользователя. Допустимые форматы: .jpg, .jpeg, .png,
+                                    размер — не больше MEDIA_LIMIT байт.
 
     Возвращает:
     - user (User): Объект пользователя с информацией о новом аккаунте.
 
-    Вызывает HTTPException со статусом 400 Bad Request, если входные данные не проходят валидацию.
+    Вызывает HTTPException со статусом 400 Bad Request, если входные данные не проходят валидацию,
+    и 413, если изображение больше допустимого размера.
 
     """
 
-    save_dir = Path("app/media")
-    save_dir.mkdir(exist_ok=True)
     if image:
         image_type = image.filename.split(".")[-1]
         file_extension = image_type if image_type in ("jpg", "jpeg", "png") else None
@@ -89,11 +80,9 @@ async def create_user(
             return JSONResponse(
                 status_code=400, content={"message": "Invalid file format"}
             )
-        save_path = save_dir / f"{username}.{file_extension}"
-        with save_path.open("wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
+        save_path = await media_store.save(image)
     else:
-        save_path = Path("app/media/profile.png")
+        save_path = media_store.default
     hash_password = hash_pass(password)
     new_user = User(
         username=username,
@@ -128,7 +117,6 @@ async def get_me(user: User = Depends(get_current_user)):
 @router.patch("/top_up_balance/", response_model=ResponseUserBalance)
 async def update_balance(
     balance: BalanceSchema,
-    background_tasks: BackgroundTasks,
     user: User = Depends(get_current_user),
     session: AsyncSession = Depends(get_db_session),
 ):
@@ -140,7 +128,6 @@ async def update_balance(
 
     Параметры:
     - balance (BalanceSchema): Схема данных баланса с валютой и суммой пополнения.
-    - background_tasks (BackgroundTasks): Задачи, выполняемые в фоне после завершения запроса.
     - user (User): Авторизованный пользователь, для которого будет пополнен баланс.
     - session (AsyncSession): Сессия подключения к базе данных.
 
@@ -149,38 +136,30 @@ async def update_balance(
 
     Вызывает BadRequestException, если предоставленная валюта не поддерживается.
 
-    После успешного пополнения баланса в фоне отправляется email-уведомление пользователю
-    и через WebSocket передается сообщение о пополнении.
+    Email-уведомление о пополнении ставится в outbox в той же транзакции, что и изменение
+    баланса, а через WebSocket передается сообщение о пополнении.
 
     Требуется аутентификация.
     """
 
-    cache = await RedisClient.get_currency("currencies")
+    cache = await RedisClient.get_currencies()
 
     if balance.currency not in cache:
         raise BadRequestException(detail="Incorrect currency")
 
-    existing_balance = next(
-        (b for b in user.balances if b.currency == balance.currency), None
+    user_balance = await find_or_create_balance(
+        session=session, user_id=user.id, currency=balance.currency
     )
-    if existing_balance:
-        existing_balance.amount += balance.amount
-    else:
-        await find_or_create_balance(
-            session=session,
-            user_id=user.id,
-            currency=balance.currency,
-            amount=balance.amount,
-        )
+    user_balance.amount += balance.amount
 
-    await session.commit()
-    await session.refresh(user)
-    background_tasks.add_task(
-        send_email_async,
+    enqueue_email(
+        session,
         f"adding funds to your account",
         f"Your balance has been successfully replenished with {balance.amount} {balance.currency}",
         user.email,
     )
+    await session.commit()
+    await session.refresh(user)
     await ws_manager.send_to_user(
         user.id,
         message=f"Your balance has been successfully replenished with {balance.amount} {balance.currency}",
@@ -193,7 +172,6 @@ async def update_balance(
 @check_currencies
 async def convert_user_currency(
     request: Request,
-    background_tasks: BackgroundTasks,
     source: str = Query(
         description="Currency you are converting from",
         example="USD",
@@ -228,23 +206,26 @@ async def convert_user_currency(
     При неудачной попытке конвертации, если пользователь не имеет достаточного баланса в валюте source
     или не имеет валюты source вовсе, будет вызвано исключение BadRequestException.
 
-    После успешной конвертации в фоновом режиме отправляется email-уведомление пользователю
-    и через WebSocket передается сообщение о совершенной транзакции.
+    Email-уведомление о совершенной транзакции ставится в outbox вместе с изменением балансов,
+    а через WebSocket передается сообщение о совершенной транзакции.
 
     Требуется аутентификация.
     """
 
-    source_balance = next((b for b in user.balances if b.currency == source), None)
+    exchange = await get_exchange(source=source, currencies=[currency])
+    exchange_rate = Decimal(exchange["quotes"][f"{source}{currency}"])
+
+    # Курс запрашивается до блокировки, чтобы не держать балансы во время запроса к API.
+    await create_balances(session, [(user.id, currency)])
+    balances = await lock_balances(session, user.id, [source, currency])
+    source_balance = balances.get(source)
     if not source_balance:
         raise BadRequestException(detail="You don't have this currency")
 
     if source_balance.amount < amount:
         raise BadRequestException(detail="Insufficient funds")
 
-    exchange = await get_exchange(source=source, currencies=[currency])
-    exchange_rate = Decimal(exchange["quotes"][f"{source}{currency}"])
-
-    target_balance = await find_or_create_balance(session, user.id, currency)
+    target_balance = balances[currency]
     source_balance.amount -= amount
     add_amount = round(amount * exchange_rate, 2)
     target_balance.amount += add_amount
@@ -252,14 +233,16 @@ async def convert_user_currency(
     if source_balance.amount == 0:
         await session.delete(source_balance)
 
-    await session.commit()
-    await session.refresh(user)
-    background_tasks.add_task(
-        send_email_async,
+    enqueue_email(
+        session,
         f"Convert currency",
         f"you exchanged {amount} {source} for {add_amount} {currency}",
         user.email,
     )
+    with tracer.span("commit"):
+        await session.commit()
+    with tracer.span("refresh"):
+        await session.refresh(user)
     await ws_manager.send_to_user(
         user.id,
         message=f"you exchanged {amount} {source} for {add_amount} {currency}",
@@ -270,7 +253,6 @@ async def convert_user_currency(
 
 @router.delete("/me/delete", status_code=status.HTTP_204_NO_CONTENT)
 async def user_delete(
-    background_tasks: BackgroundTasks,
     user=Depends(get_current_user),
     session: AsyncSession = Depends(get_db_session),
 ):
@@ -278,11 +260,10 @@ async def user_delete(
     Удаление аккаунта текущего пользователя.
 
     Этот эндпоинт позволяет текущему аутентифицированному пользователю удалить свой аккаунт.
-    Удаление производится из базы данных, и в фоновом режиме пользователю отправляется
+    Удаление производится из базы данных, и в той же транзакции в outbox ставится
     электронное письмо с уведомлением об удалении аккаунта.
 
     Зависимости:
-    - background_tasks (BackgroundTasks): Инструмент для выполнения фоновых задач.
     - user (User): Текущий пользователь, полученный из зависимости get_current_user.
     - session (AsyncSession): Сессия базы данных для выполнения транзакций.
 
@@ -292,17 +273,19 @@ async def user_delete(
     """
 
     await session.delete(user)
-    await session.commit()
-    background_tasks.add_task(
-        send_email_async,
+    enqueue_email(
+        session,
         f"delete account",
         f"your account successfully delete",
         user.email,
     )
+    await session.commit()
 
 
 @router.get(
-    "/evaluate_balance", dependencies=[Depends(RateLimiter(times=1, seconds=5))]
+    "/evaluate_balance",
+    response_model=ResponseValuation,
+    dependencies=[Depends(RateLimiter(times=1, seconds=5))],
 )
 @check_currencies
 async def evaluate_balance_to_only_currency(
@@ -318,8 +301,8 @@ async def evaluate_balance_to_only_currency(
     Конвертация и оценка общего капитала пользователя в указанной валюте.
 
     Этот эндпоинт позволяет пользователю оценить суммарный баланс всех его валютных балансов,
-    конвертированный в выбранную валюту (source). Валютный курс для конвертации
-    получается через внешний сервис обмена валют.
+    конвертированный в выбранную валюту (source). Курсы берутся из общей таблицы курсов
+    воркера; внешний сервис обмена валют запрашивается, только если нужных курсов в ней нет.
 
     Параметры:
     - source (str): Трехбуквенный код валюты (например, 'EUR'), в которую будет
@@ -327,25 +310,12 @@ async def evaluate_balance_to_only_currency(
     - user (User): Текущий пользователь, полученный из зависимости get_current_user.
 
     Возвращает:
-    - Строка с оценкой общего капитала пользователя в указанной валюте.
+    - response (ResponseValuation): Общий капитал в указанной валюте и оценка
+      каждого баланса (сумма, курс и стоимость в указанной валюте).
 
     Эндпоинт ограничен по частоте запросов (rate-limited) до 1 запроса в 5 секунд.
 
     Требуется аутентификация.
     """
 
-    user_currencies = [i.currency for i in user.balances]
-    exchange = await get_exchange(source=source, currencies=user_currencies)
-
-    rates_user_currencies = {
-        f"{code[3:]}": rate for code, rate in exchange["quotes"].items()
-    }
-
-    result = sum(
-        balance.amount / Decimal(rates_user_currencies.get(balance.currency, 1))
-        for balance in user.balances
-        if balance.currency in rates_user_currencies
-        or balance.currency == source.upper()
-    )
-
-    return f"Your capital in {source} is {round(result, 2)} {source}"
+    return await valuation_service.value_balances(user.balances, source.upper())
@@ -2,7 +2,18 @@ __all__ = (
     "Base",
     "User",
     "Balance",
+    "Email",
+    "Alert",
+    "Order",
+    "Fill",
+    "HoldingTotal",
+    "CurrencyRate",
+    "UserTotal",
 )
 
 
+from .alerts import Alert
+from .emails import Email
+from .orders import Fill, Order
+from .reports import CurrencyRate, HoldingTotal, UserTotal
 from .users import Balance, Base, User
@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from sqlalchemy import ForeignKey, Index, Numeric, String, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .users import Base
+
+
+class Alert(Base):
+    """
+    Модель ценового алерта пользователя.
+
+    Алерт срабатывает один раз, когда курс пары пересекает порог в заданном направлении:
+    above — курс поднялся до порога или выше, below — опустился до порога или ниже.
+    """
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    pair: Mapped[str] = mapped_column(String(6))
+    direction: Mapped[str]
+    threshold: Mapped[Numeric] = mapped_column(Numeric(precision=18, scale=8))
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    triggered_at: Mapped[datetime] = mapped_column(nullable=True)
+
+    __table_args__ = (
+        Index("ix_alerts_user_id", "user_id"),
+        Index(
+            "ix_alerts_active_pair",
+            "pair",
+            postgresql_where=text("triggered_at IS NULL"),
+        ),
+    )
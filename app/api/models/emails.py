@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from sqlalchemy import Index, Text, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .users import Base
+
+
+class Email(Base):
+    """
+    Модель письма в исходящей очереди (outbox).
+
+    Письмо записывается в той же транзакции, что и изменение данных пользователя,
+    а доставляет его отдельный воркер рассылки.
+    Статусы: pending — ожидает отправки, sent — доставлено, failed — исчерпаны попытки.
+    """
+
+    recipient: Mapped[str]
+    subject: Mapped[str]
+    body: Mapped[str] = mapped_column(Text)
+    status: Mapped[str] = mapped_column(default="pending", server_default="pending")
+    attempts: Mapped[int] = mapped_column(default=0, server_default="0")
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        default=datetime.utcnow, server_default=text("timezone('utc', now())")
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        default=datetime.utcnow, server_default=text("timezone('utc', now())")
+    )
+    sent_at: Mapped[datetime] = mapped_column(nullable=True)
+    last_error: Mapped[str] = mapped_column(Text, nullable=True)
+
+    __table_args__ = (
+        Index(
+            "ix_emails_pending_next_attempt_at",
+            "next_attempt_at",
+            postgresql_where=text("status = 'pending'"),
+        ),
+    )
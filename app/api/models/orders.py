@@ -0,0 +1,53 @@
+from datetime import datetime
+
+from sqlalchemy import ForeignKey, Index, Numeric, text
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from .users import Base
+
+
+class Order(Base):
+    """
+    Модель условной конвертации валюты (лимитного или отложенного ордера).
+
+    Ордер конвертирует amount из валюты source в валюту currency, когда курс пары
+    source/currency (сколько currency стоит 1 source) станет не больше (le) или
+    не меньше (ge) trigger_rate, либо в момент execute_at по текущему курсу.
+    Статусы: open — ожидает исполнения, filled — исполнен, cancelled — отменен
+    пользователем, rejected — на момент исполнения не хватило средств или не было
+    курса пары.
+    """
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    source: Mapped[str]
+    currency: Mapped[str]
+    amount: Mapped[Numeric] = mapped_column(Numeric(precision=10, scale=2))
+    condition: Mapped[str] = mapped_column(nullable=True)
+    trigger_rate: Mapped[Numeric] = mapped_column(
+        Numeric(precision=18, scale=8), nullable=True
+    )
+    execute_at: Mapped[datetime] = mapped_column(nullable=True)
+    status: Mapped[str] = mapped_column(default="open", server_default="open")
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    fills = relationship("Fill", back_populates="order", lazy="selectin")
+
+    __table_args__ = (
+        Index("ix_orders_user_id", "user_id"),
+        Index("ix_orders_open", "id", postgresql_where=text("status = 'open'")),
+    )
+
+
+class Fill(Base):
+    """
+    Модель исполнения ордера: курс и суммы списания и зачисления.
+    """
+
+    order_id: Mapped[int] = mapped_column(ForeignKey("orders.id", ondelete="CASCADE"))
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    rate: Mapped[Numeric] = mapped_column(Numeric(precision=18, scale=8))
+    amount_from: Mapped[Numeric] = mapped_column(Numeric(precision=10, scale=2))
+    amount_to: Mapped[Numeric] = mapped_column(Numeric(precision=10, scale=2))
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    order = relationship("Order", back_populates="fills")
+
+    __table_args__ = (Index("ix_fills_order_id", "order_id"),)
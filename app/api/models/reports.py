@@ -0,0 +1,68 @@
+from datetime import datetime
+
+from sqlalchemy import ForeignKey, Index, Numeric, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .users import Base
+
+
+class HoldingTotal(Base):
+    """
+    Сводка балансов по валютам: сумма и количество балансов.
+
+    Таблица поддерживается триггером на balances при каждой вставке, изменении и
+    удалении баланса. Чтобы параллельные транзакции не ждали друг друга на одной
+    строке валюты, сводка разбита на шарды по user_id % 16; итог по валюте —
+    сумма не более 16 строк.
+    """
+
+    __tablename__ = "holding_totals"
+
+    currency: Mapped[str]
+    shard: Mapped[int]
+    total: Mapped[Numeric] = mapped_column(
+        Numeric(precision=20, scale=2), default=0, server_default="0"
+    )
+    holders: Mapped[int] = mapped_column(default=0, server_default="0")
+
+    __table_args__ = (UniqueConstraint("currency", "shard"),)
+
+
+class CurrencyRate(Base):
+    """
+    Курс валюты в базовой валюте (settings.RATES.SOURCE) для отчетов в базе данных.
+
+    Периодически обновляется из таблицы курсов воркера; по этим курсам
+    оценивается сводка балансов по валютам. reference — опорный курс, по
+    которому user_totals оценивает балансы; задается при первом сохранении
+    курса валюты и дальше не меняется.
+    """
+
+    __tablename__ = "currency_rates"
+
+    currency: Mapped[str] = mapped_column(String(3), unique=True)
+    rate: Mapped[Numeric] = mapped_column(Numeric(precision=24, scale=12))
+    reference: Mapped[Numeric] = mapped_column(Numeric(precision=24, scale=12))
+    updated_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+
+
+class UserTotal(Base):
+    """
+    Оценка балансов пользователя по опорным курсам currency_rates.reference.
+
+    Таблица поддерживается триггерами на balances и currency_rates, поэтому
+    всегда совпадает с суммой amount × reference по балансам пользователя в
+    валютах, для которых сохранен курс. Опорные курсы не меняются, и оценка
+    по текущим курсам отличается от value не больше чем в отношение текущего
+    курса к опорному по худшей валюте — на этом строится выбор крупнейших
+    пользователей без чтения всех балансов.
+    """
+
+    __tablename__ = "user_totals"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), unique=True
+    )
+    value: Mapped[Numeric] = mapped_column(Numeric, default=0, server_default="0")
+
+    __table_args__ = (Index("ix_user_totals_value_user_id", "value", "user_id"),)
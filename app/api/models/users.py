@@ -1,6 +1,6 @@
 from datetime import date
 
-from sqlalchemy import ForeignKey, Numeric
+from sqlalchemy import ForeignKey, Index, Numeric, UniqueConstraint
 from sqlalchemy.orm import (
     DeclarativeBase,
     Mapped,
@@ -31,6 +31,10 @@ class Balance(Base):
     """
     Модель для учета баланса пользователя в определенной валюте.
     Содержит информацию о валюте и количестве средств.
+
+    У пользователя не больше одного баланса в каждой валюте. Ограничение
+    проверяется в конце транзакции, чтобы в одной транзакции можно было удалить
+    баланс и создать новый в той же валюте.
     """
 
     currency: Mapped[str] = mapped_column(default="RUB", server_default="RUB")
@@ -40,6 +44,16 @@ class Balance(Base):
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
     user = relationship("User", back_populates="balances")
 
+    __table_args__ = (
+        UniqueConstraint("user_id", "currency", name="uq_balances_user_id_currency"),
+        Index("ix_balances_currency_id", "currency", "id"),
+        Index(
+            "ix_balances_currency_pattern",
+            "currency",
+            postgresql_ops={"currency": "varchar_pattern_ops"},
+        ),
+    )
+
 
 class User(Base):
     """
@@ -59,3 +73,19 @@ class User(Base):
         lazy="selectin",
         cascade="all, delete, delete-orphan",
     )
+
+    __table_args__ = (
+        Index("ix_users_created_at_id", "created_at", "id"),
+        Index(
+            "ix_users_username_trgm",
+            "username",
+            postgresql_using="gin",
+            postgresql_ops={"username": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_users_email_trgm",
+            "email",
+            postgresql_using="gin",
+            postgresql_ops={"email": "gin_trgm_ops"},
+        ),
+    )
@@ -5,7 +5,17 @@ __all__ = (
     "ResponseCurrency",
     "BalanceSchema",
     "ResponseUserBalance",
+    "AlertSchema",
+    "ResponseAlert",
+    "OrderSchema",
+    "ResponseOrder",
+    "ResponseFill",
+    "ResponseHolding",
+    "ResponseValuation",
 )
 
+from .alerts import AlertSchema, ResponseAlert
 from .currency import ResponseCurrency
+from .orders import OrderSchema, ResponseFill, ResponseOrder
 from .users import BalanceSchema, DataToken, ResponseUserBalance, Token, UserBase
+from .valuation import ResponseHolding, ResponseValuation
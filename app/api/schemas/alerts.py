@@ -0,0 +1,27 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import Literal
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class AlertSchema(BaseModel):
+    """
+    Схема создания ценового алерта: валютная пара, направление пересечения и порог.
+    """
+
+    pair: str = Field(min_length=6, max_length=6, examples=["EURUSD"])
+    direction: Literal["above", "below"]
+    threshold: Decimal = Field(gt=0)
+
+
+class ResponseAlert(AlertSchema):
+    """
+    Модель ответа API с информацией о ценовом алерте.
+    """
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    created_at: datetime
+    triggered_at: datetime | None = None
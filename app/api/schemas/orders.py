@@ -0,0 +1,54 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import Literal
+
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+
+class OrderSchema(BaseModel):
+    """
+    Схема создания ордера на конвертацию.
+
+    Ордер исполняется либо по условию на курс пары source/currency
+    (condition и trigger_rate), либо в заданное время execute_at по текущему курсу.
+    """
+
+    source: str = Field(min_length=3, max_length=3, examples=["USD"])
+    currency: str = Field(min_length=3, max_length=3, examples=["EUR"])
+    amount: Decimal = Field(gt=0, decimal_places=2)
+    condition: Literal["le", "ge"] | None = None
+    trigger_rate: Decimal | None = Field(default=None, gt=0)
+    execute_at: datetime | None = None
+
+    @model_validator(mode="after")
+    def check_trigger(self):
+        by_rate = self.condition is not None and self.trigger_rate is not None
+        if by_rate == (self.execute_at is not None):
+            raise ValueError("Specify either condition with trigger_rate or execute_at")
+        return self
+
+
+class ResponseFill(BaseModel):
+    """
+    Модель ответа API с информацией об исполнении ордера.
+    """
+
+    model_config = ConfigDict(from_attributes=True)
+
+    rate: Decimal
+    amount_from: Decimal
+    amount_to: Decimal
+    created_at: datetime
+
+
+class ResponseOrder(OrderSchema):
+    """
+    Модель ответа API с информацией об ордере и его исполнении.
+    """
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    status: str
+    created_at: datetime
+    fills: list[ResponseFill] = []
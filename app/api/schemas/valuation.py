@@ -0,0 +1,28 @@
+from decimal import Decimal
+
+from pydantic import BaseModel, ConfigDict
+
+
+class ResponseHolding(BaseModel):
+    """
+    Оценка баланса пользователя в одной валюте.
+    """
+
+    model_config = ConfigDict(from_attributes=True)
+
+    currency: str
+    amount: Decimal
+    rate: Decimal
+    value: Decimal
+
+
+class ResponseValuation(BaseModel):
+    """
+    Модель ответа API с оценкой капитала пользователя: итог и разбивка по валютам.
+    """
+
+    model_config = ConfigDict(from_attributes=True)
+
+    currency: str
+    total: Decimal
+    holdings: list[ResponseHolding]
@@ -0,0 +1,59 @@
+import argparse
+import asyncio
+import csv
+import sys
+import time
+
+from app.core import sessionmanager
+from app.services.valuation import valuation_service
+
+
+async def aum_report(currency: str, top: int, output: str | None):
+    """Отчет об активах всех пользователей в указанной валюте."""
+
+    started = time.perf_counter()
+    file = open(output, "w", newline="") if output else None
+    writer = csv.writer(file) if file else None
+    if writer:
+        writer.writerow(["user_id", f"value_{currency}"])
+    try:
+        async with sessionmanager.session() as session:
+            report = await valuation_service.value_all(
+                session,
+                currency,
+                top=top,
+                sink=(lambda *row: writer.writerow(row)) if writer else None,
+            )
+    finally:
+        if file:
+            file.close()
+        await sessionmanager.close()
+
+    print(f"AUM in {currency}: {report.totals.total} ({report.users} users)")
+    for holding in report.totals.holdings:
+        print(
+            f"  {holding.currency}: {holding.amount} x {holding.rate:.8f} "
+            f"= {holding.value} {currency}"
+        )
+    print(f"Top {len(report.top)} users:")
+    for user_id, value in report.top:
+        print(f"  user {user_id}: {value} {currency}")
+    print(f"Done in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description="Отчет об активах (AUM) всех пользователей."
+    )
+    parser.add_argument("--currency", default="USD", help="Валюта отчета")
+    parser.add_argument(
+        "--top", type=int, default=10, help="Сколько крупнейших пользователей вывести"
+    )
+    parser.add_argument("--output", help="CSV файл для оценки каждого пользователя")
+    args = parser.parse_args()
+
+    await aum_report(currency=args.currency.upper(), top=args.top, output=args.output)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
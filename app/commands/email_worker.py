@@ -0,0 +1,36 @@
+import argparse
+import asyncio
+import logging
+
+from app.core import sessionmanager
+from app.services.mailer import EmailWorker, SMTPPool
+
+
+async def run_worker(once: bool = False):
+    """Запуск воркера рассылки писем из outbox."""
+
+    pool = SMTPPool.from_settings()
+    worker = EmailWorker(pool)
+    try:
+        await worker.run(once=once)
+    finally:
+        await pool.close()
+        await sessionmanager.close()
+    print(f"Emails sent: {worker.sent}, failed attempts: {worker.failed}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Воркер рассылки писем из outbox.")
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="Отправить все готовые письма и завершиться",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    await run_worker(once=args.once)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
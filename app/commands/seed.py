@@ -0,0 +1,264 @@
+import argparse
+import asyncio
+import math
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from sqlalchemy import text
+
+from app.api.endpoints.users import hash_pass
+from app.core import sessionmanager
+
+MAX_AMOUNT = Decimal("99999999.99")
+
+
+def parse_weights(value: str) -> dict[str, float]:
+    """Разбирает распределение вида "RUB:40,USD:30,EUR:30"."""
+
+    weights = {}
+    for item in value.split(","):
+        key, _, weight = item.partition(":")
+        weights[key.strip().upper()] = float(weight or 1)
+    if not weights or any(weight <= 0 for weight in weights.values()):
+        raise argparse.ArgumentTypeError(f"Incorrect distribution: {value}")
+    return weights
+
+
+class Generator:
+    """
+    Детерминированный генератор пользователей и балансов.
+
+    Один и тот же seed всегда дает один и тот же набор данных.
+
+    Attributes:
+        currencies (dict[str, float]): Веса валют балансов.
+        balances (dict[int, float]): Веса количества балансов у пользователя.
+        median (float): Медиана суммы баланса (суммы распределены логнормально).
+        sigma (float): Разброс логнормального распределения сумм.
+    """
+
+    def __init__(
+        self,
+        seed: int,
+        currencies: dict[str, float],
+        balances: dict[int, float],
+        median: float,
+        sigma: float,
+    ):
+        self.random = random.Random(seed)
+        self.currencies = currencies
+        self.counts = list(balances)
+        self.count_weights = list(balances.values())
+        self.mu = math.log(median)
+        self.sigma = sigma
+
+    def pick_currencies(self) -> list[str]:
+        """Выбирает различные валюты пользователя с учетом весов."""
+        count = self.random.choices(self.counts, self.count_weights)[0]
+        # Взвешенная выборка без возвращения (Efraimidis–Spirakis).
+        keys = sorted(
+            self.currencies,
+            key=lambda code: self.random.random() ** (1 / self.currencies[code]),
+            reverse=True,
+        )
+        return keys[: min(count, len(keys))]
+
+    def amount(self) -> Decimal:
+        value = Decimal(f"{self.random.lognormvariate(self.mu, self.sigma):.2f}")
+        return min(value, MAX_AMOUNT)
+
+
+async def seed(
+    users: int,
+    prefix: str,
+    generator: Generator,
+    batch: int,
+):
+    """
+    Заменяет тестовых пользователей с префиксом prefix новым набором данных через COPY.
+
+    Все делается в одной транзакции: старые тестовые пользователи и их балансы
+    удаляются, новые записываются через COPY, триггеры сводок holding_totals и
+    user_totals на время загрузки отключаются, а сводки пересчитываются одним
+    запросом каждая.
+    """
+
+    password = hash_pass("password")
+    today = date.today()
+    pattern = prefix.replace("_", r"\_") + "%"
+
+    async with sessionmanager.session() as session:
+        connection = await session.connection()
+        raw = (await connection.get_raw_connection()).driver_connection
+
+        started = time.perf_counter()
+        await session.execute(text("LOCK TABLE users IN EXCLUSIVE MODE"))
+        await session.execute(
+            text(
+                "ALTER TABLE balances DISABLE TRIGGER balances_holding_totals, "
+                "DISABLE TRIGGER balances_user_totals"
+            )
+        )
+        await session.execute(
+            text(
+                "DELETE FROM balances USING users "
+                "WHERE balances.user_id = users.id AND users.username LIKE :pattern"
+            ),
+            {"pattern": pattern},
+        )
+        deleted = (
+            await session.execute(
+                text("DELETE FROM users WHERE username LIKE :pattern"),
+                {"pattern": pattern},
+            )
+        ).rowcount
+        first_id = (
+            await session.execute(text("SELECT coalesce(max(id), 0) + 1 FROM users"))
+        ).scalar()
+        print(
+            f"Removed {deleted} previous seed users in {time.perf_counter() - started:.1f}s"
+        )
+
+        user_rows = balance_rows = 0
+        started = time.perf_counter()
+        for start in range(0, users, batch):
+            user_batch = []
+            balance_batch = []
+            for number in range(start, min(start + batch, users)):
+                user_id = first_id + number
+                username = f"{prefix}{number}"
+                user_batch.append(
+                    (
+                        user_id,
+                        username,
+                        password,
+                        f"{username}@example.com",
+                        today - timedelta(days=generator.random.randrange(1000)),
+                        False,
+                    )
+                )
+                for currency in generator.pick_currencies():
+                    balance_batch.append((user_id, currency, generator.amount()))
+            await raw.copy_records_to_table(
+                "users",
+                records=user_batch,
+                columns=[
+                    "id",
+                    "username",
+                    "password",
+                    "email",
+                    "created_at",
+                    "is_admin",
+                ],
+            )
+            await raw.copy_records_to_table(
+                "balances",
+                records=balance_batch,
+                columns=["user_id", "currency", "amount"],
+            )
+            user_rows += len(user_batch)
+            balance_rows += len(balance_batch)
+            elapsed = time.perf_counter() - started
+            print(
+                f"  users {user_rows}/{users}, balances {balance_rows}, "
+                f"{(user_rows + balance_rows) / elapsed:,.0f} rows/s"
+            )
+
+        await session.execute(
+            text(
+                "SELECT setval(pg_get_serial_sequence('users', 'id'), max(id)) FROM users"
+            )
+        )
+        await session.execute(
+            text(
+                "ALTER TABLE balances ENABLE TRIGGER balances_holding_totals, "
+                "ENABLE TRIGGER balances_user_totals"
+            )
+        )
+        await session.execute(text("DELETE FROM holding_totals"))
+        await session.execute(
+            text(
+                """
+                INSERT INTO holding_totals (currency, shard, total, holders)
+                SELECT currency, user_id % 16, sum(amount), count(*)
+                FROM balances
+                GROUP BY currency, user_id % 16
+                """
+            )
+        )
+        await session.execute(text("DELETE FROM user_totals"))
+        await session.execute(
+            text(
+                """
+                INSERT INTO user_totals (user_id, value)
+                SELECT b.user_id, sum(b.amount * r.reference)
+                FROM balances b
+                JOIN currency_rates r ON r.currency = b.currency
+                GROUP BY b.user_id
+                """
+            )
+        )
+        await session.commit()
+        elapsed = time.perf_counter() - started
+
+    async with sessionmanager.connect() as connection:
+        await connection.execute(text("ANALYZE users"))
+        await connection.execute(text("ANALYZE balances"))
+
+    print(
+        f"Seeded {user_rows} users and {balance_rows} balances in {elapsed:.1f}s "
+        f"({(user_rows + balance_rows) / elapsed:,.0f} rows/s)"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description="Заполнение базы тестовыми пользователями и балансами."
+    )
+    parser.add_argument(
+        "--users", type=int, default=100000, help="Количество пользователей"
+    )
+    parser.add_argument(
+        "--prefix", default="seed_", help="Префикс имен тестовых пользователей"
+    )
+    parser.add_argument(
+        "--currencies",
+        type=parse_weights,
+        default="RUB:40,USD:30,EUR:20,GBP:5,CNY:5",
+        help="Веса валют балансов",
+    )
+    parser.add_argument(
+        "--balances",
+        type=parse_weights,
+        default="1:50,2:30,3:20",
+        help="Веса количества балансов у пользователя",
+    )
+    parser.add_argument(
+        "--median", type=float, default=1000, help="Медиана суммы баланса"
+    )
+    parser.add_argument(
+        "--sigma", type=float, default=1.0, help="Разброс сумм балансов"
+    )
+    parser.add_argument("--seed", type=int, default=42, help="Seed генератора")
+    parser.add_argument(
+        "--batch", type=int, default=50000, help="Пользователей в одном COPY"
+    )
+    args = parser.parse_args()
+
+    generator = Generator(
+        seed=args.seed,
+        currencies=args.currencies,
+        balances={int(count): weight for count, weight in args.balances.items()},
+        median=args.median,
+        sigma=args.sigma,
+    )
+    try:
+        await seed(args.users, args.prefix, generator, args.batch)
+    finally:
+        await sessionmanager.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,3 +1,5 @@
+from typing import Literal
+
 import dotenv
 from pydantic import BaseModel
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -63,17 +65,202 @@ class EmailSettings(BaseModel):
     Атрибуты:
         NAME (str): Имя или адрес электронной почты, используемый для отправки писем.
         PASS (str): Пароль для доступа к сервису электронной почты.
+        HOST (str): Хост SMTP-сервера.
+        PORT (int): Порт SMTP-сервера.
+        TLS (bool): Использовать ли TLS при подключении к SMTP-серверу.
+        SENDER (str | None): Адрес отправителя. По умолчанию совпадает с NAME.
+        POOL (int): Количество постоянных SMTP-соединений у воркера рассылки.
+        BATCH (int): Максимальное количество писем, забираемых из outbox за один проход.
+        RETRIES (int): Количество попыток доставки, после которого письмо помечается как failed.
+        BACKOFF (int): Базовая задержка в секундах перед повторной попыткой доставки.
+        INTERVAL (float): Пауза в секундах между опросами пустой очереди.
     """
 
     NAME: str
     PASS: str
+    HOST: str = "smtp.yandex.ru"
+    PORT: int = 465
+    TLS: bool = True
+    SENDER: str | None = None
+    POOL: int = 2
+    BATCH: int = 50
+    RETRIES: int = 5
+    BACKOFF: int = 30
+    INTERVAL: float = 1.0
+
+
+class WebSocketSettings(BaseModel):
+    """
+    Настройки рассылки сообщений через WebSocket.
+
+    Атрибуты:
+        QUEUE (int): Максимальное количество неотправленных сообщений в очереди одного соединения.
+        POLICY (str): Поведение при переполнении очереди: "drop" — отключить медленного клиента,
+            "coalesce" — отбросить самое старое неотправленное сообщение.
+    """
+
+    QUEUE: int = 100
+    POLICY: Literal["drop", "coalesce"] = "drop"
+
+
+class RateSettings(BaseModel):
+    """
+    Настройки фонового обновления курсов валют.
+
+    Атрибуты:
+        SOURCE (str): Базовая валюта, относительно которой запрашиваются курсы.
+        INTERVAL (int): Период обновления курсов в секундах.
+        THRESHOLD (float): Минимальное относительное изменение курса, о котором сообщается подписчикам.
+        REPORT (int): Период обновления курсов и оценок пользователей для отчетов в секундах.
+    """
+
+    SOURCE: str = "USD"
+    INTERVAL: int = 60
+    THRESHOLD: float = 0.0001
+    REPORT: int = 300
+
+
+class LimitSettings(BaseModel):
+    """
+    Настройки ограничения частоты запросов.
+
+    Атрибуты:
+        SYNC (float): Период сверки локальных счетчиков воркера с Redis в секундах.
+        RULES (dict[str, str]): Лимиты по шаблону маршрута в виде "запросов/секунд",
+            например {"/api/currency/historical": "2/5", "ws": "5/5"}; ключ "ws" — сообщения WebSocket,
+            "ws:rates" — сообщения подписок на курсы по WebSocket.
+            Маршруты без правила используют лимит, заданный в коде.
+        TIERS (dict[str, float]): Множители лимита по уровню пользователя: anonymous, user, admin.
+    """
+
+    SYNC: float = 1.0
+    RULES: dict[str, str] = {}
+    TIERS: dict[str, float] = {"anonymous": 1, "user": 1, "admin": 10}
+
+
+class MediaSettings(BaseModel):
+    """
+    Настройки хранения изображений профиля.
+
+    Атрибуты:
+        DIR (str): Каталог для изображений.
+        LIMIT (int): Максимальный размер загружаемого изображения в байтах.
+        CHUNK (int): Размер блока, которым загрузка пишется на диск, в байтах.
+        SIZE (int): Максимальная сторона миниатюры в пикселях.
+        WORKERS (int): Количество процессов, создающих миниатюры.
+    """
+
+    DIR: str = "app/media"
+    LIMIT: int = 5 * 1024 * 1024
+    CHUNK: int = 64 * 1024
+    SIZE: int = 128
+    WORKERS: int = 2
+
+
+class RedisSettings(BaseModel):
+    """
+    Настройки подключения к Redis.
+
+    Данные приложения разделены на хранилища, каждому из которых можно задать
+    свой адрес (пустая строка — использовать URL). Адрес определяет и топологию:
+    redis://host:port/db — отдельный сервер, redis+sentinel://host:port,host:port/master/db —
+    Redis Sentinel, redis+cluster://host:port,host:port — Redis Cluster (кроме PUBSUB).
+
+    Атрибуты:
+        URL (str): Основное хранилище: список валют, снимок курсов, блокировки, метрики.
+        CACHE (str): Кеш ответов эндпоинтов; может вытеснять ключи (maxmemory-policy allkeys-lru).
+        LIMITER (str): Общие ведра ограничителя частоты запросов.
+        PUBSUB (str): Pub/sub для обмена сообщениями между воркерами.
+        POOL (int): Максимальное количество соединений воркера с одним хранилищем (узлом кластера).
+        WAIT (float): Ожидание свободного соединения из пула в секундах.
+        TIMEOUT (float): Таймаут ответа на команду в секундах (кроме подписки pub/sub).
+        CONNECT (float): Таймаут установки соединения в секундах.
+    """
+
+    URL: str = "redis://redis:6379/0"
+    CACHE: str = ""
+    LIMITER: str = ""
+    PUBSUB: str = ""
+    POOL: int = 50
+    WAIT: float = 5
+    TIMEOUT: float = 5
+    CONNECT: float = 2
+
+
+class CacheSettings(BaseModel):
+    """
+    Настройки хранения кешированных значений.
+
+    Атрибуты:
+        COMPRESS (int): Размер закодированного значения в байтах, начиная с которого оно
+            сжимается zlib; 0 — не сжимать.
+        LEVEL (int): Уровень сжатия zlib (1 — быстрее, 9 — компактнее).
+        HOT (int): Объем локального уровня кеша воркера (декодированные значения последних
+            прочитанных ключей), считается по размеру закодированных значений в байтах; 0 — выключен.
+        LOCAL (float): Максимальное время жизни значения в локальном уровне в секундах.
+    """
+
+    COMPRESS: int = 1024
+    LEVEL: int = 1
+    HOT: int = 16 * 1024 * 1024
+    LOCAL: float = 60
+
+
+class MetricsSettings(BaseModel):
+    """
+    Настройки сбора метрик.
+
+    Атрибуты:
+        INTERVAL (int): Период переноса метрик воркера в Redis в секундах.
+    """
+
+    INTERVAL: int = 5
+
+
+class LoopSettings(BaseModel):
+    """
+    Настройки контроля задержки цикла событий.
+
+    Атрибуты:
+        INTERVAL (float): Период проверки задержки цикла событий в секундах.
+        THRESHOLD (float): Задержка в мс, начиная с которой цикл считается заблокированным
+            и стек блокирующего кода записывается в лог.
+        COOLDOWN (float): Минимальный интервал в секундах между записями в лог одного и того же места блокировки.
+        REPORT (str): Файл, в который воркер при остановке дописывает сводку мест блокировки
+            (JSON Lines); пустая строка — сводка не пишется.
+    """
+
+    INTERVAL: float = 0.05
+    THRESHOLD: float = 100
+    COOLDOWN: float = 60
+    REPORT: str = ""
+
+
+class TraceSettings(BaseModel):
+    """
+    Настройки трассировки запросов.
+
+    Атрибуты:
+        EXPORTER (str): Куда отправлять трассы: "none" — трассировка выключена, "file" — файл
+            OTLP JSON Lines, "otlp" — коллектор по протоколу OTLP/HTTP (JSON).
+        PATH (str): Файл для трасс при EXPORTER="file".
+        ENDPOINT (str): Адрес коллектора OTLP/HTTP при EXPORTER="otlp".
+        SLOW (float): Длительность запроса в мс, начиная с которой трасса сохраняется всегда.
+        RATIO (float): Доля сохраняемых трасс остальных запросов.
+    """
+
+    EXPORTER: Literal["none", "file", "otlp"] = "none"
+    PATH: str = "traces.jsonl"
+    ENDPOINT: str = "http://localhost:4318"
+    SLOW: float = 500
+    RATIO: float = 0.01
 
 
 class Settings(BaseSettings):
     """
     Агрегированные настройки приложения, загружаемые из переменных окружения.
 
-    Этот класс объединяет все отдельные классы настроек (DB, AUTH, API, EMAIL)
+    Этот класс объединяет все отдельные классы настроек (DB, AUTH, API, EMAIL, WS, RATES, LIMITS, MEDIA, REDIS, CACHE, METRICS, LOOP, TRACE)
     и загружает их конфигурации из файла .env с использованием `dotenv` и `pydantic_settings`.
 
     Переменная класса `model_config` используется для указания расположения файла .env
@@ -84,12 +271,30 @@ class Settings(BaseSettings):
         AUTH (AuthSettings): Настройки аутентификации.
         API (CurrencySettings): Настройки API валют.
         EMAIL (EmailSettings): Настройки сервиса электронной почты.
+        WS (WebSocketSettings): Настройки рассылки сообщений через WebSocket.
+        RATES (RateSettings): Настройки фонового обновления курсов валют.
+        LIMITS (LimitSettings): Настройки ограничения частоты запросов.
+        MEDIA (MediaSettings): Настройки хранения изображений профиля.
+        REDIS (RedisSettings): Настройки подключения к Redis.
+        CACHE (CacheSettings): Настройки хранения кешированных значений.
+        METRICS (MetricsSettings): Настройки сбора метрик.
+        LOOP (LoopSettings): Настройки контроля задержки цикла событий.
+        TRACE (TraceSettings): Настройки трассировки запросов.
     """
 
     DB: PostgresqlSettings
     AUTH: AuthSettings
     API: CurrencySettings
     EMAIL: EmailSettings
+    WS: WebSocketSettings = WebSocketSettings()
+    RATES: RateSettings = RateSettings()
+    LIMITS: LimitSettings = LimitSettings()
+    MEDIA: MediaSettings = MediaSettings()
+    REDIS: RedisSettings = RedisSettings()
+    CACHE: CacheSettings = CacheSettings()
+    METRICS: MetricsSettings = MetricsSettings()
+    LOOP: LoopSettings = LoopSettings()
+    TRACE: TraceSettings = TraceSettings()
 
     model_config = SettingsConfigDict(
         env_file=dotenv.find_dotenv(".env"),
@@ -1,4 +1,5 @@
 import contextlib
+import time
 from typing import AsyncIterator
 
 from sqlalchemy.ext.asyncio import (
@@ -7,8 +8,11 @@ from sqlalchemy.ext.asyncio import (
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.tracing import instrument_engine, tracer
 
 db_url: str = (
     f"postgresql+asyncpg://{settings.DB.USER}:"
@@ -17,6 +21,24 @@ db_url: str = (
 )
 
 
+class MeteredPool(AsyncAdaptedQueuePool):
+    """
+    Пул соединений, измеряющий время ожидания свободного соединения.
+
+    _do_get — место, где QueuePool ждет освобождения соединения при исчерпанном
+    пуле, поэтому его длительность и есть время ожидания checkout.
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.observe(
+                "db_pool_checkout_seconds", (), time.perf_counter() - started
+            )
+
+
 class DBSessionManager:
     """
     Менеджер сессий базы данных для асинхронного взаимодействия с SQLAlchemy.
@@ -35,7 +57,7 @@ class DBSessionManager:
     """
 
     def __init__(self, url: str, echo: bool = False):
-        self.engine = create_async_engine(url=url, echo=echo)
+        self.engine = create_async_engine(url=url, echo=echo, poolclass=MeteredPool)
         self.session_maker = async_sessionmaker(
             bind=self.engine,
             autoflush=False,
@@ -43,6 +65,15 @@ class DBSessionManager:
             expire_on_commit=False,
         )
 
+    def pool_stats(self):
+        """Состояние пула соединений для метрик."""
+        if self.engine is None:
+            return
+        pool = self.engine.pool
+        yield "db_pool_connections", ("checked_out",), pool.checkedout()
+        yield "db_pool_connections", ("idle",), pool.checkedin()
+        yield "db_pool_connections", ("overflow",), max(pool.overflow(), 0)
+
     async def close(self):
         """Асинхронно закрывает движок базы данных и очищает ресурсы."""
         if self.engine is None:
@@ -82,6 +113,8 @@ class DBSessionManager:
 
 
 sessionmanager = DBSessionManager(url=db_url, echo=False)
+metrics.register(sessionmanager.pool_stats)
+instrument_engine(sessionmanager.engine, tracer)
 
 
 async def get_db_session():
@@ -0,0 +1,185 @@
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Callable, Iterable
+
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# Имя метрики: (тип, описание, имена меток).
+DEFINITIONS: dict[str, tuple[str, str, tuple[str, ...]]] = {
+    "http_requests_total": (
+        "counter",
+        "HTTP requests by route and status.",
+        ("method", "route", "status"),
+    ),
+    "http_request_duration_seconds": (
+        "histogram",
+        "HTTP request latency by route.",
+        ("method", "route"),
+    ),
+    "http_requests_in_flight": (
+        "gauge",
+        "HTTP requests being processed by route.",
+        ("method", "route"),
+    ),
+    "upstream_requests_total": (
+        "counter",
+        "Rates API calls by endpoint and status.",
+        ("endpoint", "status"),
+    ),
+    "upstream_request_duration_seconds": (
+        "histogram",
+        "Rates API call latency by endpoint.",
+        ("endpoint",),
+    ),
+    "cache_requests_total": (
+        "counter",
+        "Cache lookups by key family and result (hit or miss).",
+        ("family", "result"),
+    ),
+    "rate_limit_rejections_total": (
+        "counter",
+        "Requests rejected by the rate limiter by route.",
+        ("route",),
+    ),
+    "db_pool_checkout_seconds": (
+        "histogram",
+        "Time spent waiting for a database connection from the pool.",
+        (),
+    ),
+    "db_pool_connections": (
+        "gauge",
+        "Database pool connections by state.",
+        ("state",),
+    ),
+    "ws_connections": ("gauge", "Open WebSocket connections.", ()),
+    "ws_queued_messages": (
+        "gauge",
+        "Messages waiting in WebSocket send queues.",
+        (),
+    ),
+    "ws_send_lag_seconds": (
+        "histogram",
+        "Delay between queueing a WebSocket message and sending it.",
+        (),
+    ),
+    "ws_dropped_messages_total": (
+        "counter",
+        "WebSocket messages dropped on send queue overflow.",
+        (),
+    ),
+    "event_loop_lag_seconds": (
+        "histogram",
+        "Delay between scheduling a callback on the event loop and running it.",
+        (),
+    ),
+    "event_loop_lag_max_seconds": (
+        "gauge",
+        "Maximum event loop lag since the previous collection.",
+        (),
+    ),
+    "event_loop_blocks_total": (
+        "counter",
+        "Event loop lag measurements above the blocking threshold.",
+        (),
+    ),
+}
+
+Labels = tuple[str, ...]
+Collector = Callable[[], Iterable[tuple[str, Labels, float]]]
+
+
+class Metrics:
+    """
+    Метрики воркера: счетчики, гистограммы и измерители (gauge).
+
+    Все обновления выполняются в потоке цикла событий воркера, поэтому обходятся
+    без блокировок: счетчик — одно сложение в словаре, наблюдение гистограммы —
+    bisect по границам корзин и два сложения. Метки передаются кортежем значений
+    в порядке, объявленном в DEFINITIONS.
+
+    Счетчики и гистограммы накапливают приращения с момента последнего сбора
+    (см. drain), их суммирование между воркерами выполняет экспортер. Значения
+    измерителей, которые дешевле посчитать в момент сбора (размер пула, число
+    соединений), отдают зарегистрированные сборщики.
+
+    Attributes:
+        buckets (tuple[float, ...]): Верхние границы корзин гистограмм в секундах.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._counters: defaultdict[tuple[str, Labels], float] = defaultdict(float)
+        self._histograms: dict[tuple[str, Labels], list] = {}
+        self._gauges: defaultdict[tuple[str, Labels], float] = defaultdict(float)
+        self._collectors: list[Collector] = []
+
+    def inc(self, name: str, labels: Labels = (), value: float = 1):
+        """Увеличивает счетчик."""
+        self._counters[(name, labels)] += value
+
+    def observe(self, name: str, labels: Labels, value: float):
+        """Добавляет наблюдение в гистограмму."""
+        histogram = self._histograms.get((name, labels))
+        if histogram is None:
+            histogram = self._histograms[(name, labels)] = [
+                [0] * (len(self.buckets) + 1),
+                0.0,
+            ]
+        histogram[0][bisect_left(self.buckets, value)] += 1
+        histogram[1] += value
+
+    def add(self, name: str, labels: Labels, value: float):
+        """Изменяет измеритель на value (например, +1/-1 для запросов в работе)."""
+        self._gauges[(name, labels)] += value
+
+    def register(self, collector: Collector):
+        """Регистрирует функцию, возвращающую значения измерителей в момент сбора."""
+        self._collectors.append(collector)
+
+    def drain(self) -> tuple[dict, dict]:
+        """
+        Забирает накопленные приращения счетчиков и гистограмм.
+
+        Returns:
+            tuple[dict, dict]: Приращения счетчиков и гистограмм
+            ({(name, labels): [counts, sum]}, counts — по корзинам, последняя — +Inf).
+        """
+        counters, self._counters = self._counters, defaultdict(float)
+        histograms, self._histograms = self._histograms, {}
+        return counters, histograms
+
+    def restore(self, counters: dict, histograms: dict):
+        """Возвращает приращения, которые не удалось передать экспортеру."""
+        for key, value in counters.items():
+            self._counters[key] += value
+        for key, (counts, total) in histograms.items():
+            histogram = self._histograms.setdefault(
+                key, [[0] * (len(self.buckets) + 1), 0.0]
+            )
+            histogram[0] = [a + b for a, b in zip(histogram[0], counts)]
+            histogram[1] += total
+
+    def gauges(self) -> dict[tuple[str, Labels], float]:
+        """Текущие значения всех измерителей, включая значения сборщиков."""
+        gauges = dict(self._gauges)
+        for collector in self._collectors:
+            for name, labels, value in collector():
+                gauges[(name, labels)] = value
+        return gauges
+
+
+metrics = Metrics()
@@ -0,0 +1,264 @@
+import contextlib
+import random
+import re
+import time
+from contextvars import ContextVar, Token
+from functools import wraps
+from typing import Callable
+
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+
+INTERNAL, SERVER, CLIENT = 1, 2, 3
+
+TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class Trace:
+    """
+    Спаны одного запроса, собираемые до решения о сохранении (tail sampling).
+
+    Attributes:
+        trace_id (str): Идентификатор трассы, 32 шестнадцатеричных символа.
+        spans (list[Span]): Завершенные спаны.
+        sampled (bool): Вызывающая сторона уже решила сохранить трассу (флаг traceparent).
+        error (bool): Хотя бы один спан завершился ошибкой.
+        closed (bool): Корневой спан завершен, новые спаны не принимаются.
+    """
+
+    __slots__ = ("trace_id", "spans", "sampled", "error", "closed")
+
+    def __init__(self, trace_id: str, sampled: bool = False):
+        self.trace_id = trace_id
+        self.spans: list[Span] = []
+        self.sampled = sampled
+        self.error = False
+        self.closed = False
+
+
+class Span:
+    """
+    Этап обработки запроса.
+
+    Attributes:
+        trace (Trace): Трасса, к которой относится спан.
+        span_id (str): Идентификатор спана, 16 шестнадцатеричных символов.
+        parent_id (str | None): Идентификатор родительского спана.
+        name (str): Название этапа.
+        kind (int): Вид спана в терминах OTLP: INTERNAL, SERVER или CLIENT.
+        start (int): Время начала, нс с начала эпохи.
+        end (int): Время окончания, нс с начала эпохи.
+        attributes (dict): Атрибуты спана.
+        error (str | None): Описание ошибки, если этап завершился исключением.
+    """
+
+    __slots__ = (
+        "trace",
+        "span_id",
+        "parent_id",
+        "name",
+        "kind",
+        "start",
+        "end",
+        "attributes",
+        "error",
+    )
+
+    def __init__(
+        self,
+        trace: Trace,
+        parent_id: str | None,
+        name: str,
+        kind: int,
+        attributes: dict | None,
+    ):
+        self.trace = trace
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.error: str | None = None
+        self.end = 0
+        self.start = time.time_ns()
+
+    @property
+    def duration(self) -> float:
+        """Длительность спана в миллисекундах."""
+        return (self.end - self.start) / 1e6
+
+
+_current: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """
+    Трассировка запросов с выборкой по завершении (tail sampling).
+
+    Пока нет активной трассы (трассировка выключена или код выполняется вне
+    запроса), span() ничего не делает, поэтому инструментированный код почти
+    ничего не теряет. Во время запроса спаны копятся в памяти его трассы, а
+    после завершения корневого спана трасса отдается экспортеру, если запрос
+    был медленным (не быстрее slow мс), завершился ошибкой, был выбран
+    вызывающей стороной или попал в случайную долю ratio.
+
+    Attributes:
+        slow (float): Порог длительности запроса в мс, начиная с которого трасса сохраняется всегда.
+        ratio (float): Доля сохраняемых трасс остальных запросов.
+        max_spans (int): Максимальное количество спанов в одной трассе.
+        exporter (Callable[[Trace], None] | None): Получатель сохраненных трасс;
+            None — трассировка выключена.
+    """
+
+    def __init__(self, slow: float = 500, ratio: float = 0.01, max_spans: int = 512):
+        self.slow = slow
+        self.ratio = ratio
+        self.max_spans = max_spans
+        self.exporter: Callable[[Trace], None] | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    @staticmethod
+    def current() -> Span | None:
+        """Текущий спан или None вне трассы."""
+        return _current.get()
+
+    def start_trace(
+        self, name: str, traceparent: str | None = None, attributes: dict | None = None
+    ) -> tuple[Span, Token]:
+        """
+        Начинает трассу с корневым спаном запроса.
+
+        Если передан заголовок traceparent (W3C Trace Context), трасса
+        продолжает трассу вызывающей стороны.
+
+        Returns:
+            tuple[Span, Token]: Корневой спан и токен для end_trace.
+        """
+        parent_id, sampled = None, False
+        match = TRACEPARENT.match(traceparent or "")
+        if match:
+            trace_id, parent_id, flags = match.groups()
+            sampled = bool(int(flags, 16) & 1)
+        else:
+            trace_id = f"{random.getrandbits(128):032x}"
+        span = Span(Trace(trace_id, sampled), parent_id, name, SERVER, attributes)
+        return span, _current.set(span)
+
+    def end_trace(self, span: Span, token: Token):
+        """Завершает корневой спан и решает, сохранить ли трассу."""
+        _current.reset(token)
+        self._close(span)
+        trace = span.trace
+        trace.closed = True
+        if self.exporter is not None and (
+            trace.sampled
+            or trace.error
+            or span.duration >= self.slow
+            or random.random() < self.ratio
+        ):
+            self.exporter(trace)
+
+    def start(
+        self, name: str, kind: int = INTERNAL, attributes: dict | None = None
+    ) -> Span | None:
+        """
+        Начинает дочерний спан без смены текущего (для обработчиков событий).
+
+        Returns:
+            Span | None: Спан или None вне трассы.
+        """
+        parent = _current.get()
+        if parent is None or parent.trace.closed:
+            return None
+        return Span(parent.trace, parent.span_id, name, kind, attributes)
+
+    def finish(self, span: Span | None, error: BaseException | None = None):
+        """Завершает спан, начатый start()."""
+        if span is None:
+            return
+        if error is not None:
+            span.error = repr(error)
+        self._close(span)
+
+    def _close(self, span: Span):
+        span.end = time.time_ns()
+        trace = span.trace
+        if span.error:
+            trace.error = True
+        if not trace.closed and len(trace.spans) < self.max_spans:
+            trace.spans.append(span)
+
+    @contextlib.contextmanager
+    def span(self, name: str, kind: int = INTERNAL, attributes: dict | None = None):
+        """Контекстный менеджер спана; вложенные спаны становятся его потомками."""
+        span = self.start(name, kind, attributes)
+        if span is None:
+            yield None
+            return
+        token = _current.set(span)
+        try:
+            yield span
+        except HTTPException as e:
+            span.attributes["http.status_code"] = e.status_code
+            if e.status_code >= 500:
+                span.error = repr(e)
+            raise
+        except Exception as e:
+            span.error = repr(e)
+            raise
+        finally:
+            _current.reset(token)
+            self._close(span)
+
+    def traced(self, name: str):
+        """Декоратор асинхронной функции, оборачивающий каждый вызов в спан name."""
+
+        def decorator(func):
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return await func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    @staticmethod
+    def traceparent() -> str | None:
+        """Заголовок traceparent для исходящего запроса из текущего спана."""
+        span = _current.get()
+        if span is None:
+            return None
+        return f"00-{span.trace.trace_id}-{span.span_id}-01"
+
+
+def instrument_engine(engine: AsyncEngine, tracer: "Tracer", limit: int = 500):
+    """Добавляет спан на каждый SQL-запрос движка (текст запроса обрезается до limit символов)."""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        context._span = tracer.start(
+            f"sql {statement.split(None, 1)[0]}" if statement else "sql",
+            CLIENT,
+            {"db.system": "postgresql", "db.statement": statement[:limit]},
+        )
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        tracer.finish(getattr(context, "_span", None))
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def handle_error(exception_context):
+        context = exception_context.execution_context
+        tracer.finish(
+            getattr(context, "_span", None), exception_context.original_exception
+        )
+
+
+tracer = Tracer(settings.TRACE.SLOW, settings.TRACE.RATIO)
@@ -0,0 +1,284 @@
+import asyncio
+import json
+import logging
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+from sqlalchemy import select, update
+
+from app.api.models import Alert, User
+from app.core import sessionmanager
+from app.services.broker import Broker, broker
+from app.services.rates import RateBoard, RateTick, cross_rate, rate_board
+from app.services.websocket_manager import ws_manager
+from app.utils.send_email import enqueue_email
+
+logger = logging.getLogger(__name__)
+
+
+class PairAlerts:
+    """
+    Активные алерты одной валютной пары в виде отсортированных массивов порогов.
+
+    Для каждого направления хранятся два параллельных массива: пороги по
+    возрастанию и идентификаторы алертов. Массивы array занимают 16 байт на
+    алерт, поэтому в памяти воркера помещаются миллионы алертов. Поиск
+    сработавших алертов при изменении курса — два bisect, то есть O(log n + k).
+    """
+
+    __slots__ = ("thresholds", "ids")
+
+    def __init__(self):
+        self.thresholds = {"above": array("d"), "below": array("d")}
+        self.ids = {"above": array("q"), "below": array("q")}
+
+    def __len__(self) -> int:
+        return len(self.ids["above"]) + len(self.ids["below"])
+
+    def add(self, direction: str, threshold: float, alert_id: int):
+        """Вставляет алерт с сохранением порядка порогов."""
+        position = bisect_right(self.thresholds[direction], threshold)
+        self.thresholds[direction].insert(position, threshold)
+        self.ids[direction].insert(position, alert_id)
+
+    def extend(self, direction: str, items: list[tuple[float, int]]):
+        """Массово загружает алерты одного направления, сортируя их один раз."""
+        items.sort()
+        self.thresholds[direction].extend(threshold for threshold, _ in items)
+        self.ids[direction].extend(alert_id for _, alert_id in items)
+
+    def remove(self, direction: str, threshold: float, alert_id: int) -> bool:
+        """Удаляет алерт, находя диапазон его порога через bisect."""
+        thresholds, ids = self.thresholds[direction], self.ids[direction]
+        position = bisect_left(thresholds, threshold)
+        while position < len(thresholds) and thresholds[position] == threshold:
+            if ids[position] == alert_id:
+                del thresholds[position]
+                del ids[position]
+                return True
+            position += 1
+        return False
+
+    def pop_crossed(self, old: float, new: float) -> list[int]:
+        """
+        Извлекает алерты, пороги которых курс пересек при переходе от old к new.
+
+        above срабатывает при old < threshold <= new, below — при new <= threshold < old.
+
+        Returns:
+            list[int]: Идентификаторы сработавших алертов.
+        """
+        if new > old:
+            direction = "above"
+            lo = bisect_right(self.thresholds[direction], old)
+            hi = bisect_right(self.thresholds[direction], new)
+        elif new < old:
+            direction = "below"
+            lo = bisect_left(self.thresholds[direction], new)
+            hi = bisect_left(self.thresholds[direction], old)
+        else:
+            return []
+        if lo == hi:
+            return []
+        triggered = self.ids[direction][lo:hi].tolist()
+        del self.thresholds[direction][lo:hi]
+        del self.ids[direction][lo:hi]
+        return triggered
+
+
+class AlertEngine:
+    """
+    Движок ценовых алертов.
+
+    Держит в памяти воркера индекс активных алертов (PairAlerts на каждую пару)
+    и на каждом обновлении RateBoard находит только пересеченные пороги.
+    Создание и удаление алертов рассылается всем воркерам через брокер, чтобы
+    индексы оставались одинаковыми. Сработавшие алерты отправляются пачками:
+    одна транзакция помечает пачку сработавшей (UPDATE ... WHERE triggered_at IS NULL),
+    ставит письма в outbox и возвращает только те алерты, которые этот воркер
+    пометил первым, поэтому при нескольких воркерах уведомление уходит один раз.
+
+    Attributes:
+        pairs (dict[str, PairAlerts]): Индекс активных алертов по парам.
+        batch_size (int): Максимальное количество алертов в одной транзакции отправки.
+    """
+
+    CHANNEL = "alerts:changes"
+
+    def __init__(self, board: RateBoard, broker: Broker, batch_size: int = 500):
+        self.board = board
+        self.broker = broker
+        self.batch_size = batch_size
+        self.pairs: dict[str, PairAlerts] = {}
+        self._changes: list[tuple[str, tuple]] | None = None
+        self._tasks: set[asyncio.Task] = set()
+        board.subscribe(self.on_tick)
+        broker.subscribe(self.CHANNEL, self._on_change)
+
+    async def load(self):
+        """
+        Загружает все активные алерты из базы данных одним потоковым запросом.
+
+        Изменения, пришедшие через брокер во время загрузки, запоминаются и
+        применяются к загруженному индексу: алерт, созданный другим воркером
+        после начала запроса, иначе не попал бы ни в снимок, ни в индекс.
+        """
+        self._changes = []
+        try:
+            loaded: dict[tuple[str, str], list[tuple[float, int]]] = {}
+            stmt = select(Alert.pair, Alert.direction, Alert.threshold, Alert.id).where(
+                Alert.triggered_at.is_(None)
+            )
+            async with sessionmanager.session() as session:
+                result = await session.stream(stmt.execution_options(yield_per=10000))
+                async for pair, direction, threshold, alert_id in result:
+                    loaded.setdefault((pair, direction), []).append(
+                        (float(threshold), alert_id)
+                    )
+            pairs: dict[str, PairAlerts] = {}
+            for (pair, direction), items in loaded.items():
+                pairs.setdefault(pair, PairAlerts()).extend(direction, items)
+            for op, args in self._changes:
+                # Снимок мог уже содержать созданный алерт: удаление перед
+                # вставкой не дает добавить его дважды.
+                self._remove(pairs, *args)
+                if op == "add":
+                    self._add(pairs, *args)
+        finally:
+            self._changes = None
+        self.pairs = pairs
+
+    def add(self, alert_id: int, pair: str, direction: str, threshold: float):
+        """Добавляет алерт в локальный индекс."""
+        if self._changes is not None:
+            self._changes.append(("add", (alert_id, pair, direction, threshold)))
+        self._add(self.pairs, alert_id, pair, direction, threshold)
+
+    def remove(self, alert_id: int, pair: str, direction: str, threshold: float):
+        """Удаляет алерт из локального индекса."""
+        if self._changes is not None:
+            self._changes.append(("remove", (alert_id, pair, direction, threshold)))
+        self._remove(self.pairs, alert_id, pair, direction, threshold)
+
+    @staticmethod
+    def _add(pairs: dict, alert_id: int, pair: str, direction: str, threshold: float):
+        pairs.setdefault(pair, PairAlerts()).add(direction, threshold, alert_id)
+
+    @staticmethod
+    def _remove(
+        pairs: dict, alert_id: int, pair: str, direction: str, threshold: float
+    ):
+        alerts = pairs.get(pair)
+        if alerts is not None:
+            alerts.remove(direction, threshold, alert_id)
+            if not alerts:
+                del pairs[pair]
+
+    async def publish(self, op: str, alert: Alert):
+        """
+        Сообщает всем воркерам о создании или удалении алерта.
+
+        Только что созданный алерт, условие которого уже выполнено при текущем курсе,
+        не попадает в индекс и срабатывает сразу.
+
+        Args:
+            op (str): "add" или "remove".
+            alert (Alert): Созданный или удаленный алерт.
+        """
+        threshold = float(alert.threshold)
+        rate = self.board.rate(alert.pair)
+        if op == "add" and rate is not None:
+            if (alert.direction == "above" and rate >= threshold) or (
+                alert.direction == "below" and rate <= threshold
+            ):
+                self._spawn([alert.id])
+                return
+        await self.broker.publish(
+            self.CHANNEL,
+            json.dumps(
+                {
+                    "op": op,
+                    "id": alert.id,
+                    "pair": alert.pair,
+                    "direction": alert.direction,
+                    "threshold": threshold,
+                }
+            ),
+        )
+
+    async def _on_change(self, data: str):
+        change = json.loads(data)
+        method = self.add if change["op"] == "add" else self.remove
+        method(change["id"], change["pair"], change["direction"], change["threshold"])
+
+    async def on_tick(self, tick: RateTick):
+        """Находит алерты, пересеченные новым курсом, и запускает их отправку."""
+        triggered: list[int] = []
+        for pair, alerts in list(self.pairs.items()):
+            old = cross_rate(tick.previous, pair)
+            new = cross_rate(tick.quotes, pair)
+            if old is None or new is None:
+                continue
+            triggered.extend(alerts.pop_crossed(old, new))
+            if not alerts:
+                del self.pairs[pair]
+        if triggered:
+            self._spawn(triggered)
+
+    def _spawn(self, ids: list[int]):
+        task = asyncio.create_task(self.dispatch(ids))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def dispatch(self, ids: list[int]):
+        """
+        Отправляет уведомления о сработавших алертах пачками.
+
+        Args:
+            ids (list[int]): Идентификаторы сработавших алертов.
+        """
+        for start in range(0, len(ids), self.batch_size):
+            try:
+                await self._dispatch_batch(ids[start : start + self.batch_size])
+            except Exception:
+                logger.exception("failed to dispatch %d alerts", len(ids))
+
+    async def _dispatch_batch(self, ids: list[int]):
+        async with sessionmanager.session() as session:
+            stmt = (
+                update(Alert)
+                .where(Alert.id.in_(ids), Alert.triggered_at.is_(None))
+                .values(triggered_at=datetime.utcnow())
+                .returning(Alert.user_id, Alert.pair, Alert.direction, Alert.threshold)
+            )
+            fired = (await session.execute(stmt)).all()
+            if not fired:
+                await session.rollback()
+                return
+            emails = dict(
+                (
+                    await session.execute(
+                        select(User.id, User.email).where(
+                            User.id.in_({row.user_id for row in fired})
+                        )
+                    )
+                ).all()
+            )
+            messages = []
+            for row in fired:
+                rate = self.board.rate(row.pair) or row.threshold
+                message = (
+                    f"{row.pair} is {row.direction} {row.threshold.normalize()}: "
+                    f"now {rate:.6f}"
+                )
+                enqueue_email(
+                    session, f"Price alert {row.pair}", message, emails[row.user_id]
+                )
+                messages.append((row.user_id, message))
+            await session.commit()
+        for user_id, message in messages:
+            await ws_manager.send_to_user(user_id, message)
+
+
+alert_engine = AlertEngine(rate_board, broker)
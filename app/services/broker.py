@@ -0,0 +1,102 @@
+import asyncio
+import contextlib
+import logging
+from typing import Awaitable, Callable
+
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.services.redis_tools import RedisClient
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[str], Awaitable[None]]
+
+
+class Broker:
+    """
+    Брокер сообщений между воркерами приложения на основе Redis pub/sub.
+
+    Каждый воркер держит ровно одну подписку на все зарегистрированные каналы
+    и раздает входящие сообщения локальным обработчикам. Публикация идет через
+    Redis, поэтому сообщение получают все воркеры на всех узлах, включая
+    отправителя.
+
+    Attributes:
+        reconnect_delay (float): Пауза в секундах перед переподключением после обрыва связи с Redis.
+    """
+
+    def __init__(self, reconnect_delay: float = 1.0):
+        self.reconnect_delay = reconnect_delay
+        self._handlers: dict[str, list[Handler]] = {}
+        self._pubsub = None
+        self._task: asyncio.Task | None = None
+
+    def subscribe(self, channel: str, handler: Handler):
+        """
+        Регистрирует обработчик сообщений канала.
+
+        Обработчики регистрируются до вызова start(); при запуске брокер
+        подписывается на все каналы, для которых есть обработчики.
+
+        Args:
+            channel (str): Имя канала.
+            handler (Handler): Асинхронная функция, принимающая текст сообщения.
+        """
+        self._handlers.setdefault(channel, []).append(handler)
+
+    async def publish(self, channel: str, message: str):
+        """
+        Публикует сообщение для всех воркеров.
+
+        Args:
+            channel (str): Имя канала.
+            message (str): Текст сообщения.
+        """
+        await RedisClient.publish(channel, message)
+
+    async def start(self):
+        """Подписывается на каналы и запускает фоновую задачу чтения сообщений."""
+        if self._task is None and self._handlers:
+            await self._subscribe()
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        """Останавливает чтение сообщений и закрывает подписку."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self._pubsub is not None:
+            await self._pubsub.close()
+            self._pubsub = None
+
+    async def _subscribe(self):
+        self._pubsub = RedisClient.pubsub()
+        await self._pubsub.subscribe(*self._handlers)
+
+    async def _dispatch(self, channel: str, data: str):
+        for handler in self._handlers.get(channel, ()):
+            try:
+                await handler(data)
+            except Exception:
+                logger.exception("broker handler failed on channel %s", channel)
+
+    async def _listen(self):
+        while True:
+            try:
+                if self._pubsub is None:
+                    await self._subscribe()
+                async for message in self._pubsub.listen():
+                    if message["type"] == "message":
+                        await self._dispatch(message["channel"], message["data"])
+            except RedisConnectionError:
+                logger.warning("lost pub/sub connection, reconnecting")
+                if self._pubsub is not None:
+                    with contextlib.suppress(RedisConnectionError):
+                        await self._pubsub.close()
+                self._pubsub = None
+            await asyncio.sleep(self.reconnect_delay)
+
+
+broker = Broker()
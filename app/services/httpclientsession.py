@@ -1,6 +1,18 @@
+import time
+
 import aiohttp
 
 from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.tracing import CLIENT, tracer
+
+
+def _endpoint(url: str) -> str:
+    """Имя эндпоинта внешнего API (LIST, EXCRATES, ...) по его адресу."""
+    for name, value in settings.API:
+        if value == url and name != "KEY":
+            return name
+    return "other"
 
 
 async def http_client(url: str, params: dict | None = None):
@@ -23,11 +35,28 @@ async def http_client(url: str, params: dict | None = None):
         ClientResponseError: Исключение, если сервер возвращает код ошибки.
     """
     headers = {"apikey": settings.API.KEY}
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers=headers, params=params) as response:
-            if response.status == 200:
-                data = await response.json()
-                return data
-            else:
-                response.raise_for_status()
-                return
+    endpoint = _endpoint(url)
+    status = "error"
+    started = time.perf_counter()
+    try:
+        with tracer.span(f"upstream {endpoint}", CLIENT, {"http.url": url}) as span:
+            if span is not None:
+                headers["traceparent"] = tracer.traceparent()
+            async with aiohttp.ClientSession() as session:
+                async with session.get(url, headers=headers, params=params) as response:
+                    status = str(response.status)
+                    if span is not None:
+                        span.attributes["http.status_code"] = response.status
+                    if response.status == 200:
+                        data = await response.json()
+                        return data
+                    else:
+                        response.raise_for_status()
+                        return
+    finally:
+        metrics.inc("upstream_requests_total", (endpoint, status))
+        metrics.observe(
+            "upstream_request_duration_seconds",
+            (endpoint,),
+            time.perf_counter() - started,
+        )
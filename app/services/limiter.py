@@ -0,0 +1,284 @@
+import asyncio
+import contextlib
+import logging
+import math
+import time
+from datetime import datetime, timezone
+
+import jwt
+from fastapi import Request, Response, WebSocket
+from fastapi_limiter import default_identifier
+from redis.exceptions import NoScriptError
+
+from app.core.config import settings
+from app.services.redis_tools import RedisClient, http_limit_callback, ws_limit_callback
+
+logger = logging.getLogger(__name__)
+
+# Общее ведро ключа: списывает израсходованные воркером токены с учетом
+# пополнения по времени Redis и возвращает остаток (может быть отрицательным,
+# если воркеры вместе превысили лимит между сверками).
+RECONCILE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local spent = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = time[1] * 1000 + math.floor(time[2] / 1000)
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate) - spent
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate) + 1000)
+return tostring(tokens)
+"""
+
+
+class TokenBucket:
+    """
+    Локальное ведро токенов одного ключа.
+
+    Attributes:
+        capacity (float): Емкость ведра — сколько запросов можно сделать подряд.
+        rate (float): Скорость пополнения в токенах за секунду.
+        tokens (float): Текущий остаток с учетом последней сверки с Redis.
+        updated (float): Время последнего пополнения (time.monotonic).
+        spent (int): Токены, израсходованные с последней сверки.
+    """
+
+    __slots__ = ("capacity", "rate", "tokens", "updated", "spent")
+
+    def __init__(self, capacity: float, rate: float, now: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = now
+        self.spent = 0
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """
+        Берет токен.
+
+        Returns:
+            float: 0, если токен взят, иначе время в секундах до появления токена.
+        """
+        self.refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            self.spent += 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class HybridLimiter:
+    """
+    Ограничитель частоты запросов на локальных ведрах токенов со сверкой через Redis.
+
+    Проверка лимита выполняется в памяти воркера без обращения к сети. Раз в
+    sync секунд воркер одним конвейером отправляет в Redis, сколько токенов
+    израсходовано по каждому ключу, и получает остаток общего ведра ключа
+    (сумма расходов всех воркеров); локальный остаток ограничивается общим.
+    Поэтому общий лимит соблюдается приблизительно: между сверками N воркеров
+    могут вместе пропустить до N ведер, а перерасход уходит в долг и
+    отсрочивает следующие запросы. Если Redis недоступен, воркеры продолжают
+    ограничивать запросы локально.
+
+    Лимит маршрута задается в RateLimiter (times за seconds) и может быть
+    переопределен в rules по шаблону маршрута; множитель уровня пользователя
+    (anonymous, user, admin) берется из tiers.
+
+    Attributes:
+        sync (float): Период сверки с Redis в секундах.
+        rules (dict[str, str]): Лимиты маршрутов вида "запросов/секунд" по шаблону маршрута.
+        tiers (dict[str, float]): Множители лимита по уровню пользователя.
+    """
+
+    KEY = "limiter:{}"
+
+    def __init__(self, sync: float, rules: dict[str, str], tiers: dict[str, float]):
+        self.sync = sync
+        self.rules = {
+            route: tuple(float(part) for part in rule.split("/"))
+            for route, rule in rules.items()
+        }
+        self.tiers = tiers
+        self._buckets: dict[str, TokenBucket] = {}
+        self._script = None
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        """Запускает фоновую сверку с Redis."""
+        self._script = await RedisClient.register_script(RECONCILE_SCRIPT)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Останавливает сверку и отправляет оставшиеся расходы."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+            with contextlib.suppress(Exception):
+                await self.reconcile()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.sync)
+            try:
+                await self.reconcile()
+            except Exception:
+                logger.exception("failed to reconcile rate limits")
+
+    def hit(self, route: str, identity: str, tier: str, times: int, seconds: float):
+        """
+        Учитывает запрос и проверяет лимит.
+
+        Args:
+            route (str): Шаблон маршрута (ключ правила в rules).
+            identity (str): Пользователь или адрес клиента.
+            tier (str): Уровень пользователя.
+            times (int): Запросов за период по умолчанию.
+            seconds (float): Период по умолчанию в секундах.
+
+        Returns:
+            float: 0, если запрос разрешен, иначе время в секундах до следующей попытки.
+        """
+        key = f"{route}:{identity}"
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            times, seconds = self.rules.get(route, (times, seconds))
+            capacity = times * self.tiers.get(tier, 1)
+            bucket = self._buckets[key] = TokenBucket(capacity, capacity / seconds, now)
+        return bucket.take(now)
+
+    async def reconcile(self):
+        """Сверяет локальные ведра с общими ведрами в Redis и удаляет простаивающие."""
+        if not self._buckets:
+            return
+        batch = list(self._buckets.items())
+        spent = [bucket.spent for _, bucket in batch]
+        for _, bucket in batch:
+            bucket.spent = 0
+        pipe = RedisClient.pipeline(transaction=False, store="limiter")
+        for (key, bucket), count in zip(batch, spent):
+            await self._script(
+                keys=[self.KEY.format(key)],
+                args=[bucket.capacity, bucket.rate / 1000, count],
+                client=pipe,
+            )
+        try:
+            remaining = await pipe.execute()
+        except Exception as exc:
+            for (_, bucket), count in zip(batch, spent):
+                bucket.spent += count
+            if isinstance(exc, NoScriptError):
+                # Узел Redis Cluster без скрипта (например, новый primary после
+                # переключения): скрипт загружается заново до следующей сверки.
+                await self._script.registered_client.script_load(self._script.script)
+            raise
+
+        now = time.monotonic()
+        for (key, bucket), tokens in zip(batch, remaining):
+            bucket.refill(now)
+            # Токены, взятые во время сверки, в ответ Redis еще не вошли.
+            bucket.tokens = min(bucket.tokens, float(tokens) - bucket.spent)
+            if bucket.tokens >= bucket.capacity and not bucket.spent:
+                del self._buckets[key]
+
+
+# Сколько секунд хранится результат проверки токена, если срок токена не истекает раньше.
+IDENTITY_TTL = 300
+
+_identities: dict[str, tuple[str, str, float]] = {}
+
+
+def _expiry(payload: dict) -> float:
+    """Время истечения токена по time.time(): поле exp или expire из create_access_token."""
+    if "exp" in payload:
+        return float(payload["exp"])
+    if "expire" in payload:
+        expire = datetime.strptime(payload["expire"], "%Y-%m-%d %H:%M:%S")
+        return expire.replace(tzinfo=timezone.utc).timestamp()
+    return math.inf
+
+
+def _identify(request: Request | WebSocket) -> tuple[str, str]:
+    """
+    Пользователь и его уровень по токену доступа, без токена — адрес клиента.
+
+    Результаты проверки токенов кешируются до истечения токена, но не дольше
+    IDENTITY_TTL секунд, поэтому подпись проверяется один раз на токен, а не
+    на каждый запрос. Токен с истекшим сроком считается отсутствующим.
+    """
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        now = time.time()
+        cached = _identities.get(token)
+        if cached is None or cached[2] <= now:
+            identity, tier, expires = "", "", now + IDENTITY_TTL
+            try:
+                payload = jwt.decode(token, settings.AUTH.KEY, algorithms=["HS256"])
+                expiry = _expiry(payload)
+                if expiry > now:
+                    identity = f"user:{payload['user_id']}"
+                    tier = payload.get("tier", "user")
+                    expires = min(expires, expiry)
+            except (jwt.PyJWTError, KeyError, ValueError):
+                pass
+            if len(_identities) >= 10000:
+                _identities.clear()
+            cached = _identities[token] = (identity, tier, expires)
+        if cached[0]:
+            return cached[0], cached[1]
+    return "", "anonymous"
+
+
+class RateLimiter:
+    """
+    Зависимость FastAPI, ограничивающая частоту запросов к маршруту.
+
+    Совместима по параметрам с fastapi_limiter.depends.RateLimiter, но
+    проверяет лимит локально через HybridLimiter.
+    """
+
+    def __init__(self, times: int = 1, seconds: float = 1):
+        self.times = times
+        self.seconds = seconds
+
+    async def __call__(self, request: Request, response: Response):
+        route = request.scope["route"].path
+        identity, tier = _identify(request)
+        if not identity:
+            identity = await default_identifier(request)
+        wait = limiter.hit(route, identity, tier, self.times, self.seconds)
+        if wait:
+            return await http_limit_callback(request, response, int(wait * 1000) + 1)
+
+
+class WebSocketRateLimiter(RateLimiter):
+    """
+    Ограничитель частоты сообщений WebSocket (ключ — context_key, обычно id пользователя).
+
+    Лимит переопределяется в settings.LIMITS.RULES по ключу rule.
+    """
+
+    def __init__(self, times: int = 1, seconds: float = 1, rule: str = "ws"):
+        super().__init__(times, seconds)
+        self.rule = rule
+
+    async def __call__(self, ws: WebSocket, context_key: str = "", tier: str = "user"):
+        identity = context_key or await default_identifier(ws)
+        wait = limiter.hit(self.rule, identity, tier, self.times, self.seconds)
+        if wait:
+            return await ws_limit_callback(ws, int(wait * 1000) + 1)
+
+
+limiter = HybridLimiter(
+    settings.LIMITS.SYNC, settings.LIMITS.RULES, settings.LIMITS.TIERS
+)
@@ -0,0 +1,201 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+ROOT = os.path.join(str(Path(__file__).parents[2]), "")
+
+
+def blocking_site(frame) -> str:
+    """
+    Место блокировки: самый глубокий кадр стека из кода проекта (путь:функция).
+
+    Блокирующий вызов обычно происходит внутри библиотеки (bcrypt, httpx,
+    shutil), поэтому место определяется по вызвавшей его функции приложения;
+    если кадров проекта в стеке нет, берется самый глубокий кадр.
+    """
+    leaf = frame
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(ROOT) and "site-packages" not in filename:
+            return f"{filename[len(ROOT):]}:{frame.f_code.co_qualname}"
+        frame = frame.f_back
+    return f"{leaf.f_code.co_filename}:{leaf.f_code.co_qualname}"
+
+
+class _Probe:
+    """Пробный вызов: время постановки, задержка после выполнения и найденное место блокировки."""
+
+    __slots__ = ("posted", "done", "lag", "site")
+
+    def __init__(self):
+        self.posted = time.perf_counter()
+        self.done = threading.Event()
+        self.lag: float | None = None
+        self.site: str | None = None
+
+
+class LoopMonitor:
+    """
+    Контроль задержки цикла событий воркера и поиск блокирующего кода.
+
+    Отдельный поток раз в interval секунд ставит в цикл событий пробный
+    обратный вызов (call_soon_threadsafe) и ждет его выполнения. Время от
+    постановки до выполнения — задержка цикла: сколько ждет любой готовый к
+    выполнению обработчик. Она записывается в гистограмму
+    event_loop_lag_seconds, а максимум за период сбора — в измеритель
+    event_loop_lag_max_seconds с меткой воркера.
+
+    Если проба не выполнилась за threshold, цикл занят одним долгим
+    обработчиком: поток снимает стек цикла событий в этот момент (он указывает
+    на блокирующий код) и пишет его в лог. Одно и то же место блокировки
+    пишется в лог не чаще раза в cooldown секунд, пропущенные повторы
+    считаются. Все обнаруженные места с количеством и максимальной
+    длительностью копятся в памяти и при остановке дописываются в файл report,
+    по которому нагрузочный тест находит новые блокировки.
+
+    Attributes:
+        interval (float): Период проверки в секундах.
+        threshold (float): Порог блокировки в секундах.
+        cooldown (float): Минимальный интервал между записями одного места в лог.
+        report (str): Файл сводки мест блокировки или пустая строка.
+        sites (dict[str, dict]): Места блокировки: количество, максимальная длительность
+            в мс и стек первого случая.
+    """
+
+    def __init__(
+        self, interval: float, threshold: float, cooldown: float, report: str = ""
+    ):
+        self.interval = interval
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.report = report
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+        self.sites: dict[str, dict] = {}
+        self._logged: dict[str, tuple[float, int]] = {}
+        self._max_lag = 0.0
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread_id = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    async def start(self):
+        """Запускает поток контроля для цикла событий текущего воркера."""
+        self._loop = asyncio.get_running_loop()
+        self._thread_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="loop-monitor", daemon=True
+        )
+        self._thread.start()
+
+    async def stop(self):
+        """Останавливает поток контроля и дописывает сводку мест блокировки."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        await asyncio.to_thread(self._thread.join)
+        self._thread = None
+        if self.report and self.sites:
+            line = json.dumps({"worker": self.worker, "sites": self.sites})
+            await asyncio.to_thread(self._write, line)
+
+    def _write(self, line: str):
+        with open(self.report, "a") as file:
+            file.write(line + "\n")
+
+    def collect(self):
+        """Максимальная задержка цикла с предыдущего сбора для метрик."""
+        yield "event_loop_lag_max_seconds", (), self._max_lag
+        self._max_lag = 0.0
+
+    def _probe(self, probe: _Probe):
+        lag = time.perf_counter() - probe.posted
+        # Место блокировки и задержку пробы связывает та сторона, которая
+        # узнала о них второй: проба, если место уже найдено, иначе поток.
+        with self._lock:
+            probe.lag = lag
+            probe.done.set()
+            site = probe.site
+        metrics.observe("event_loop_lag_seconds", (), lag)
+        self._max_lag = max(self._max_lag, lag)
+        if lag >= self.threshold:
+            metrics.inc("event_loop_blocks_total")
+            if site is not None:
+                self._record(site, lag)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            probe = _Probe()
+            try:
+                self._loop.call_soon_threadsafe(self._probe, probe)
+            except RuntimeError:
+                return
+            if probe.done.wait(self.threshold):
+                continue
+            frame = sys._current_frames().get(self._thread_id)
+            # Если проба успела выполниться, стек уже не указывает на блокировку.
+            if frame is not None and not probe.done.is_set():
+                site = self._blocked(frame)
+                with self._lock:
+                    probe.site = site
+                    lag = probe.lag
+                if lag is not None:
+                    self._record(site, lag)
+            while not probe.done.wait(self.interval):
+                if self._stop.is_set():
+                    return
+
+    def _record(self, site: str, lag: float):
+        entry = self.sites[site]
+        entry["max_ms"] = max(entry["max_ms"], round(lag * 1000, 1))
+
+    def _blocked(self, frame) -> str:
+        """
+        Учитывает место блокировки и пишет его стек в лог с ограничением частоты.
+
+        Returns:
+            str: Место блокировки; ее длительность записывается после окончания.
+        """
+        site = blocking_site(frame)
+        stack = "".join(traceback.format_stack(frame))
+        entry = self.sites.get(site)
+        if entry is None:
+            entry = self.sites[site] = {"count": 0, "max_ms": 0.0, "stack": stack}
+        entry["count"] += 1
+
+        now = time.monotonic()
+        logged, suppressed = self._logged.get(site, (float("-inf"), 0))
+        if now - logged < self.cooldown:
+            self._logged[site] = (logged, suppressed + 1)
+            return site
+        self._logged[site] = (now, 0)
+        logger.warning(
+            "Event loop blocked for over %d ms in %s%s\n%s",
+            self.threshold * 1000,
+            site,
+            f" ({suppressed} similar suppressed)" if suppressed else "",
+            stack,
+        )
+        return site
+
+
+loop_monitor = LoopMonitor(
+    settings.LOOP.INTERVAL,
+    settings.LOOP.THRESHOLD / 1000,
+    settings.LOOP.COOLDOWN,
+    settings.LOOP.REPORT,
+)
+metrics.register(loop_monitor.collect)
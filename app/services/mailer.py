@@ -0,0 +1,230 @@
+import asyncio
+import contextlib
+import logging
+import time
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from typing import AsyncIterator
+
+import aiosmtplib
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.models import Email
+from app.core import sessionmanager
+from app.core.config import settings
+from app.utils.send_email import build_message
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPPool:
+    """
+    Пул постоянных SMTP-соединений.
+
+    Соединения открываются лениво при первом использовании и переиспользуются
+    между письмами, поэтому TLS-рукопожатие и авторизация выполняются один раз
+    на соединение, а не на каждое письмо. Разорванное сервером соединение
+    переоткрывается при следующем обращении.
+
+    Attributes:
+        size (int): Максимальное количество одновременно открытых соединений.
+    """
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        username: str | None = None,
+        password: str | None = None,
+        use_tls: bool = True,
+        size: int = 2,
+        timeout: float = 30,
+    ):
+        self.size = size
+        self._clients: asyncio.Queue[aiosmtplib.SMTP] = asyncio.Queue()
+        for _ in range(size):
+            self._clients.put_nowait(
+                aiosmtplib.SMTP(
+                    hostname=hostname,
+                    port=port,
+                    username=username,
+                    password=password,
+                    use_tls=use_tls,
+                    timeout=timeout,
+                )
+            )
+
+    @classmethod
+    def from_settings(cls) -> "SMTPPool":
+        """Создает пул по настройкам settings.EMAIL."""
+        return cls(
+            hostname=settings.EMAIL.HOST,
+            port=settings.EMAIL.PORT,
+            username=settings.EMAIL.NAME,
+            password=settings.EMAIL.PASS,
+            use_tls=settings.EMAIL.TLS,
+            size=settings.EMAIL.POOL,
+        )
+
+    @contextlib.asynccontextmanager
+    async def acquire(self) -> AsyncIterator[aiosmtplib.SMTP]:
+        """Выдает подключенного SMTP-клиента из пула и возвращает его обратно."""
+        client = await self._clients.get()
+        try:
+            if not client.is_connected:
+                await client.connect()
+            yield client
+        except aiosmtplib.SMTPServerDisconnected:
+            client.close()
+            raise
+        finally:
+            self._clients.put_nowait(client)
+
+    async def send(self, message: EmailMessage):
+        """
+        Отправляет сообщение через одно из соединений пула.
+
+        Если сервер закрыл простаивающее соединение, отправка повторяется
+        один раз через заново открытое соединение.
+
+        Args:
+            message (EmailMessage): Сообщение для отправки.
+        """
+        try:
+            async with self.acquire() as client:
+                await client.send_message(message)
+        except aiosmtplib.SMTPServerDisconnected:
+            async with self.acquire() as client:
+                await client.send_message(message)
+
+    async def close(self):
+        """Закрывает все открытые соединения пула."""
+        for _ in range(self.size):
+            client = await self._clients.get()
+            if client.is_connected:
+                with contextlib.suppress(aiosmtplib.SMTPException):
+                    await client.quit()
+            self._clients.put_nowait(client)
+
+
+class EmailWorker:
+    """
+    Воркер, доставляющий письма из outbox через пул SMTP-соединений.
+
+    За один проход воркер блокирует пачку готовых к отправке писем
+    (SELECT ... FOR UPDATE SKIP LOCKED), поэтому несколько воркеров могут
+    работать параллельно, не отправляя одно письмо дважды. Неудачные письма
+    откладываются с экспоненциальной задержкой, после settings.EMAIL.RETRIES
+    попыток помечаются как failed. Если воркер упал посреди пачки, транзакция
+    откатывается, и письма будут отправлены повторно (at-least-once).
+
+    Attributes:
+        pool (SMTPPool): Пул SMTP-соединений.
+        batch_size (int): Максимальный размер пачки.
+        sent (int): Количество доставленных писем с момента запуска.
+        failed (int): Количество неудачных попыток с момента запуска.
+    """
+
+    def __init__(
+        self,
+        pool: SMTPPool,
+        batch_size: int = settings.EMAIL.BATCH,
+        max_attempts: int = settings.EMAIL.RETRIES,
+        backoff: int = settings.EMAIL.BACKOFF,
+        interval: float = settings.EMAIL.INTERVAL,
+    ):
+        self.pool = pool
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.interval = interval
+        self.sent = 0
+        self.failed = 0
+        self._started = time.monotonic()
+
+    def retry_delay(self, attempts: int) -> timedelta:
+        """Задержка перед следующей попыткой: backoff * 2^(attempts - 1), не более часа."""
+        return timedelta(seconds=min(self.backoff * 2 ** (attempts - 1), 3600))
+
+    async def _deliver(self, email: Email, now: datetime):
+        """Отправляет одно письмо и обновляет его статус в сессии."""
+        email.attempts += 1
+        try:
+            await self.pool.send(build_message(email))
+        except (aiosmtplib.SMTPException, OSError) as error:
+            email.last_error = str(error)
+            if email.attempts >= self.max_attempts:
+                email.status = "failed"
+            else:
+                email.next_attempt_at = now + self.retry_delay(email.attempts)
+            self.failed += 1
+        else:
+            email.status = "sent"
+            email.sent_at = now
+            email.last_error = None
+            self.sent += 1
+
+    async def process_batch(self, session: AsyncSession) -> int:
+        """
+        Забирает и отправляет одну пачку писем.
+
+        Args:
+            session (AsyncSession): Сессия базы данных воркера.
+
+        Returns:
+            int: Количество обработанных писем.
+        """
+        now = datetime.utcnow()
+        stmt = (
+            select(Email)
+            .where(Email.status == "pending", Email.next_attempt_at <= now)
+            .order_by(Email.next_attempt_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        result = await session.execute(stmt)
+        emails = result.scalars().all()
+        if not emails:
+            await session.rollback()
+            return 0
+
+        started = time.perf_counter()
+        await asyncio.gather(*(self._deliver(email, now) for email in emails))
+        await session.commit()
+        elapsed = time.perf_counter() - started
+
+        logger.info(
+            "email batch: %d messages in %.3fs (%.1f msg/s); total sent=%d failed=%d, %.1f msg/s",
+            len(emails),
+            elapsed,
+            len(emails) / elapsed if elapsed else 0.0,
+            self.sent,
+            self.failed,
+            self.throughput,
+        )
+        return len(emails)
+
+    @property
+    def throughput(self) -> float:
+        """Среднее количество доставленных писем в секунду с момента запуска."""
+        return self.sent / max(time.monotonic() - self._started, 1e-9)
+
+    async def run(self, once: bool = False):
+        """
+        Основной цикл воркера.
+
+        Пока в очереди есть готовые письма, пачки забираются без пауз;
+        на пустой очереди воркер засыпает на settings.EMAIL.INTERVAL секунд.
+
+        Args:
+            once (bool): Обработать очередь до опустошения и завершиться.
+        """
+        while True:
+            async with sessionmanager.session() as session:
+                processed = await self.process_batch(session)
+            if processed:
+                continue
+            if once:
+                return
+            await asyncio.sleep(self.interval)
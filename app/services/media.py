@@ -0,0 +1,277 @@
+import asyncio
+import contextlib
+import hashlib
+import logging
+import multiprocessing
+import os
+import secrets
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from fastapi import Request, UploadFile, status
+from starlette.datastructures import Headers
+
+from app.core.config import settings
+from app.exceptions import (
+    BadRequestException,
+    CustomException,
+    custom_exception_handler,
+)
+from app.utils.images import make_thumbnail
+
+logger = logging.getLogger(__name__)
+
+# Сигнатуры допустимых форматов: первые байты файла и расширение.
+SIGNATURES = ((b"\x89PNG\r\n\x1a\n", "png"), (b"\xff\xd8\xff", "jpg"))
+
+MEDIA_TYPES = {".png": "image/png", ".jpg": "image/jpeg", ".webp": "image/webp"}
+
+# Запас сверх размера изображения на остальные поля формы и заголовки частей multipart.
+FORM_OVERHEAD = 64 * 1024
+
+
+class MediaStore:
+    """
+    Хранилище изображений профиля с адресацией по содержимому.
+
+    Загрузка читается блоками по chunk байт и пишется во временный файл в
+    потоке, поэтому цикл событий не блокируется ни чтением, ни записью;
+    файл больше limit байт отклоняется. Тело запроса к этому моменту уже
+    принято и разобрано FastAPI, поэтому слишком большие запросы обрывает
+    раньше UploadLimitMiddleware. Попутно
+    считается SHA-256, и файл сохраняется под именем {хеш}.{расширение}:
+    одинаковые изображения хранятся один раз. Формат определяется по
+    первым байтам, а не по имени файла.
+
+    Миниатюры (WebP, не больше size пикселей по большей стороне) создаются в
+    пуле процессов вне обработки запроса и кладутся в подкаталог thumbs под
+    именем {хеш}-{size}.webp. Пока миниатюра не готова, thumbnail()
+    возвращает оригинал. Изображение по умолчанию после первого чтения
+    хранится в памяти (default_avatar).
+
+    Attributes:
+        root (Path): Каталог изображений.
+        limit (int): Максимальный размер загрузки в байтах.
+        chunk (int): Размер блока чтения и записи в байтах.
+        size (int): Максимальная сторона миниатюры в пикселях.
+        workers (int): Количество процессов пула миниатюр.
+    """
+
+    def __init__(self, root: str, limit: int, chunk: int, size: int, workers: int):
+        self.root = Path(root)
+        self.thumbs = self.root / "thumbs"
+        self.limit = limit
+        self.chunk = chunk
+        self.size = size
+        self.workers = workers
+        self.default = self.root / "profile.png"
+        self._pool: ProcessPoolExecutor | None = None
+        self._pending: dict[str, asyncio.Future] = {}
+        self._cache: dict[Path, tuple[bytes, str]] = {}
+
+    async def start(self):
+        """Ставит в очередь миниатюру изображения профиля по умолчанию."""
+        if await asyncio.to_thread(self.default.exists):
+            await asyncio.to_thread(self.thumbs.mkdir, parents=True, exist_ok=True)
+            self.schedule_thumbnail(self.default)
+
+    async def stop(self):
+        """Дожидается начатых миниатюр и останавливает пул процессов."""
+        if self._pending:
+            await asyncio.gather(*self._pending.values(), return_exceptions=True)
+        if self._pool is not None:
+            await asyncio.to_thread(self._pool.shutdown)
+            self._pool = None
+
+    def thumbnail_path(self, path: str | Path) -> Path:
+        """Путь к миниатюре изображения (файла может еще не быть)."""
+        return self.thumbs / f"{Path(path).stem}-{self.size}.webp"
+
+    def thumbnail(self, path: str | Path) -> Path:
+        """Миниатюра изображения, если она готова, иначе само изображение."""
+        thumbnail = self.thumbnail_path(path)
+        return thumbnail if thumbnail.exists() else Path(path)
+
+    async def default_avatar(self, original: bool = False) -> tuple[bytes, str, str]:
+        """
+        Изображение профиля по умолчанию из памяти.
+
+        Файл читается с диска один раз; до готовности миниатюры отдается
+        оригинал, после — миниатюра.
+
+        Args:
+            original (bool): Вернуть оригинал вместо миниатюры.
+
+        Returns:
+            tuple[bytes, str, str]: Содержимое, ETag (хеш содержимого) и тип содержимого.
+        """
+        path = self.default
+        if not original:
+            thumbnail = self.thumbnail_path(path)
+            if thumbnail in self._cache or thumbnail.exists():
+                path = thumbnail
+        cached = self._cache.get(path)
+        if cached is None:
+            body = await asyncio.to_thread(path.read_bytes)
+            cached = self._cache[path] = (
+                body,
+                f'"{hashlib.sha256(body).hexdigest()}"',
+            )
+        return *cached, MEDIA_TYPES[path.suffix]
+
+    async def save(self, upload: UploadFile) -> str:
+        """
+        Сохраняет загруженное изображение и ставит в очередь создание миниатюры.
+
+        Args:
+            upload (UploadFile): Загруженный файл.
+
+        Returns:
+            str: Путь к сохраненному изображению.
+
+        Raises:
+            CustomException: Файл больше limit байт (413).
+            BadRequestException: Файл не является изображением PNG или JPEG.
+        """
+        await asyncio.to_thread(self.thumbs.mkdir, parents=True, exist_ok=True)
+        partial = self.root / f".{secrets.token_hex(8)}.part"
+        file = await asyncio.to_thread(open, partial, "wb")
+        try:
+            try:
+                digest, extension = await self._copy(upload, file)
+            finally:
+                await asyncio.to_thread(file.close)
+            path = self.root / f"{digest}.{extension}"
+            await asyncio.to_thread(os.replace, partial, path)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                await asyncio.to_thread(os.remove, partial)
+            raise
+        self.schedule_thumbnail(path)
+        return str(path)
+
+    async def _copy(self, upload: UploadFile, file) -> tuple[str, str]:
+        """Копирует загрузку в файл блоками, проверяя формат и размер."""
+        digest = hashlib.sha256()
+        extension = None
+        size = 0
+        while chunk := await upload.read(self.chunk):
+            if extension is None:
+                extension = next(
+                    (ext for magic, ext in SIGNATURES if chunk.startswith(magic)), None
+                )
+                if extension is None:
+                    raise BadRequestException(detail="Invalid file format")
+            size += len(chunk)
+            if size > self.limit:
+                raise CustomException(
+                    detail="File is too large",
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                )
+            digest.update(chunk)
+            await asyncio.to_thread(file.write, chunk)
+        if extension is None:
+            raise BadRequestException(detail="Invalid file format")
+        return digest.hexdigest(), extension
+
+    def schedule_thumbnail(self, path: str | Path):
+        """Создает миниатюру в пуле процессов, если ее еще нет и она не создается."""
+        target = self.thumbnail_path(path)
+        key = target.stem
+        if key in self._pending or target.exists():
+            return
+        if self._pool is None:
+            # spawn, а не fork: в воркере работают потоки (профилировщик,
+            # контроль цикла событий), и fork мог бы унаследовать их блокировки.
+            self._pool = ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        future = asyncio.get_running_loop().run_in_executor(
+            self._pool, make_thumbnail, str(path), str(target), self.size
+        )
+        self._pending[key] = future
+        future.add_done_callback(lambda f: self._done(key, f))
+
+    def _done(self, key: str, future: asyncio.Future):
+        self._pending.pop(key, None)
+        if future.cancelled() or future.exception() is None:
+            return
+        logger.error("failed to create thumbnail %s", key, exc_info=future.exception())
+        if isinstance(future.exception(), BrokenProcessPool):
+            # Пул с погибшим процессом не принимает задачи, следующая миниатюра
+            # создаст новый.
+            self._pool = None
+
+
+class UploadLimitMiddleware:
+    """
+    ASGI-middleware, ограничивающее размер тела запросов с загрузкой изображений.
+
+    FastAPI принимает и разбирает multipart-форму целиком до вызова эндпоинта,
+    поэтому без ограничения запрос любого размера дочитывался бы до конца.
+    Запрос с Content-Length больше limit отклоняется с 413 без чтения тела;
+    если длина не указана или тело длиннее заявленного, ответ 413
+    отправляется, как только принято больше limit байт, а обработчику вместо
+    остатка тела передается разрыв соединения.
+
+    Attributes:
+        paths (tuple[str, ...]): Пути запросов с загрузкой.
+        limit (int): Максимальный размер тела в байтах.
+    """
+
+    def __init__(self, app, paths: tuple[str, ...], limit: int):
+        self.app = app
+        self.paths = paths
+        self.limit = limit
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        length = Headers(scope=scope).get("content-length", "")
+        if length.isdigit() and int(length) > self.limit:
+            await self._reject(scope, receive, send)
+            return
+
+        received = 0
+        started = rejected = False
+
+        async def receive_limited():
+            nonlocal received, rejected
+            if rejected:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            received += len(message.get("body", b""))
+            if received > self.limit:
+                rejected = True
+                if not started:
+                    await self._reject(scope, receive, send)
+                return {"type": "http.disconnect"}
+            return message
+
+        async def send_unless_rejected(message):
+            nonlocal started
+            if not rejected:
+                started = True
+                await send(message)
+
+        await self.app(scope, receive_limited, send_unless_rejected)
+
+    @staticmethod
+    async def _reject(scope, receive, send):
+        exc = CustomException(
+            detail="File is too large",
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        )
+        response = await custom_exception_handler(Request(scope), exc)
+        await response(scope, receive, send)
+
+
+media_store = MediaStore(
+    settings.MEDIA.DIR,
+    settings.MEDIA.LIMIT,
+    settings.MEDIA.CHUNK,
+    settings.MEDIA.SIZE,
+    settings.MEDIA.WORKERS,
+)
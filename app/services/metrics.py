@@ -0,0 +1,230 @@
+import asyncio
+import contextlib
+import logging
+import os
+import socket
+import time
+
+from starlette.routing import Match
+
+from app.core.config import settings
+from app.core.metrics import DEFINITIONS, Metrics, metrics
+from app.services.redis_tools import RedisClient
+
+logger = logging.getLogger(__name__)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def series(name: str, labels: tuple, extra: dict | None = None) -> str:
+    """Имя ряда в текстовом формате Prometheus: name{label="value",...}."""
+    pairs = list(zip(DEFINITIONS[_family(name)][2], labels))
+    if extra:
+        pairs += extra.items()
+    if not pairs:
+        return name
+    body = ",".join(f'{key}="{_escape(str(value))}"' for key, value in pairs)
+    return f"{name}{{{body}}}"
+
+
+def _family(name: str) -> str:
+    """Имя метрики без суффиксов рядов гистограммы (_bucket, _sum, _count)."""
+    if name in DEFINITIONS:
+        return name
+    return name.rsplit("_", 1)[0]
+
+
+def _order(field: str) -> tuple:
+    """Ключ сортировки рядов: корзины гистограммы идут по возрастанию le."""
+    head, _, bound = field.partition(',le="')
+    if not bound:
+        head, _, bound = field.partition('{le="')
+    return (head, float(bound.rstrip('"}')) if bound else 0.0)
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class MetricsExporter:
+    """
+    Агрегация метрик всех воркеров в Redis и их выдача в формате Prometheus.
+
+    Каждый воркер раз в interval секунд одной транзакцией переносит накопленные
+    приращения счетчиков и гистограмм в общий хеш COUNTERS_KEY (HINCRBYFLOAT),
+    поэтому итоговые значения — суммы по всем воркерам, и они не сбрасываются
+    при перезапуске воркера. Измерители (gauge) складывать нельзя без потери
+    смысла, поэтому каждый воркер перезаписывает свой хеш GAUGES_KEY с меткой
+    worker и временем жизни; живые воркеры перечислены в WORKERS_KEY.
+
+    Attributes:
+        metrics (Metrics): Метрики воркера.
+        interval (int): Период переноса метрик в Redis в секундах.
+        worker (str): Идентификатор воркера (хост:pid).
+    """
+
+    COUNTERS_KEY = "metrics:counters"
+    GAUGES_KEY = "metrics:gauges:{}"
+    WORKERS_KEY = "metrics:workers"
+
+    def __init__(self, metrics: Metrics, interval: int):
+        self.metrics = metrics
+        self.interval = interval
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        """Запускает фоновую задачу переноса метрик в Redis."""
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Останавливает фоновую задачу и переносит оставшиеся приращения."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        with contextlib.suppress(Exception):
+            await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("failed to flush metrics")
+
+    def _fields(self, counters: dict, histograms: dict) -> dict[str, float]:
+        fields = {}
+        for (name, labels), value in counters.items():
+            fields[series(name, labels)] = value
+        for (name, labels), (counts, total) in histograms.items():
+            cumulative = 0
+            bounds = [*map(str, self.metrics.buckets), "+Inf"]
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                fields[series(f"{name}_bucket", labels, {"le": bound})] = cumulative
+            fields[series(f"{name}_sum", labels)] = total
+            fields[series(f"{name}_count", labels)] = cumulative
+        return fields
+
+    async def flush(self):
+        """Переносит приращения и текущие значения измерителей воркера в Redis."""
+        counters, histograms = self.metrics.drain()
+        gauges = {
+            series(name, labels, {"worker": self.worker}): value
+            for (name, labels), value in self.metrics.gauges().items()
+        }
+        gauges_key = self.GAUGES_KEY.format(self.worker)
+        # Redis Cluster не поддерживает MULTI/EXEC: там приращения, записанные
+        # до ошибки, после restore() могут учесться повторно.
+        pipe = RedisClient.pipeline(transaction=not RedisClient.is_cluster())
+        for field, value in self._fields(counters, histograms).items():
+            pipe.hincrbyfloat(self.COUNTERS_KEY, field, value)
+        pipe.delete(gauges_key)
+        if gauges:
+            pipe.hset(gauges_key, mapping=gauges)
+            pipe.expire(gauges_key, self.interval * 3)
+        pipe.zadd(self.WORKERS_KEY, {self.worker: time.time()})
+        try:
+            await pipe.execute()
+        except Exception:
+            self.metrics.restore(counters, histograms)
+            raise
+
+    async def render(self) -> str:
+        """
+        Метрики всех воркеров в текстовом формате Prometheus.
+
+        Перед чтением переносит в Redis приращения текущего воркера, поэтому его
+        данные в ответе актуальны; данные остальных воркеров отстают не больше
+        чем на interval секунд.
+        """
+        await self.flush()
+        alive = time.time() - self.interval * 3
+        pipe = RedisClient.pipeline(transaction=False)
+        pipe.zremrangebyscore(self.WORKERS_KEY, "-inf", alive)
+        pipe.zrange(self.WORKERS_KEY, 0, -1)
+        pipe.hgetall(self.COUNTERS_KEY)
+        _, workers, counters = await pipe.execute()
+        pipe = RedisClient.pipeline(transaction=False)
+        for worker in workers:
+            pipe.hgetall(self.GAUGES_KEY.format(worker))
+        samples = dict(counters)
+        for gauges in await pipe.execute():
+            samples.update(gauges)
+
+        families: dict[str, list[str]] = {}
+        for field in sorted(samples, key=_order):
+            name = field.split("{", 1)[0]
+            value = _number(float(samples[field]))
+            families.setdefault(_family(name), []).append(f"{field} {value}")
+        lines = []
+        for name in sorted(families):
+            kind, help_, _ = DEFINITIONS[name]
+            lines += [f"# HELP {name} {help_}", f"# TYPE {name} {kind}"]
+            lines += families[name]
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware метрик HTTP-запросов.
+
+    Считает запросы по шаблону маршрута (например, /api/orders/{order_id}, а не
+    фактический путь, чтобы число рядов не росло), методу и статусу, измеряет
+    задержку и число запросов в работе. Шаблон определяется до обработки
+    запроса, чтобы учесть запрос в работе по его маршруту; результат
+    сопоставления кешируется по пути (не больше cache_size путей). Запросы, не
+    совпавшие ни с одним маршрутом, учитываются как "unmatched".
+    """
+
+    def __init__(self, app, cache_size: int = 1024):
+        self.app = app
+        self.cache_size = cache_size
+        self._routes: dict[str, str] = {}
+
+    def _route(self, scope) -> str:
+        path = scope["path"]
+        route = self._routes.get(path)
+        if route is None:
+            route = "unmatched"
+            for candidate in scope["app"].router.routes:
+                match, _ = candidate.matches(scope)
+                if match != Match.NONE:
+                    route = candidate.path
+                    break
+            if len(self._routes) < self.cache_size:
+                self._routes[path] = route
+        return route
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        labels = (scope["method"], self._route(scope))
+        metrics.add("http_requests_in_flight", labels, 1)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.add("http_requests_in_flight", labels, -1)
+            metrics.inc("http_requests_total", (*labels, status))
+            metrics.observe(
+                "http_request_duration_seconds", labels, time.perf_counter() - started
+            )
+
+
+metrics_exporter = MetricsExporter(metrics, settings.METRICS.INTERVAL)
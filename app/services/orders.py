@@ -0,0 +1,353 @@
+import asyncio
+import contextlib
+import heapq
+import json
+import logging
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import select, tuple_
+
+from app.api.models import Balance, Fill, Order, User
+from app.core import sessionmanager
+from app.services.broker import Broker, broker
+from app.services.rates import RateBoard, RateTick, rate_board
+from app.services.websocket_manager import ws_manager
+from app.utils.balances import create_balances
+from app.utils.send_email import enqueue_email
+
+logger = logging.getLogger(__name__)
+
+
+class OrderBook:
+    """
+    Открытые ордера воркера, разложенные по кучам.
+
+    Для каждой пары source/currency хранятся две кучи: ордера "le" в max-куче
+    по trigger_rate (на вершине — ордер, который сработает первым при падении
+    курса) и ордера "ge" в min-куче. Отложенные по времени ордера лежат в
+    отдельной min-куче по execute_at. Поиск сработавших ордеров после
+    обновления курса стоит O(k log n), где k — количество сработавших.
+    Отмененные ордера удаляются лениво: их идентификаторы пропускаются при
+    извлечении с вершины кучи. Извлеченные ордера остаются в книге до
+    подтверждения исполнения (done), а если исполнить их не удалось, restore
+    возвращает их в кучи.
+    """
+
+    def __init__(self):
+        self.le: dict[str, list[tuple[float, int]]] = {}
+        self.ge: dict[str, list[tuple[float, int]]] = {}
+        self.scheduled: list[tuple[float, int]] = []
+        self._open: dict[int, tuple] = {}
+        self._taken: dict[int, tuple] = {}
+
+    def __len__(self) -> int:
+        return len(self._open) + len(self._taken)
+
+    def add(
+        self,
+        order_id: int,
+        pair: str,
+        condition: str | None,
+        trigger_rate: float | None,
+        execute_at: float | None,
+    ):
+        """Добавляет ордер в кучу, соответствующую его условию."""
+        self._open[order_id] = (pair, condition, trigger_rate, execute_at)
+        if execute_at is not None:
+            heapq.heappush(self.scheduled, (execute_at, order_id))
+        elif condition == "le":
+            heapq.heappush(self.le.setdefault(pair, []), (-trigger_rate, order_id))
+        else:
+            heapq.heappush(self.ge.setdefault(pair, []), (trigger_rate, order_id))
+
+    def cancel(self, order_id: int):
+        """Помечает ордер отмененным; из кучи он будет удален при извлечении."""
+        self._open.pop(order_id, None)
+        self._taken.pop(order_id, None)
+
+    def done(self, ids: list[int]):
+        """Забывает извлеченные ордера, исполнение которых завершено."""
+        for order_id in ids:
+            self._taken.pop(order_id, None)
+
+    def restore(self, ids: list[int]):
+        """Возвращает в кучи извлеченные ордера, которые не удалось исполнить."""
+        for order_id in ids:
+            entry = self._taken.pop(order_id, None)
+            if entry is not None:
+                self.add(order_id, *entry)
+
+    def _pop_while(self, heap: list[tuple[float, int]], limit: float) -> list[int]:
+        popped = []
+        while heap and heap[0][0] <= limit:
+            _, order_id = heapq.heappop(heap)
+            entry = self._open.pop(order_id, None)
+            if entry is not None:
+                self._taken[order_id] = entry
+                popped.append(order_id)
+        return popped
+
+    @property
+    def pairs(self) -> set[str]:
+        """Пары, по которым есть ордера с условием на курс."""
+        return self.le.keys() | self.ge.keys()
+
+    def pop_triggered(self, pair: str, rate: float) -> list[int]:
+        """
+        Извлекает ордера пары, условие которых выполнено при курсе rate.
+
+        Returns:
+            list[int]: Идентификаторы сработавших ордеров.
+        """
+        triggered = []
+        if pair in self.le:
+            triggered += self._pop_while(self.le[pair], -rate)
+            if not self.le[pair]:
+                del self.le[pair]
+        if pair in self.ge:
+            triggered += self._pop_while(self.ge[pair], rate)
+            if not self.ge[pair]:
+                del self.ge[pair]
+        return triggered
+
+    def pop_due(self, now: float) -> list[int]:
+        """Извлекает отложенные ордера, время исполнения которых наступило."""
+        return self._pop_while(self.scheduled, now)
+
+
+class OrderEngine:
+    """
+    Движок исполнения условных и отложенных конвертаций.
+
+    На каждом обновлении RateBoard проверяет вершины куч OrderBook и исполняет
+    сработавшие ордера, а фоновая задача раз в секунду исполняет наступившие
+    отложенные ордера. Создание и отмена ордеров рассылается всем воркерам через
+    брокер. Исполнение идет пачками: одна транзакция блокирует пачку открытых
+    ордеров (FOR UPDATE; воркер, пришедший вторым, дожидается коммита первого и
+    уже не видит ордер открытым), блокирует балансы их владельцев, списывает и
+    зачисляет суммы, записывает исполнения в fills и ставит письма в outbox.
+    Ордера пачки, исполнение которой завершилось ошибкой, возвращаются в книгу
+    и исполняются повторно при следующей проверке.
+
+    Attributes:
+        book (OrderBook): Открытые ордера воркера.
+        batch_size (int): Максимальное количество ордеров в одной транзакции.
+    """
+
+    CHANNEL = "orders:changes"
+
+    def __init__(self, board: RateBoard, broker: Broker, batch_size: int = 500):
+        self.board = board
+        self.broker = broker
+        self.batch_size = batch_size
+        self.book = OrderBook()
+        self._task: asyncio.Task | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self._lock = asyncio.Lock()
+        board.subscribe(self.on_tick)
+        broker.subscribe(self.CHANNEL, self._on_change)
+
+    @staticmethod
+    def _entry(order: Order) -> dict:
+        return {
+            "id": order.id,
+            "pair": f"{order.source}{order.currency}",
+            "condition": order.condition,
+            "trigger_rate": (
+                float(order.trigger_rate) if order.trigger_rate is not None else None
+            ),
+            "execute_at": order.execute_at.timestamp() if order.execute_at else None,
+        }
+
+    async def load(self):
+        """Загружает все открытые ордера из базы данных."""
+        self.book = OrderBook()
+        stmt = select(Order).where(Order.status == "open")
+        async with sessionmanager.session() as session:
+            result = await session.stream_scalars(
+                stmt.execution_options(yield_per=10000)
+            )
+            async for order in result:
+                entry = self._entry(order)
+                self.book.add(
+                    entry["id"],
+                    entry["pair"],
+                    entry["condition"],
+                    entry["trigger_rate"],
+                    entry["execute_at"],
+                )
+
+    async def start(self):
+        """Запускает фоновую задачу исполнения отложенных ордеров."""
+        self._task = asyncio.create_task(self._run_scheduled())
+
+    async def stop(self):
+        """Останавливает фоновую задачу."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def publish(self, op: str, order: Order):
+        """
+        Сообщает всем воркерам о создании или отмене ордера.
+
+        Args:
+            op (str): "add" или "cancel".
+            order (Order): Созданный или отмененный ордер.
+        """
+        await self.broker.publish(
+            self.CHANNEL, json.dumps({"op": op, **self._entry(order)})
+        )
+
+    async def _on_change(self, data: str):
+        change = json.loads(data)
+        if change["op"] == "cancel":
+            self.book.cancel(change["id"])
+            return
+        self.book.add(
+            change["id"],
+            change["pair"],
+            change["condition"],
+            change["trigger_rate"],
+            change["execute_at"],
+        )
+        rate = self.board.rate(change["pair"])
+        if change["condition"] and rate is not None:
+            self._spawn(self.book.pop_triggered(change["pair"], rate))
+
+    async def on_tick(self, tick: RateTick):
+        """Находит ордера, сработавшие при новых курсах, и запускает их исполнение."""
+        triggered = []
+        for pair in list(self.book.pairs):
+            rate = self.board.rate(pair)
+            if rate is not None:
+                triggered += self.book.pop_triggered(pair, rate)
+        self._spawn(triggered)
+
+    def _spawn(self, ids: list[int]):
+        if not ids:
+            return
+        task = asyncio.create_task(self.execute(ids))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_scheduled(self):
+        while True:
+            try:
+                await self.execute(self.book.pop_due(datetime.utcnow().timestamp()))
+            except Exception:
+                logger.exception("failed to execute scheduled orders")
+            await asyncio.sleep(1)
+
+    async def execute(self, ids: list[int]):
+        """
+        Исполняет ордера пачками по текущим курсам.
+
+        Args:
+            ids (list[int]): Идентификаторы сработавших ордеров.
+        """
+        for start in range(0, len(ids), self.batch_size):
+            batch = ids[start : start + self.batch_size]
+            try:
+                async with self._lock:
+                    await self._execute_batch(batch)
+            except Exception:
+                logger.exception("failed to execute %d orders", len(batch))
+                self.book.restore(batch)
+            else:
+                self.book.done(batch)
+
+    async def _execute_batch(self, ids: list[int]):
+        notifications = []
+        async with sessionmanager.session() as session:
+            stmt = (
+                select(Order)
+                .where(Order.id.in_(ids), Order.status == "open")
+                .order_by(Order.id)
+                .with_for_update()
+            )
+            orders = (await session.execute(stmt)).scalars().all()
+            if not orders:
+                await session.rollback()
+                return
+
+            # Балансы для зачисления создаются заранее (ON CONFLICT DO NOTHING),
+            # чтобы параллельное пополнение в ту же валюту не создало второй.
+            await create_balances(session, {(o.user_id, o.currency) for o in orders})
+            keys = {(o.user_id, c) for o in orders for c in (o.source, o.currency)}
+            stmt = (
+                select(Balance)
+                .where(tuple_(Balance.user_id, Balance.currency).in_(list(keys)))
+                .order_by(Balance.id)
+                .with_for_update()
+            )
+            balances = {
+                (b.user_id, b.currency): b
+                for b in (await session.execute(stmt)).scalars().all()
+            }
+            emails = dict(
+                (
+                    await session.execute(
+                        select(User.id, User.email).where(
+                            User.id.in_({o.user_id for o in orders})
+                        )
+                    )
+                ).all()
+            )
+
+            for order in orders:
+                source_balance = balances.get((order.user_id, order.source))
+                rate = self.board.rate(f"{order.source}{order.currency}")
+                if rate is None:
+                    order.status = "rejected"
+                    message = (
+                        f"order {order.id} rejected: no exchange rate "
+                        f"for {order.source}/{order.currency}"
+                    )
+                elif source_balance is None or source_balance.amount < order.amount:
+                    order.status = "rejected"
+                    message = (
+                        f"order {order.id} rejected: insufficient funds "
+                        f"to exchange {order.amount} {order.source}"
+                    )
+                else:
+                    exchange_rate = Decimal(str(rate))
+                    add_amount = round(order.amount * exchange_rate, 2)
+                    target_balance = balances[(order.user_id, order.currency)]
+                    source_balance.amount -= order.amount
+                    target_balance.amount += add_amount
+                    session.add(
+                        Fill(
+                            order_id=order.id,
+                            user_id=order.user_id,
+                            rate=exchange_rate,
+                            amount_from=order.amount,
+                            amount_to=add_amount,
+                        )
+                    )
+                    order.status = "filled"
+                    message = (
+                        f"order {order.id} filled: you exchanged {order.amount} "
+                        f"{order.source} for {add_amount} {order.currency}"
+                    )
+                enqueue_email(
+                    session, "Conversion order", message, emails[order.user_id]
+                )
+                notifications.append((order.user_id, message))
+
+            # Нулевые балансы (опустевшие и созданные для ордеров, которые не
+            # исполнились) удаляются после всех ордеров пачки, чтобы следующий
+            # ордер той же пачки зачислял средства в тот же баланс.
+            for balance in balances.values():
+                if balance.amount == 0:
+                    await session.delete(balance)
+            await session.commit()
+
+        for user_id, message in notifications:
+            await ws_manager.send_to_user(user_id, message)
+
+
+order_engine = OrderEngine(rate_board, broker)
@@ -0,0 +1,359 @@
+import asyncio
+import collections
+import contextlib
+import json
+import os
+import secrets
+import socket
+import sys
+import sysconfig
+import threading
+import time
+from pathlib import Path
+
+from itsdangerous import BadSignature, TimestampSigner
+
+from app.core.config import settings
+from app.services.redis_tools import RedisClient
+
+_signer = TimestampSigner(settings.AUTH.KEY, salt="profiler")
+
+_PREFIXES = sorted(
+    {
+        os.path.join(path, "")
+        for path in (
+            sysconfig.get_paths()["purelib"],
+            sysconfig.get_paths()["stdlib"],
+            str(Path(__file__).parents[2]),
+        )
+    },
+    key=len,
+    reverse=True,
+)
+
+
+def _label(code) -> str:
+    """Имя кадра стека: функция и файл относительно корня проекта или site-packages."""
+    filename = code.co_filename
+    for prefix in _PREFIXES:
+        if filename.startswith(prefix):
+            filename = filename[len(prefix) :]
+            break
+    return f"{code.co_qualname} ({filename}:{code.co_firstlineno})"
+
+
+class Profile:
+    """
+    Результат профилирования: количество выборок по каждому стеку.
+
+    Attributes:
+        name (str): Что профилировалось (воркер или запрос).
+        duration (float): Длительность профилирования в секундах.
+        period (float): Фактический средний интервал между выборками в секундах.
+        stacks (dict[tuple[str, ...], int]): Стек (от корня к листу) и количество выборок с ним.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        duration: float,
+        period: float,
+        stacks: dict[tuple[str, ...], int],
+    ):
+        self.name = name
+        self.duration = duration
+        self.period = period
+        self.stacks = stacks
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def collapsed(self) -> str:
+        """Стеки в свернутом формате (folded stacks) для flamegraph.pl и speedscope."""
+        return "".join(
+            f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.items()
+        )
+
+    def speedscope(self) -> dict:
+        """Профиль в формате speedscope (https://www.speedscope.app/file-format-schema.json)."""
+        frames: dict[str, int] = {}
+        samples, weights = [], []
+        for stack, count in self.stacks.items():
+            samples.append([frames.setdefault(frame, len(frames)) for frame in stack])
+            weights.append(count * self.period)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": self.name,
+            "exporter": "currency-exchange-api",
+            "activeProfileIndex": 0,
+            "shared": {"frames": [{"name": frame} for frame in frames]},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": self.name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": self.duration,
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+        }
+
+    def render(self, format: str) -> tuple[str, str]:
+        """
+        Профиль в заданном формате.
+
+        Args:
+            format (str): "speedscope" или "collapsed".
+
+        Returns:
+            tuple[str, str]: Тело и тип содержимого.
+        """
+        if format == "collapsed":
+            return self.collapsed(), "text/plain; charset=utf-8"
+        return json.dumps(self.speedscope()), "application/json"
+
+    def dumps(self) -> str:
+        return json.dumps(
+            {
+                "name": self.name,
+                "duration": self.duration,
+                "period": self.period,
+                "stacks": [[*stack, count] for stack, count in self.stacks.items()],
+            }
+        )
+
+    @classmethod
+    def loads(cls, data: str) -> "Profile":
+        raw = json.loads(data)
+        stacks = {tuple(item[:-1]): item[-1] for item in raw["stacks"]}
+        return cls(raw["name"], raw["duration"], raw["period"], stacks)
+
+
+class _Session:
+    """Одно профилирование: выборки стеков потока цикла событий в отдельном потоке."""
+
+    def __init__(self, interval: float, task: asyncio.Task | None):
+        self.interval = interval
+        self.task = task
+        self.loop = asyncio.get_running_loop()
+        self.thread_id = threading.get_ident()
+        self.stacks: collections.Counter = collections.Counter()
+        self.ticks = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def _run(self):
+        current_tasks = asyncio.tasks._current_tasks
+        while not self._stop.wait(self.interval):
+            self.ticks += 1
+            if self.task is not None and current_tasks.get(self.loop) is not self.task:
+                continue
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            self.stacks[tuple(reversed(stack))] += 1
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self, name: str) -> Profile:
+        self._stop.set()
+        self._thread.join()
+        duration = time.perf_counter() - self.started
+        labels: dict = {}
+        stacks: collections.Counter = collections.Counter()
+        for codes, count in self.stacks.items():
+            stack = tuple(
+                labels.get(c) or labels.setdefault(c, _label(c)) for c in codes
+            )
+            stacks[stack] += count
+        return Profile(name, duration, duration / max(self.ticks, 1), dict(stacks))
+
+
+class SamplingProfiler:
+    """
+    Выборочный профилировщик работающего воркера.
+
+    Отдельный поток раз в interval секунд снимает стек потока цикла событий
+    через sys._current_frames() и считает одинаковые стеки. Профилируемый код
+    не инструментируется и не перезапускается: цикл событий не ждет
+    профилировщик, а поток выборки лишь ненадолго берет GIL, поэтому нагрузка
+    почти не зависит от того, что выполняется в эндпоинтах. Поток выборки
+    получает GIL в точках переключения, поэтому короткие (меньше миллисекунды)
+    участки чистого Python между операциями ввода-вывода могут быть
+    недопредставлены; долгие блокирующие участки видны точно. При профилировании
+    одного запроса в расчет берутся только выборки, в которые цикл выполнял
+    задачу этого запроса; синхронные обработчики, выполняемые в пуле потоков,
+    и порожденные запросом задачи в профиль не попадают.
+
+    Одновременно на воркере выполняется не больше одного профилирования.
+
+    Attributes:
+        interval (float): Интервал между выборками в секундах.
+        max_seconds (float): Максимальная длительность профилирования воркера.
+        worker (str): Идентификатор воркера (хост:pid).
+    """
+
+    RESULT_KEY = "profiler:{}"
+    RESULT_TTL = 3600
+    TOKEN_TTL = 600
+
+    def __init__(self, interval: float = 0.005, max_seconds: float = 60):
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+        self._busy = False
+
+    @property
+    def busy(self) -> bool:
+        return self._busy
+
+    @contextlib.contextmanager
+    def _session(self, task: asyncio.Task | None):
+        if self._busy:
+            raise RuntimeError("profiler is already running")
+        self._busy = True
+        session = _Session(self.interval, task)
+        session.start()
+        try:
+            yield session
+        finally:
+            self._busy = False
+            session._stop.set()
+
+    async def profile(self, seconds: float) -> Profile:
+        """
+        Профилирует весь поток цикла событий воркера в течение seconds секунд.
+
+        Выборки, в которые цикл простаивал в ожидании ввода-вывода, попадают в
+        профиль со стеком select()/epoll, поэтому доля простоя видна на графике.
+
+        Raises:
+            RuntimeError: На воркере уже идет профилирование.
+        """
+        seconds = min(max(seconds, self.interval), self.max_seconds)
+        with self._session(None) as session:
+            await asyncio.sleep(seconds)
+            return session.stop(f"worker {self.worker}")
+
+    @contextlib.asynccontextmanager
+    async def request(self, name: str):
+        """
+        Профилирует код, выполняемый внутри блока в текущей задаче.
+
+        Yields:
+            list[Profile]: Список, в который по выходе из блока кладется профиль.
+
+        Raises:
+            RuntimeError: На воркере уже идет профилирование.
+        """
+        result: list[Profile] = []
+        with self._session(asyncio.current_task()) as session:
+            try:
+                yield result
+            finally:
+                result.append(session.stop(f"{name} ({self.worker})"))
+
+    @staticmethod
+    def token() -> str:
+        """Подписанное значение заголовка X-Profile, действительное TOKEN_TTL секунд."""
+        return _signer.sign(secrets.token_hex(8)).decode()
+
+    def verify(self, token: str) -> bool:
+        """Проверяет подпись и срок действия значения заголовка X-Profile."""
+        try:
+            _signer.unsign(token, max_age=self.TOKEN_TTL)
+        except BadSignature:
+            return False
+        return True
+
+    async def save(self, profile: Profile, profile_id: str | None = None) -> str:
+        """
+        Сохраняет профиль в Redis на RESULT_TTL секунд и возвращает его идентификатор.
+
+        Идентификатор можно выдать заранее (profile_id), чтобы сообщить его
+        клиенту до того, как профиль будет готов.
+        """
+        profile_id = profile_id or secrets.token_hex(8)
+        await RedisClient.set_currency(
+            self.RESULT_KEY.format(profile_id), profile.dumps(), self.RESULT_TTL
+        )
+        return profile_id
+
+    async def load(self, profile_id: str) -> Profile | None:
+        """Сохраненный профиль или None, если он не найден или истек."""
+        data = await RedisClient.get_currency(self.RESULT_KEY.format(profile_id))
+        return Profile.loads(data) if data else None
+
+
+class ProfilerMiddleware:
+    """
+    ASGI-middleware профилирования отдельного запроса по подписанному заголовку.
+
+    Запрос с заголовком X-Profile, содержащим действующий токен из раздела
+    Profiler админской панели, выполняется под профилировщиком; профиль
+    сохраняется в Redis, а его идентификатор возвращается в заголовке
+    X-Profile-Id (или описание причины отказа — в X-Profile-Error). Ответ не
+    задерживается: профиль можно скачать по идентификатору, когда ответ
+    завершится. Запросы без заголовка проходят без изменений.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = None
+        for key, value in scope["headers"]:
+            if key == b"x-profile":
+                token = value.decode("latin-1")
+                break
+        if token is None:
+            await self.app(scope, receive, send)
+            return
+
+        error = None
+        if not profiler.verify(token):
+            error = "invalid or expired token"
+        elif profiler.busy:
+            error = "profiler is busy"
+        if error is not None:
+
+            async def send_error(message):
+                if message["type"] == "http.response.start":
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (b"x-profile-error", error.encode()),
+                    ]
+                await send(message)
+
+            await self.app(scope, receive, send_error)
+            return
+
+        # Идентификатор выдается заранее, поэтому ответ (в том числе потоковый,
+        # например SSE) отправляется клиенту сразу, а профиль сохраняется под
+        # этим идентификатором, когда ответ завершится.
+        profile_id = secrets.token_hex(8)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-profile-id", profile_id.encode()),
+                ]
+            await send(message)
+
+        async with profiler.request(f"{scope['method']} {scope['path']}") as result:
+            await self.app(scope, receive, send_wrapper)
+        await profiler.save(result[0], profile_id)
+
+
+profiler = SamplingProfiler()
@@ -0,0 +1,384 @@
+import argparse
+import asyncio
+import hashlib
+import math
+import random
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from aiohttp import web
+
+CURRENCIES = {
+    "USD": ("United States Dollar", 1.0),
+    "EUR": ("Euro", 0.92),
+    "RUB": ("Russian Ruble", 92.5),
+    "GBP": ("British Pound Sterling", 0.79),
+    "JPY": ("Japanese Yen", 151.4),
+    "CNY": ("Chinese Yuan", 7.23),
+    "CHF": ("Swiss Franc", 0.9),
+    "CAD": ("Canadian Dollar", 1.36),
+    "AUD": ("Australian Dollar", 1.53),
+    "KZT": ("Kazakhstani Tenge", 448.0),
+    "TRY": ("Turkish Lira", 32.1),
+    "INR": ("Indian Rupee", 83.3),
+    "BRL": ("Brazilian Real", 5.05),
+    "SEK": ("Swedish Krona", 10.7),
+    "NOK": ("Norwegian Krone", 10.9),
+    "PLN": ("Polish Zloty", 3.98),
+    "AED": ("United Arab Emirates Dirham", 3.67),
+    "HKD": ("Hong Kong Dollar", 7.83),
+    "SGD": ("Singapore Dollar", 1.35),
+    "BTC": ("Bitcoin", 0.000015),
+}
+
+DAY = 24 * 60 * 60
+
+
+class ProviderStub:
+    """
+    Локальная заглушка внешнего API курсов валют (apilayer currency_data).
+
+    Отвечает на те же адреса, что и внешний сервис: /currency_data/list, live,
+    convert, change, historical и timeframe, в том же формате JSON. Курсы
+    синтетические и детерминированные: курс каждой валюты к USD — функция от
+    времени и seed (сумма синусоид вокруг реалистичного значения), поэтому при
+    одинаковом seed одни и те же запросы всегда дают одни и те же ответы. Текущие
+    курсы меняются раз в step секунд.
+
+    Attributes:
+        latency (float): Средняя задержка ответа в секундах.
+        jitter (float): Разброс задержки в секундах (равномерно ±jitter).
+        error_rate (float): Доля запросов, на которые возвращается ошибка 503.
+        quota (int | None): Сколько запросов разрешено за quota_window секунд на
+            один API-ключ; после этого возвращается 429.
+        requests (int): Количество обработанных запросов.
+
+    Пример использования:
+        async with ProviderStub(latency=0.05) as stub:
+            settings.API.EXCRATES = f"{stub.url}/live"
+            ...
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: int = 0,
+        step: int = 60,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        quota: int | None = None,
+        quota_window: int = DAY,
+    ):
+        self.host = host
+        self.port = port
+        self.seed = seed
+        self.step = step
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.quota = quota
+        self.quota_window = quota_window
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._usage: dict[str, tuple[int, int]] = {}
+        self._waves = {code: self._wave(code) for code in CURRENCIES}
+        self._runner: web.AppRunner | None = None
+
+    @property
+    def url(self) -> str:
+        """Базовый адрес API, соответствующий https://api.apilayer.com/currency_data."""
+        return f"http://{self.host}:{self.port}/currency_data"
+
+    def _wave(self, code: str) -> list[tuple[float, float, float]]:
+        """Параметры синусоид (амплитуда, период, фаза) для курса валюты."""
+        if code == "USD":
+            return []
+        digest = hashlib.sha256(f"{self.seed}:{code}".encode()).digest()
+        return [
+            (0.002 + digest[0] / 255 * 0.01, 3600 * (1 + digest[1] % 12), digest[2]),
+            (0.01 + digest[3] / 255 * 0.05, DAY * (7 + digest[4] % 60), digest[5]),
+            (0.05 + digest[6] / 255 * 0.1, DAY * (365 + digest[7] * 20), digest[8]),
+        ]
+
+    def usd_rate(self, code: str, timestamp: float) -> float:
+        """Сколько единиц валюты стоит 1 USD в момент timestamp."""
+        offset = sum(
+            amplitude * math.sin(2 * math.pi * timestamp / period + phase)
+            for amplitude, period, phase in self._waves[code]
+        )
+        return CURRENCIES[code][1] * math.exp(offset)
+
+    def quotes(self, source: str, currencies: list[str], timestamp: float) -> dict:
+        """Курсы валют currencies относительно source в формате {"USDEUR": 0.92}."""
+        base = self.usd_rate(source, timestamp)
+        return {
+            f"{source}{code}": round(self.usd_rate(code, timestamp) / base, 8)
+            for code in currencies
+        }
+
+    def now(self) -> int:
+        """Текущее время, округленное до шага обновления курсов."""
+        return int(time.time()) // self.step * self.step
+
+    async def start(self):
+        """Запускает сервер; при port=0 порт выбирается свободный."""
+        app = web.Application(middlewares=[self._middleware])
+        app.add_routes(
+            [
+                web.get("/currency_data/list", self.list),
+                web.get("/currency_data/live", self.live),
+                web.get("/currency_data/convert", self.convert),
+                web.get("/currency_data/change", self.change),
+                web.get("/currency_data/historical", self.historical),
+                web.get("/currency_data/timeframe", self.timeframe),
+            ]
+        )
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    async def stop(self):
+        """Останавливает сервер."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "ProviderStub":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        self.requests += 1
+        delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        key = request.headers.get("apikey")
+        if not key:
+            return web.json_response(
+                {"message": "No API key found in request"}, status=401
+            )
+        if self.quota is not None:
+            window = int(time.time()) // self.quota_window
+            used_window, used = self._usage.get(key, (window, 0))
+            used = used + 1 if used_window == window else 1
+            self._usage[key] = (window, used)
+            if used > self.quota:
+                return web.json_response(
+                    {"message": "You have exceeded your daily/monthly API rate limit."},
+                    status=429,
+                    headers={"X-RateLimit-Remaining-Day": "0"},
+                )
+        if self._random.random() < self.error_rate:
+            return web.json_response(
+                {"message": "Service temporarily unavailable"}, status=503
+            )
+        try:
+            return await handler(request)
+        except ValueError as error:
+            return web.json_response(
+                {"success": False, "error": {"code": 400, "info": str(error)}}
+            )
+
+    @staticmethod
+    def _currencies(request: web.Request) -> list[str]:
+        # Приложение склеивает коды через "%2C", который доходит до сервера буквально.
+        value = request.query.get("currencies", "").replace("%2C", ",")
+        codes = [code.strip().upper() for code in value.split(",") if code.strip()]
+        for code in codes:
+            if code not in CURRENCIES:
+                raise ValueError(f"Invalid currency code: {code}")
+        return codes or list(CURRENCIES)
+
+    @staticmethod
+    def _source(request: web.Request) -> str:
+        source = request.query.get("source", "USD").upper()
+        if source not in CURRENCIES:
+            raise ValueError(f"Invalid source currency: {source}")
+        return source
+
+    @staticmethod
+    def _date(value: str | None) -> date:
+        if value is None:
+            raise ValueError("Date is required")
+        return date.fromisoformat(value)
+
+    @staticmethod
+    def _timestamp(day: date) -> int:
+        return int(
+            datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp()
+        )
+
+    async def list(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {
+                "success": True,
+                "currencies": {code: name for code, (name, _) in CURRENCIES.items()},
+            }
+        )
+
+    async def live(self, request: web.Request) -> web.Response:
+        source, currencies = self._source(request), self._currencies(request)
+        timestamp = self.now()
+        return web.json_response(
+            {
+                "success": True,
+                "timestamp": timestamp,
+                "source": source,
+                "quotes": self.quotes(source, currencies, timestamp),
+            }
+        )
+
+    async def convert(self, request: web.Request) -> web.Response:
+        source = request.query.get("from", "").upper()
+        target = request.query.get("to", "").upper()
+        if source not in CURRENCIES or target not in CURRENCIES:
+            raise ValueError("Invalid currency code")
+        amount = float(request.query.get("amount", 0))
+        day = request.query.get("date")
+        timestamp = self._timestamp(self._date(day)) if day else self.now()
+        quote = self.quotes(source, [target], timestamp)[f"{source}{target}"]
+        data = {
+            "success": True,
+            "query": {"from": source, "to": target, "amount": amount},
+            "info": {"timestamp": timestamp, "quote": quote},
+            "result": round(amount * quote, 6),
+        }
+        if day:
+            data["date"] = day
+            data["historical"] = True
+        return web.json_response(data)
+
+    async def historical(self, request: web.Request) -> web.Response:
+        day = self._date(request.query.get("date"))
+        source, currencies = self._source(request), self._currencies(request)
+        timestamp = self._timestamp(day)
+        return web.json_response(
+            {
+                "success": True,
+                "historical": True,
+                "date": str(day),
+                "timestamp": timestamp,
+                "source": source,
+                "quotes": self.quotes(source, currencies, timestamp),
+            }
+        )
+
+    def _period(self, request: web.Request) -> tuple[date, date]:
+        start = self._date(request.query.get("start_date"))
+        end = self._date(request.query.get("end_date"))
+        if end < start or (end - start).days > 365:
+            raise ValueError("Invalid time frame: no more than 365 days")
+        return start, end
+
+    async def change(self, request: web.Request) -> web.Response:
+        start, end = self._period(request)
+        source, currencies = self._source(request), self._currencies(request)
+        start_quotes = self.quotes(source, currencies, self._timestamp(start))
+        end_quotes = self.quotes(source, currencies, self._timestamp(end))
+        quotes = {}
+        for pair, start_rate in start_quotes.items():
+            end_rate = end_quotes[pair]
+            change = round(end_rate - start_rate, 6)
+            quotes[pair] = {
+                "start_rate": start_rate,
+                "end_rate": end_rate,
+                "change": change,
+                "change_pct": round(change / start_rate * 100, 4),
+            }
+        return web.json_response(
+            {
+                "success": True,
+                "change": True,
+                "start_date": str(start),
+                "end_date": str(end),
+                "source": source,
+                "quotes": quotes,
+            }
+        )
+
+    async def timeframe(self, request: web.Request) -> web.Response:
+        start, end = self._period(request)
+        source, currencies = self._source(request), self._currencies(request)
+        quotes = {}
+        for offset in range((end - start).days + 1):
+            day = start + timedelta(days=offset)
+            quotes[str(day)] = self.quotes(source, currencies, self._timestamp(day))
+        return web.json_response(
+            {
+                "success": True,
+                "timeframe": True,
+                "start_date": str(start),
+                "end_date": str(end),
+                "source": source,
+                "quotes": quotes,
+            }
+        )
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description="Локальная заглушка внешнего API курсов валют."
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Адрес для прослушивания")
+    parser.add_argument("--port", type=int, default=8090, help="Порт для прослушивания")
+    parser.add_argument("--seed", type=int, default=0, help="Seed синтетических курсов")
+    parser.add_argument(
+        "--step", type=int, default=60, help="Период изменения текущих курсов, с"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Средняя задержка ответа, мс"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.0, help="Разброс задержки, мс"
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="Доля ответов с ошибкой 503"
+    )
+    parser.add_argument(
+        "--quota", type=int, default=None, help="Лимит запросов на ключ за окно"
+    )
+    parser.add_argument(
+        "--quota-window", type=int, default=DAY, help="Окно лимита запросов, с"
+    )
+    args = parser.parse_args()
+
+    stub = ProviderStub(
+        host=args.host,
+        port=args.port,
+        seed=args.seed,
+        step=args.step,
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        error_rate=args.error_rate,
+        quota=args.quota,
+        quota_window=args.quota_window,
+    )
+    await stub.start()
+    print(f"Rate provider stub listening on {stub.url}")
+    for name, path in (
+        ("LIST", "list"),
+        ("EXCRATES", "live"),
+        ("CONVERT", "convert"),
+        ("CHANGE", "change"),
+        ("HISTORICAL", "historical"),
+        ("TIMEFRAME", "timeframe"),
+    ):
+        print(f"API_{name}={stub.url}/{path}")
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        await stub.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,190 @@
+import json
+import re
+from typing import TYPE_CHECKING
+
+from app.core.config import settings
+from app.services.rates import RateBoard, RateTick, rate_board
+
+if TYPE_CHECKING:
+    from app.services.websocket_manager import Connection
+
+PAIR_REGEX = re.compile(r"[A-Z]{6}")
+ACTIONS = ("subscribe", "unsubscribe")
+
+
+class RateStream:
+    """
+    Подписки WebSocket соединений на курсы валютных пар.
+
+    Клиент подписывается на пары вида "EURUSD" и сразу получает их текущие
+    значения, а затем — только изменения. На каждое обновление RateBoard
+    кросс-курс пары вычисляется один раз, и пара попадает в рассылку, только
+    если курс изменился относительно последнего отправленного значения больше
+    чем на settings.RATES.THRESHOLD. Соединения с одинаковым набором
+    изменившихся пар получают один и тот же закодированный фрейм.
+
+    Формат сообщений:
+        {"t": "snapshot", "s": 12, "r": {"EURUSD": 1.0873}} — текущие курсы после подписки;
+        {"t": "delta", "s": 13, "r": {"EURUSD": 1.0881}} — изменившиеся курсы;
+        {"t": "unsubscribed", "s": 13, "r": {}} — подтверждение отписки;
+        {"t": "error", "detail": "..."} — ошибка в запросе клиента.
+
+    Attributes:
+        board (RateBoard): Таблица актуальных курсов.
+        threshold (float): Минимальное относительное изменение курса для отправки.
+    """
+
+    MAX_PAIRS = 50
+
+    def __init__(self, board: RateBoard, threshold: float):
+        self.board = board
+        self.threshold = threshold
+        self.subscriptions: dict[str, set["Connection"]] = {}
+        self._pairs: dict["Connection", set[str]] = {}
+        self._last_sent: dict[str, float] = {}
+        board.subscribe(self.on_tick)
+
+    @staticmethod
+    def encode(kind: str, seq: int, rates: dict[str, float]) -> dict:
+        """Кодирует сообщение с курсами в ASGI-фрейм."""
+        text = json.dumps({"t": kind, "s": seq, "r": rates}, separators=(",", ":"))
+        return {"type": "websocket.send", "text": text}
+
+    @staticmethod
+    def error(detail: str) -> dict:
+        """Кодирует сообщение об ошибке в ASGI-фрейм."""
+        text = json.dumps({"t": "error", "detail": detail}, separators=(",", ":"))
+        return {"type": "websocket.send", "text": text}
+
+    def _validate(self, pairs) -> list[str]:
+        if not isinstance(pairs, list) or not all(isinstance(p, str) for p in pairs):
+            raise ValueError("pairs must be a list of strings")
+        pairs = [pair.upper() for pair in pairs]
+        for pair in pairs:
+            if not PAIR_REGEX.fullmatch(pair):
+                raise ValueError(f"Incorrect currency pair {pair}")
+            if self.board.quotes and self.board.rate(pair) is None:
+                raise ValueError(f"Incorrect currency pair {pair}")
+        return pairs
+
+    def subscribe(self, connection: "Connection", pairs: list[str]) -> dict:
+        """
+        Подписывает соединение на валютные пары.
+
+        Args:
+            connection (Connection): Соединение клиента.
+            pairs (list[str]): Пары вида "EURUSD".
+
+        Returns:
+            dict: Фрейм со снимком текущих курсов запрошенных пар.
+
+        Raises:
+            ValueError: Если пара некорректна или превышен лимит подписок.
+        """
+        pairs = self._validate(pairs)
+        subscribed = self._pairs.setdefault(connection, set())
+        if len(subscribed | set(pairs)) > self.MAX_PAIRS:
+            raise ValueError(f"No more than {self.MAX_PAIRS} pairs per connection")
+        for pair in pairs:
+            subscribed.add(pair)
+            self.subscriptions.setdefault(pair, set()).add(connection)
+            if pair not in self._last_sent and (rate := self.board.rate(pair)):
+                self._last_sent[pair] = rate
+        snapshot = {
+            pair: round(self._last_sent[pair], 6)
+            for pair in pairs
+            if pair in self._last_sent
+        }
+        return self.encode("snapshot", self.board.seq, snapshot)
+
+    def unsubscribe(self, connection: "Connection", pairs: list[str] | None = None):
+        """
+        Отписывает соединение от валютных пар.
+
+        Args:
+            connection (Connection): Соединение клиента.
+            pairs (list[str] | None): Пары для отписки; None — отписать от всех.
+        """
+        subscribed = self._pairs.get(connection)
+        if subscribed is None:
+            return
+        pairs = set(subscribed) if pairs is None else {p.upper() for p in pairs}
+        for pair in pairs & subscribed:
+            subscribed.discard(pair)
+            connections = self.subscriptions[pair]
+            connections.discard(connection)
+            if not connections:
+                del self.subscriptions[pair]
+                self._last_sent.pop(pair, None)
+        if not subscribed:
+            del self._pairs[connection]
+
+    @staticmethod
+    def parse(text: str) -> dict | None:
+        """
+        Разбирает сообщение клиента протокола подписок.
+
+        Args:
+            text (str): Текст сообщения.
+
+        Returns:
+            dict | None: Сообщение вида {"action": "subscribe" | "unsubscribe", "pairs": ["EURUSD"]}
+                или None, если текст не является сообщением протокола.
+        """
+        try:
+            message = json.loads(text)
+        except ValueError:
+            return None
+        if isinstance(message, dict) and message.get("action") in ACTIONS:
+            return message
+        return None
+
+    def handle(self, connection: "Connection", message: dict) -> dict:
+        """
+        Обрабатывает сообщение клиента протокола подписок.
+
+        Args:
+            connection (Connection): Соединение клиента.
+            message (dict): Сообщение, разобранное parse().
+
+        Returns:
+            dict: Фрейм ответа клиенту.
+        """
+        try:
+            if message["action"] == "subscribe":
+                return self.subscribe(connection, message.get("pairs"))
+            self.unsubscribe(connection, self._validate(message.get("pairs")))
+            return self.encode("unsubscribed", self.board.seq, {})
+        except ValueError as error:
+            return self.error(str(error))
+
+    async def on_tick(self, tick: RateTick):
+        """Рассылает подписчикам изменившиеся курсы после обновления RateBoard."""
+        changed: dict[str, float] = {}
+        for pair in self.subscriptions:
+            rate = self.board.rate(pair)
+            if rate is None:
+                continue
+            last = self._last_sent.get(pair)
+            if last is None or abs(rate - last) >= self.threshold * last:
+                self._last_sent[pair] = rate
+                changed[pair] = round(rate, 6)
+        if not changed:
+            return
+
+        recipients: dict["Connection", list[str]] = {}
+        for pair in changed:
+            for connection in self.subscriptions[pair]:
+                recipients.setdefault(connection, []).append(pair)
+
+        frames: dict[tuple[str, ...], dict] = {}
+        for connection, pairs in recipients.items():
+            key = tuple(pairs)
+            if key not in frames:
+                frames[key] = self.encode(
+                    "delta", tick.seq, {pair: changed[pair] for pair in pairs}
+                )
+            connection.push(frames[key])
+
+
+rate_stream = RateStream(rate_board, settings.RATES.THRESHOLD)
@@ -0,0 +1,191 @@
+import asyncio
+import contextlib
+import json
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from app.core.config import settings
+from app.services.broker import Broker, broker
+from app.services.redis_tools import RedisClient
+from app.utils.currencies import get_exchange
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RateTick:
+    """
+    Очередное обновление курсов валют.
+
+    Attributes:
+        seq (int): Сквозной номер обновления, одинаковый на всех воркерах.
+        timestamp (int): Время котировок по данным внешнего API (unix time).
+        quotes (dict[str, float]): Новые курсы валют относительно базовой валюты.
+        previous (dict[str, float]): Курсы до обновления.
+    """
+
+    seq: int
+    timestamp: int
+    quotes: dict[str, float]
+    previous: dict[str, float]
+
+
+Listener = Callable[[RateTick], Awaitable[None]]
+
+
+def cross_rate(quotes: dict[str, float], pair: str) -> float | None:
+    """
+    Кросс-курс валютной пары по курсам валют относительно базовой.
+
+    Args:
+        quotes (dict[str, float]): Курсы валют относительно базовой валюты.
+        pair (str): Пара вида "EURUSD" — сколько USD стоит 1 EUR.
+
+    Returns:
+        float | None: Курс пары или None, если одной из валют нет в quotes.
+    """
+    base = quotes.get(pair[:3])
+    quote = quotes.get(pair[3:])
+    if not base or quote is None:
+        return None
+    return quote / base
+
+
+class RateBoard:
+    """
+    Общая для воркера таблица актуальных курсов валют.
+
+    Хранит курсы всех валют относительно базовой (settings.RATES.SOURCE) и
+    вычисляет по ним кросс-курсы любых пар. После каждого обновления вызывает
+    подписчиков (потоки котировок, алерты и т. д.), которые работают с уже
+    полученными данными без обращений к внешнему API.
+
+    Attributes:
+        source (str): Базовая валюта.
+        quotes (dict[str, float]): Курс каждой валюты относительно базовой, для базовой — 1.
+        seq (int): Номер последнего примененного обновления.
+        timestamp (int | None): Время последних котировок.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.quotes: dict[str, float] = {}
+        self.seq = 0
+        self.timestamp: int | None = None
+        self._listeners: list[Listener] = []
+
+    def subscribe(self, listener: Listener):
+        """
+        Регистрирует подписчика на обновления курсов.
+
+        Args:
+            listener (Listener): Асинхронная функция, принимающая RateTick.
+        """
+        self._listeners.append(listener)
+
+    def rate(self, pair: str) -> float | None:
+        """
+        Кросс-курс валютной пары.
+
+        Args:
+            pair (str): Пара вида "EURUSD" — сколько USD стоит 1 EUR.
+
+        Returns:
+            float | None: Курс пары или None, если одной из валют нет в таблице.
+        """
+        return cross_rate(self.quotes, pair)
+
+    async def apply(self, seq: int, timestamp: int, quotes: dict[str, float]):
+        """
+        Применяет новое обновление курсов и оповещает подписчиков.
+
+        Args:
+            seq (int): Номер обновления.
+            timestamp (int): Время котировок.
+            quotes (dict[str, float]): Курсы валют относительно базовой.
+        """
+        tick = RateTick(
+            seq=seq, timestamp=timestamp, quotes=quotes, previous=self.quotes
+        )
+        self.quotes, self.seq, self.timestamp = quotes, seq, timestamp
+        for listener in self._listeners:
+            try:
+                await listener(tick)
+            except Exception:
+                logger.exception("rate listener %r failed", listener)
+
+
+class RateRefresher:
+    """
+    Фоновое обновление курсов валют для всех воркеров.
+
+    Раз в settings.RATES.INTERVAL секунд воркеры соревнуются за короткую
+    блокировку в Redis; победитель запрашивает курсы у внешнего API и
+    публикует их через брокер. Остальные воркеры получают то же обновление
+    из канала, поэтому внешний API вызывается один раз за период независимо
+    от количества воркеров и клиентов. Последнее обновление хранится в Redis,
+    чтобы новый воркер сразу получил актуальные курсы.
+    """
+
+    CHANNEL = "rates:tick"
+    LEADER_KEY = "rates:leader"
+    SNAPSHOT_KEY = "rates:snapshot"
+    SEQ_KEY = "rates:seq"
+
+    def __init__(self, board: RateBoard, broker: Broker, interval: int):
+        self.board = board
+        self.broker = broker
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+        broker.subscribe(self.CHANNEL, self._on_message)
+
+    async def start(self):
+        """Загружает последний снимок курсов и запускает фоновую задачу обновления."""
+        snapshot = await RedisClient.get_currency(self.SNAPSHOT_KEY)
+        if snapshot:
+            await self._on_message(snapshot)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Останавливает фоновую задачу обновления."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def refresh(self):
+        """Запрашивает курсы у внешнего API и публикует их всем воркерам."""
+        data = await get_exchange(source=self.board.source, currencies=None)
+        prefix = len(data["source"])
+        quotes = {code[prefix:]: rate for code, rate in data["quotes"].items()}
+        quotes[data["source"]] = 1.0
+        payload = json.dumps(
+            {
+                "seq": await RedisClient.incr(self.SEQ_KEY),
+                "timestamp": data["timestamp"],
+                "quotes": quotes,
+            }
+        )
+        await RedisClient.set_currency(self.SNAPSHOT_KEY, payload)
+        await self.broker.publish(self.CHANNEL, payload)
+
+    async def _run(self):
+        while True:
+            try:
+                if await RedisClient.acquire_lock(self.LEADER_KEY, self.interval):
+                    await self.refresh()
+            except Exception:
+                logger.exception("failed to refresh exchange rates")
+            await asyncio.sleep(self.interval)
+
+    async def _on_message(self, data: str):
+        payload = json.loads(data)
+        if payload["seq"] <= self.board.seq:
+            return
+        await self.board.apply(payload["seq"], payload["timestamp"], payload["quotes"])
+
+
+rate_board = RateBoard(settings.RATES.SOURCE)
+rate_refresher = RateRefresher(rate_board, broker, settings.RATES.INTERVAL)
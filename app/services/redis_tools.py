@@ -1,12 +1,453 @@
+import asyncio
+import contextlib
+import hashlib
 import json
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from urllib.parse import unquote, urlsplit
 
+from fastapi import Request, Response, WebSocket
+from fastapi.responses import JSONResponse
 from fastapi_cache import FastAPICache
 from fastapi_cache.backends.redis import RedisBackend
-from fastapi_limiter import FastAPILimiter
+from fastapi_cache.coder import Coder
+from fastapi_limiter import http_default_callback, ws_default_callback
 from redis import asyncio as aioredis
+from redis.asyncio.cluster import ClusterNode, RedisCluster
+from redis.asyncio.sentinel import Sentinel
+from redis.client import NEVER_DECODE
 
 from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.tracing import CLIENT, tracer
 from app.services.httpclientsession import http_client
+from app.utils import codec
+
+
+def cache_key_builder(
+    func,
+    namespace: str = "",
+    request: Request | None = None,
+    response: Response | None = None,
+    args: tuple | None = None,
+    kwargs: dict | None = None,
+) -> str:
+    """
+    Ключ кеша fastapi-cache с именем функции-эндпоинта.
+
+    В отличие от ключа по умолчанию (только хеш аргументов), имя функции
+    позволяет считать попадания в кеш по каждому эндпоинту отдельно.
+    """
+    digest = hashlib.md5(
+        f"{func.__module__}:{func.__name__}:{args}:{kwargs}".encode()
+    ).hexdigest()
+    return f"{FastAPICache.get_prefix()}:{namespace}{func.__name__}:{digest}"
+
+
+class TracedRedis(aioredis.Redis):
+    """Клиент Redis, добавляющий спан на каждую команду внутри трассы запроса."""
+
+    async def execute_command(self, *args, **options):
+        with tracer.span(f"redis {args[0]}", CLIENT, {"db.system": "redis"}):
+            return await super().execute_command(*args, **options)
+
+
+class TracedRedisCluster(RedisCluster):
+    """Клиент Redis Cluster, добавляющий спан на каждую команду внутри трассы запроса."""
+
+    async def execute_command(self, *args, **options):
+        with tracer.span(f"redis {args[0]}", CLIENT, {"db.system": "redis"}):
+            return await super().execute_command(*args, **options)
+
+
+def _nodes(netloc: str) -> tuple[str | None, list[tuple[str, int]]]:
+    """Пароль и список узлов host:port из адреса вида [:пароль@]host:port,host:port."""
+    password = None
+    if "@" in netloc:
+        credentials, netloc = netloc.rsplit("@", 1)
+        password = unquote(credentials.partition(":")[2]) or None
+    nodes = []
+    for node in netloc.split(","):
+        host, _, port = node.rpartition(":")
+        nodes.append((host, int(port)))
+    return password, nodes
+
+
+def connect(url: str, pubsub: bool = False) -> aioredis.Redis | RedisCluster:
+    """
+    Клиент Redis по адресу хранилища с настройками пула из settings.REDIS.
+
+    Поддерживаемые адреса:
+    - redis://, rediss://, unix:// — отдельный сервер (пул с ожиданием свободного соединения);
+    - redis+sentinel://[:пароль@]host:port,host:port/имя-master[/db] — мастер, найденный через Sentinel;
+    - redis+cluster://[:пароль@]host:port,host:port — Redis Cluster.
+
+    Args:
+        url (str): Адрес хранилища.
+        pubsub (bool): Клиент для подписок: без таймаута ответа, иначе
+            ожидающая сообщений подписка обрывалась бы по таймауту.
+
+    Returns:
+        Redis | RedisCluster: Клиент; соединения открываются при первой команде.
+
+    Raises:
+        ValueError: Redis Cluster указан для pub/sub.
+    """
+    options = {
+        "encoding": "utf8",
+        "decode_responses": True,
+        "max_connections": settings.REDIS.POOL,
+        "socket_timeout": None if pubsub else settings.REDIS.TIMEOUT,
+        "socket_connect_timeout": settings.REDIS.CONNECT,
+    }
+    parts = urlsplit(url)
+    if parts.scheme == "redis+cluster":
+        if pubsub:
+            raise ValueError("Redis Cluster is not supported for pub/sub")
+        password, nodes = _nodes(parts.netloc)
+        return TracedRedisCluster(
+            startup_nodes=[ClusterNode(host, port) for host, port in nodes],
+            password=password,
+            **options,
+        )
+    if parts.scheme == "redis+sentinel":
+        password, nodes = _nodes(parts.netloc)
+        service, _, db = parts.path.strip("/").partition("/")
+        sentinel = Sentinel(
+            nodes,
+            sentinel_kwargs={
+                "password": password,
+                "socket_timeout": settings.REDIS.TIMEOUT,
+                "socket_connect_timeout": settings.REDIS.CONNECT,
+            },
+        )
+        return sentinel.master_for(
+            service,
+            redis_class=TracedRedis,
+            db=int(db or 0),
+            password=password,
+            **options,
+        )
+    pool = aioredis.BlockingConnectionPool.from_url(
+        url, timeout=settings.REDIS.WAIT, **options
+    )
+    return TracedRedis(connection_pool=pool)
+
+
+class RedisBatch:
+    """
+    Пакет команд Redis одного запроса.
+
+    Чтения ставятся в очередь и уходят в Redis при первом ожидании результата
+    любого из них: одним конвейером на каждый сервер, конвейеры разных
+    серверов — одновременно. Поэтому чтения, заранее объявленные через
+    prefetch() или запущенные одновременно, стоят одного обращения к Redis.
+    Прочитанные значения запоминаются до конца запроса: повторное чтение того
+    же ключа не обращается к Redis. GET читает байты без декодирования, текст
+    получают через get(raw=False). Отложенные записи (defer()) отправляются
+    при закрытии пакета, после отправки ответа.
+
+    Attributes:
+        round_trips (int): Количество обращений к Redis через пакет.
+    """
+
+    def __init__(self, stores: dict[str, aioredis.Redis | RedisCluster]):
+        self._stores = stores
+        self._results: dict[tuple[str, str, str], asyncio.Future] = {}
+        self._queued: list[tuple[str, str, str]] = []
+        self._writes: list[tuple] = []
+        self.round_trips = 0
+
+    def _queue(self, item: tuple[str, str, str]) -> asyncio.Future:
+        future = self._results.get(item)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._results[item] = future
+            self._queued.append(item)
+        return future
+
+    def prefetch(self, *keys: str, store: str = "data"):
+        """Ставит чтение ключей в очередь, не дожидаясь результата."""
+        for key in keys:
+            self._queue((store, "GET", key))
+
+    async def _read(self, *items: tuple[str, str, str]) -> list:
+        futures = [self._queue(item) for item in items]
+        if any(item in self._queued for item in items):
+            await self.execute()
+        return [await future for future in futures]
+
+    async def get(self, key: str, store: str = "data", raw: bool = False):
+        """Значение ключа (GET) вместе со всеми чтениями в очереди; raw — байты без декодирования."""
+        (value,) = await self._read((store, "GET", key))
+        if not raw and isinstance(value, bytes):
+            return value.decode()
+        return value
+
+    async def get_with_ttl(
+        self, key: str, store: str = "cache"
+    ) -> tuple[int, bytes | None]:
+        """Оставшееся время жизни и значение ключа (байты) вместе со всеми чтениями в очереди."""
+        ttl, value = await self._read((store, "TTL", key), (store, "GET", key))
+        if isinstance(value, str):
+            value = value.encode()
+        return ttl, value
+
+    def remember(self, key: str, value, expiration=None, store: str = "data"):
+        """Запоминает записанное значение для последующих чтений в запросе."""
+        for command, result in (("GET", value), ("TTL", expiration or -1)):
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(result)
+            self._results[(store, command, key)] = future
+
+    def defer(self, key: str, value, expiration=None, store: str = "cache"):
+        """Откладывает запись до закрытия пакета."""
+        self.remember(key, value, expiration, store)
+        self._writes.append((store, key, value, expiration))
+
+    def _group(self, items: list[tuple]) -> dict[int, list]:
+        """Разбивает команды по клиентам: хранилища с общим клиентом идут одним конвейером."""
+        groups: dict[int, list] = {}
+        for item in items:
+            groups.setdefault(id(self._stores[item[0]]), []).append(item)
+        return groups
+
+    async def _send(self, store: str, commands: list[tuple]) -> list:
+        pipe = self._stores[store].pipeline(transaction=False)
+        for command in commands:
+            if command[0] == "GET":
+                pipe.execute_command(*command, **{NEVER_DECODE: True})
+            else:
+                pipe.execute_command(*command)
+        with tracer.span(
+            "redis pipeline",
+            CLIENT,
+            {"db.system": "redis", "db.redis.commands": len(commands)},
+        ):
+            return await pipe.execute()
+
+    async def _send_all(self, groups: dict[int, list]) -> list:
+        self.round_trips += 1
+        return await asyncio.gather(
+            *(
+                self._send(items[0][0], [item[1:] for item in items])
+                for items in groups.values()
+            ),
+            return_exceptions=True,
+        )
+
+    async def execute(self):
+        """Отправляет чтения из очереди (по конвейеру на сервер)."""
+        queued, self._queued = self._queued, []
+        if not queued:
+            return
+        groups = self._group(queued)
+        error = None
+        for items, results in zip(groups.values(), await self._send_all(groups)):
+            if isinstance(results, BaseException):
+                error = results
+                for item in items:
+                    future = self._results.pop(item)
+                    future.set_exception(results)
+                    # Ошибку получит ожидающий результат; заранее объявленные,
+                    # но не прочитанные ключи не должны засорять лог.
+                    future.exception()
+                continue
+            for item, result in zip(items, results):
+                self._results[item].set_result(result)
+        if error is not None:
+            raise error
+
+    async def close(self):
+        """Отправляет отложенные записи (по конвейеру на сервер)."""
+        writes, self._writes = self._writes, []
+        if not writes:
+            return
+        commands = []
+        for store, key, value, expiration in writes:
+            command = (store, "SET", key, value)
+            if expiration:
+                command += ("EX", expiration)
+            commands.append(command)
+        for result in await self._send_all(self._group(commands)):
+            if isinstance(result, BaseException):
+                raise result
+
+
+_batch: ContextVar[RedisBatch | None] = ContextVar("redis_batch", default=None)
+
+
+class Decoded(bytes):
+    """Закодированное значение из Redis вместе с результатом его декодирования (value)."""
+
+    def __new__(cls, data: bytes, value):
+        obj = super().__new__(cls, data)
+        obj.value = value
+        return obj
+
+
+class HotCache:
+    """
+    Локальный уровень кеша воркера: декодированные значения последних прочитанных ключей.
+
+    Значение из Redis декодируется один раз и дальше отдается из памяти без
+    обращения к Redis, пока не истечет срок ключа в Redis или ttl секунд
+    локального хранения. Объем ограничен суммарным размером закодированных
+    значений (limit байт), при превышении вытесняются давно не читавшиеся ключи.
+    Декодированные значения общие для всех запросов, изменять их нельзя.
+
+    Attributes:
+        limit (int): Объем в байтах; 0 — локальный уровень выключен.
+        ttl (float): Максимальное время локального хранения в секундах.
+    """
+
+    def __init__(self, limit: int, ttl: float):
+        self.limit = limit
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, float, Decoded]] = OrderedDict()
+        self._size = 0
+
+    def get(self, key: str) -> tuple[int, Decoded] | None:
+        """
+        Значение ключа из памяти.
+
+        Returns:
+            tuple[int, Decoded] | None: Оставшееся время жизни ключа в Redis в
+                секундах и значение или None, если ключа нет или он устарел.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        now = time.monotonic()
+        expires, deadline, value = entry
+        if expires <= now:
+            self.discard(key)
+            return None
+        self._entries.move_to_end(key)
+        return int(deadline - now), value
+
+    def put(self, key: str, value: Decoded, ttl: int = -1):
+        """
+        Сохраняет значение.
+
+        Args:
+            key (str): Ключ.
+            value (Decoded): Значение.
+            ttl (int): Оставшееся время жизни ключа в Redis в секундах (-1 — без срока).
+        """
+        if len(value) > self.limit:
+            return
+        self.discard(key)
+        now = time.monotonic()
+        deadline = now + (ttl if ttl >= 0 else self.ttl)
+        self._entries[key] = (min(deadline, now + self.ttl), deadline, value)
+        self._size += len(value)
+        while self._size > self.limit:
+            _, (_, _, evicted) = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+    def discard(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry[2])
+
+
+hot_cache = HotCache(settings.CACHE.HOT, settings.CACHE.LOCAL)
+
+
+class BinaryCoder(Coder):
+    """
+    Кодировщик fastapi-cache: msgpack со сжатием больших значений (app.utils.codec).
+
+    Значения, отданные локальным уровнем кеша (Decoded), уже декодированы.
+    """
+
+    @classmethod
+    def encode(cls, value) -> bytes:
+        if isinstance(value, JSONResponse):
+            value = json.loads(value.body)
+        return codec.encode(value, settings.CACHE.COMPRESS, settings.CACHE.LEVEL)
+
+    @classmethod
+    def decode(cls, value):
+        if isinstance(value, Decoded):
+            return value.value
+        return codec.decode(value)
+
+
+class MeteredRedisBackend(RedisBackend):
+    """
+    Бэкенд fastapi-cache, считающий попадания и промахи по эндпоинтам.
+
+    Значения читаются байтами и после декодирования попадают в локальный
+    уровень кеша (hot_cache), повторное чтение которого не обращается к Redis.
+    Внутри пакета запроса (RedisClient.batch) чтение идет вместе с другими
+    чтениями пакета, а запись откладывается до отправки ответа.
+    """
+
+    async def get_with_ttl(self, key: str):
+        cached = hot_cache.get(key)
+        if cached is not None:
+            ttl, value = cached
+        else:
+            batch = _batch.get()
+            if batch is None:
+                pipe = self.redis.pipeline(transaction=False)
+                pipe.ttl(key)
+                pipe.execute_command("GET", key, **{NEVER_DECODE: True})
+                ttl, value = await pipe.execute()
+            else:
+                ttl, value = await batch.get_with_ttl(key)
+            if value is not None:
+                value = Decoded(value, codec.decode(value))
+                hot_cache.put(key, value, ttl)
+        family = key.split(":")[1]
+        metrics.inc(
+            "cache_requests_total", (family, "miss" if value is None else "hit")
+        )
+        return ttl, value
+
+    async def set(self, key: str, value: str, expire: int | None = None):
+        batch = _batch.get()
+        if batch is None:
+            return await super().set(key, value, expire)
+        batch.defer(key, value, expire)
+
+
+def _route(scope: dict) -> str:
+    route = scope.get("route")
+    return route.path if route is not None else "unmatched"
+
+
+async def http_limit_callback(request: Request, response: Response, pexpire: int):
+    """Считает отказ ограничителя частоты запросов и отвечает 429."""
+    metrics.inc("rate_limit_rejections_total", (_route(request.scope),))
+    return await http_default_callback(request, response, pexpire)
+
+
+async def ws_limit_callback(ws: WebSocket, pexpire: int):
+    """Считает отказ ограничителя частоты сообщений WebSocket."""
+    metrics.inc("rate_limit_rejections_total", (_route(ws.scope),))
+    return await ws_default_callback(ws, pexpire)
+
+
+def _stores() -> dict[str, aioredis.Redis | RedisCluster]:
+    """Клиенты хранилищ; хранилища с одинаковым адресом делят один клиент."""
+    urls = {
+        "data": settings.REDIS.URL,
+        "cache": settings.REDIS.CACHE,
+        "limiter": settings.REDIS.LIMITER,
+        "pubsub": settings.REDIS.PUBSUB,
+    }
+    clients: dict[str, aioredis.Redis | RedisCluster] = {}
+    stores = {}
+    for store, url in urls.items():
+        url = url or settings.REDIS.URL
+        if url not in clients:
+            clients[url] = connect(url)
+        stores[store] = clients[url]
+    return stores
 
 
 class RedisClient:
@@ -14,16 +455,25 @@ class RedisClient:
     Клиент для работы с Redis, обеспечивающий кеширование и ограничение частоты запросов.
 
     Данный класс использует библиотеку aioredis для асинхронной работы с Redis.
-    Предоставляет методы для инициализации кеша и ограничителя частоты запросов в FastAPI,
-    а также для установки и получения значений по ключам, специфичным для функционала валют.
+    Предоставляет методы для инициализации кеша в FastAPI, сверки счетчиков ограничителя
+    частоты запросов (см. app.services.limiter), а также для установки и получения значений
+    по ключам, специфичным для функционала валют. Чтения одного запроса объединяются в
+    конвейер через пакет (batch, RedisBatchMiddleware).
+
+    Данные разделены на хранилища с отдельными адресами (settings.REDIS): data —
+    данные приложения, cache — кеш ответов, limiter — ведра ограничителя, pubsub —
+    обмен сообщениями. Поэтому вытеснение ключей кеша при нехватке памяти не
+    затрагивает состояние ограничителя, а кеш можно вынести в Redis Cluster.
 
     Attributes:
-        __redis_connect (Redis): Подключение к Redis.
+        __stores (dict[str, Redis | RedisCluster]): Клиенты хранилищ.
+        __redis_connect (Redis): Клиент хранилища data.
+        __subscriber (Redis): Клиент для подписок pub/sub (без таймаута ответа).
     """
 
-    __redis_connect = aioredis.from_url(
-        "redis://redis:6379", encoding="utf8", decode_responses=True
-    )
+    __stores = _stores()
+    __redis_connect = __stores["data"]
+    __subscriber = connect(settings.REDIS.PUBSUB or settings.REDIS.URL, pubsub=True)
 
     @classmethod
     async def fastapi_cache_init(cls):
@@ -34,19 +484,12 @@ class RedisClient:
             FastAPICache: Экземпляр кеша для FastAPI.
         """
         return FastAPICache.init(
-            RedisBackend(cls.__redis_connect), prefix="fastapi-cache"
+            MeteredRedisBackend(cls.__stores["cache"]),
+            prefix="fastapi-cache",
+            coder=BinaryCoder,
+            key_builder=cache_key_builder,
         )
 
-    @classmethod
-    async def fastapi_limiter_init(cls):
-        """
-        Инициализация ограничителя частоты запросов для FastAPI с использованием Redis.
-
-        Returns:
-            FastAPILimiter: Экземпляр ограничителя для FastAPI.
-        """
-        return await FastAPILimiter.init(cls.__redis_connect)
-
     @classmethod
     async def set_currency(cls, key, value, expiration=None):
         """
@@ -58,19 +501,223 @@ class RedisClient:
             expiration (int, optional): Время жизни ключа в секундах.
         """
         await cls.__redis_connect.set(key, value, ex=expiration)
+        hot_cache.discard(key)
+        batch = _batch.get()
+        if batch is not None:
+            batch.remember(key, value, expiration)
 
     @classmethod
-    async def get_currency(cls, key):
+    async def get_currency(cls, key, raw=False):
         """
         Получение значения по ключу из Redis.
 
+        Попадания и промахи считаются в метриках по семейству ключа
+        (часть до первого двоеточия). Внутри пакета запроса (batch) чтение
+        уходит одним конвейером с остальными чтениями пакета.
+
         Args:
             key (str): Ключ для получения значения.
+            raw (bool): Вернуть байты без декодирования (значения app.utils.codec).
 
         Returns:
             str: Значение, связанное с ключом, или None, если ключ не найден.
         """
-        return await cls.__redis_connect.get(key)
+        batch = _batch.get()
+        if batch is not None:
+            value = await batch.get(key, raw=raw)
+        elif raw:
+            value = await cls.__redis_connect.execute_command(
+                "GET", key, **{NEVER_DECODE: True}
+            )
+        else:
+            value = await cls.__redis_connect.get(key)
+        metrics.inc(
+            "cache_requests_total",
+            (key.split(":")[0], "miss" if value is None else "hit"),
+        )
+        return value
+
+    @classmethod
+    async def get_currencies(cls):
+        """
+        Список валют из локального уровня кеша или Redis.
+
+        Значение декодируется один раз и дальше берется из памяти воркера
+        (hot_cache) не дольше settings.CACHE.LOCAL секунд.
+
+        Returns:
+            dict[str, str]: Коды валют и названия (не изменять) или None, если списка нет.
+        """
+        cached = hot_cache.get("currencies")
+        if cached is not None:
+            metrics.inc("cache_requests_total", ("currencies", "hit"))
+            return cached[1].value
+        data = await cls.get_currency("currencies", raw=True)
+        if data is None:
+            return None
+        value = Decoded(data, codec.decode(data))
+        hot_cache.put("currencies", value)
+        return value.value
+
+    @classmethod
+    async def acquire_lock(cls, key, expiration):
+        """
+        Попытка захватить блокировку с ограниченным временем жизни.
+
+        Блокировка захватывается только если ключ отсутствует (SET NX EX),
+        поэтому из всех воркеров ее получает ровно один.
+
+        Args:
+            key (str): Ключ блокировки.
+            expiration (int): Время жизни блокировки в секундах.
+
+        Returns:
+            bool: True, если блокировка захвачена.
+        """
+        return bool(await cls.__redis_connect.set(key, "1", ex=expiration, nx=True))
+
+    @classmethod
+    async def incr(cls, key):
+        """
+        Атомарное увеличение счетчика в Redis на единицу.
+
+        Args:
+            key (str): Ключ счетчика.
+
+        Returns:
+            int: Новое значение счетчика.
+        """
+        return await cls.__redis_connect.incr(key)
+
+    @classmethod
+    async def publish(cls, channel, message):
+        """
+        Публикация сообщения в канал Redis pub/sub.
+
+        Args:
+            channel (str): Имя канала.
+            message (str): Сообщение для публикации.
+
+        Returns:
+            int: Количество подписчиков, получивших сообщение.
+        """
+        return await cls.__stores["pubsub"].publish(channel, message)
+
+    @classmethod
+    @contextlib.asynccontextmanager
+    async def batch(cls):
+        """
+        Пакет команд Redis на время блока (обычно — один запрос).
+
+        Внутри блока get_currency и кеш fastapi-cache читают через пакет, а
+        запись кеша откладывается до выхода из блока.
+
+        Yields:
+            RedisBatch: Пакет команд.
+        """
+        batch = RedisBatch(cls.__stores)
+        token = _batch.set(batch)
+        try:
+            yield batch
+        finally:
+            _batch.reset(token)
+            await batch.close()
+
+    @staticmethod
+    def prefetch(*keys):
+        """
+        Объявляет ключи, которые понадобятся запросу.
+
+        Чтение ставится в очередь пакета запроса и уйдет в Redis вместе с
+        первым чтением, результат которого ожидается. Ключи из локального
+        уровня кеша не читаются. Вне пакета ничего не делает.
+
+        Args:
+            *keys (str): Ключи для чтения.
+        """
+        batch = _batch.get()
+        if batch is not None:
+            batch.prefetch(*(key for key in keys if hot_cache.get(key) is None))
+
+    @classmethod
+    def pipeline(cls, transaction=True, store="data"):
+        """
+        Создание конвейера команд Redis.
+
+        Args:
+            transaction (bool): Выполнять ли команды конвейера в MULTI/EXEC.
+            store (str): Хранилище: data, cache, limiter или pubsub.
+
+        Returns:
+            Pipeline: Конвейер команд.
+
+        Raises:
+            ValueError: Транзакция запрошена для хранилища в Redis Cluster, где
+                конвейер не поддерживает MULTI/EXEC.
+        """
+        client = cls.__stores[store]
+        if isinstance(client, RedisCluster):
+            if transaction:
+                raise ValueError("Redis Cluster pipelines do not support transactions")
+            return client.pipeline()
+        return client.pipeline(transaction=transaction)
+
+    @classmethod
+    def is_cluster(cls, store="data"):
+        """
+        Находится ли хранилище в Redis Cluster.
+
+        Args:
+            store (str): Хранилище: data, cache, limiter или pubsub.
+
+        Returns:
+            bool: True для Redis Cluster.
+        """
+        return isinstance(cls.__stores[store], RedisCluster)
+
+    @classmethod
+    async def register_script(cls, script, store="limiter"):
+        """
+        Регистрация Lua-скрипта, вызываемого по SHA, с загрузкой в Redis.
+
+        Скрипт загружается сразу (в Redis Cluster — на все primary-узлы):
+        конвейер Redis Cluster, в отличие от обычного, не загружает скрипты
+        перед выполнением, и EVALSHA в нем завершилась бы ошибкой NOSCRIPT.
+
+        Args:
+            script (str): Текст скрипта.
+            store (str): Хранилище, в котором выполняется скрипт.
+
+        Returns:
+            AsyncScript: Скрипт; вызывается напрямую или с client=конвейер того же хранилища.
+        """
+        client = cls.__stores[store]
+        registered = client.register_script(script)
+        await client.script_load(script)
+        return registered
+
+    @classmethod
+    def pubsub(cls):
+        """
+        Создание объекта подписки Redis pub/sub.
+
+        Подписка занимает отдельное соединение из пула на все время своего существования.
+
+        Returns:
+            PubSub: Объект подписки на каналы.
+        """
+        return cls.__subscriber.pubsub(ignore_subscribe_messages=True)
+
+    @classmethod
+    async def close(cls):
+        """Закрытие соединений со всеми хранилищами."""
+        clients = {id(client): client for client in cls.__stores.values()}
+        clients[id(cls.__subscriber)] = cls.__subscriber
+        for client in clients.values():
+            if isinstance(client, RedisCluster):
+                await client.close()
+            else:
+                await client.close(close_connection_pool=True)
 
     @classmethod
     async def __cache_currencies(cls, currencies):
@@ -81,7 +728,9 @@ class RedisClient:
             currencies (dict): Словарь кодов валют и соответствующих стран.
         """
 
-        currencies_data = json.dumps(currencies)
+        currencies_data = codec.encode(
+            currencies, settings.CACHE.COMPRESS, settings.CACHE.LEVEL
+        )
         # Кешируем на 30 дней
         await cls.set_currency("currencies", currencies_data, expiration=2592000)
 
@@ -94,10 +743,9 @@ class RedisClient:
             list[str]: Список кодов валют, если они были кешированы, иначе None.
         """
 
-        cached = await cls.get_currency("currencies")
+        cached = await cls.get_currencies()
         if cached:
-            names = json.loads(cached)
-            return [code for code in names]
+            return [code for code in cached]
         return None
 
     @classmethod
@@ -120,3 +768,35 @@ class RedisClient:
             cache = {code: country for code, country in data["currencies"].items()}
             await cls.__cache_currencies(cache)
             return cache
+
+
+def prefetch(*keys):
+    """
+    Зависимость FastAPI, объявляющая ключи Redis, которые прочитает маршрут.
+
+    Ставится рядом с декораторами, читающими Redis (например, check_currencies),
+    чтобы их чтение ушло одним конвейером с чтением кеша fastapi-cache.
+    """
+
+    async def dependency():
+        RedisClient.prefetch(*keys)
+
+    return dependency
+
+
+class RedisBatchMiddleware:
+    """
+    ASGI-middleware, открывающее пакет команд Redis (RedisClient.batch) на каждый HTTP-запрос.
+
+    Отложенные записи отправляются после ответа клиенту.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        async with RedisClient.batch():
+            await self.app(scope, receive, send)
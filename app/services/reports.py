@@ -0,0 +1,239 @@
+import asyncio
+import contextlib
+import heapq
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from operator import itemgetter
+
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+
+from app.api.models import Balance, CurrencyRate, HoldingTotal, User, UserTotal
+from app.core import sessionmanager
+from app.core.config import settings
+from app.services.rates import RateBoard, rate_board
+from app.services.redis_tools import RedisClient
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CurrencyHoldings:
+    """
+    Сводка балансов в одной валюте.
+
+    Attributes:
+        currency (str): Код валюты.
+        total (Decimal): Сумма всех балансов в этой валюте.
+        holders (int): Количество балансов.
+        value (Decimal | None): Оценка суммы в базовой валюте, если курс известен.
+    """
+
+    currency: str
+    total: Decimal
+    holders: int
+    value: Decimal | None
+
+
+class HoldingsReport:
+    """
+    Агрегаты по балансам для админской панели.
+
+    Стоимость отчета не зависит от количества пользователей:
+    - holding_totals — сумма и количество балансов по валютам, поддерживается
+      триггером на balances;
+    - currency_rates — курсы валют в базовой валюте, раз в settings.RATES.REPORT
+      секунд переносятся из RateBoard (обновление выполняет один воркер,
+      получивший блокировку в Redis);
+    - user_totals — оценка балансов каждого пользователя по опорным курсам,
+      поддерживается триггерами; крупнейшие пользователи оцениваются при чтении
+      по текущим курсам RateBoard, читая только первые строки user_totals
+      (см. top_users).
+
+    Attributes:
+        board (RateBoard): Таблица актуальных курсов.
+        interval (int): Период обновления в секундах.
+    """
+
+    LEADER_KEY = "reports:leader"
+
+    def __init__(self, board: RateBoard, interval: int):
+        self.board = board
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        """Запускает фоновую задачу обновления курсов."""
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Останавливает фоновую задачу."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def refresh(self):
+        """
+        Сохраняет текущие курсы в currency_rates.
+
+        Опорный курс валюты записывается только при первом сохранении.
+        """
+        if not self.board.quotes:
+            return
+        now = datetime.utcnow()
+        rows = []
+        for code, quote in self.board.quotes.items():
+            if quote:
+                rate = 1 / Decimal(str(quote))
+                rows.append(
+                    {
+                        "currency": code,
+                        "rate": rate,
+                        "reference": rate,
+                        "updated_at": now,
+                    }
+                )
+        stmt = insert(CurrencyRate).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CurrencyRate.currency],
+            set_={"rate": stmt.excluded.rate, "updated_at": stmt.excluded.updated_at},
+        )
+        async with sessionmanager.session() as session:
+            await session.execute(stmt)
+            await session.commit()
+
+    async def _run(self):
+        while True:
+            try:
+                if await RedisClient.acquire_lock(self.LEADER_KEY, self.interval):
+                    await self.refresh()
+            except Exception:
+                logger.exception("failed to refresh holdings reports")
+            await asyncio.sleep(self.interval)
+
+    async def holdings(self) -> tuple[list[CurrencyHoldings], datetime | None]:
+        """
+        Сводка балансов по валютам с оценкой в базовой валюте.
+
+        Returns:
+            tuple[list[CurrencyHoldings], datetime | None]: Сводка по валютам,
+            отсортированная по убыванию оценки, и время курсов.
+        """
+        totals = (
+            select(
+                HoldingTotal.currency,
+                func.sum(HoldingTotal.total).label("total"),
+                func.sum(HoldingTotal.holders).label("holders"),
+            )
+            .group_by(HoldingTotal.currency)
+            .subquery()
+        )
+        stmt = (
+            select(
+                totals.c.currency,
+                totals.c.total,
+                totals.c.holders,
+                CurrencyRate.rate,
+                CurrencyRate.updated_at,
+            )
+            .outerjoin(CurrencyRate, CurrencyRate.currency == totals.c.currency)
+            .where(totals.c.holders > 0)
+        )
+        async with sessionmanager.session() as session:
+            rows = (await session.execute(stmt)).all()
+
+        holdings = [
+            CurrencyHoldings(
+                currency=row.currency,
+                total=row.total,
+                holders=row.holders,
+                value=(row.total * row.rate).quantize(Decimal("0.01"))
+                if row.rate is not None
+                else None,
+            )
+            for row in rows
+        ]
+        holdings.sort(key=lambda item: item.value or 0, reverse=True)
+        updated = max((row.updated_at for row in rows if row.updated_at), default=None)
+        return holdings, updated
+
+    async def top_users(self, limit: int = 20) -> list[tuple[str, Decimal]]:
+        """
+        Пользователи с наибольшей оценкой балансов в базовой валюте по текущим курсам.
+
+        Пользователи читаются страницами по убыванию user_totals.value — оценки
+        по опорным курсам, для каждого считается оценка по текущим курсам
+        RateBoard (или по currency_rates, если валюты нет в таблице воркера).
+        Оценка непрочитанного пользователя не больше его value, умноженного на
+        наибольшее отношение текущего курса к опорному, поэтому чтение
+        прекращается, как только limit-я оценка не меньше этой границы для
+        следующего пользователя. Результат точный, а читаются обычно только
+        первые страницы.
+
+        Args:
+            limit (int): Количество пользователей.
+
+        Returns:
+            list[tuple[str, Decimal]]: Имя пользователя и оценка.
+        """
+        async with sessionmanager.session() as session:
+            stmt = select(
+                CurrencyRate.currency, CurrencyRate.rate, CurrencyRate.reference
+            )
+            rows = (await session.execute(stmt)).all()
+            if not rows:
+                return []
+            quotes = self.board.quotes
+            rates = {
+                code: 1 / Decimal(str(quotes[code])) if quotes.get(code) else rate
+                for code, rate, _ in rows
+            }
+            drift = max(rates[code] / reference for code, _, reference in rows)
+
+            values: dict[int, Decimal] = {}
+            after = None
+            size = limit
+            while True:
+                stmt = select(UserTotal.user_id, UserTotal.value)
+                if after is not None:
+                    stmt = stmt.where(
+                        tuple_(UserTotal.value, UserTotal.user_id) < after
+                    )
+                stmt = stmt.order_by(
+                    UserTotal.value.desc(), UserTotal.user_id.desc()
+                ).limit(size)
+                page = (await session.execute(stmt)).all()
+                if page:
+                    stmt = select(
+                        Balance.user_id, Balance.currency, Balance.amount
+                    ).where(Balance.user_id.in_([user_id for user_id, _ in page]))
+                    for user_id, code, amount in await session.execute(stmt):
+                        if code in rates:
+                            value = amount * rates[code]
+                            values[user_id] = values.get(user_id, 0) + value
+                if len(page) < size:
+                    break
+                last_id, last_value = page[-1]
+                after = (last_value, last_id)
+                top = heapq.nlargest(limit, values.values())
+                if len(top) == limit and top[-1] >= last_value * drift:
+                    break
+                size *= 2
+
+            best = heapq.nlargest(limit, values.items(), key=itemgetter(1))
+            if not best:
+                return []
+            stmt = select(User.id, User.username).where(
+                User.id.in_([user_id for user_id, _ in best])
+            )
+            names = dict((await session.execute(stmt)).all())
+        return [
+            (names[user_id], value.quantize(Decimal("0.01"))) for user_id, value in best
+        ]
+
+
+holdings_report = HoldingsReport(rate_board, settings.RATES.REPORT)
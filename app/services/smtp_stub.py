@@ -0,0 +1,121 @@
+import argparse
+import asyncio
+import email
+from email.message import EmailMessage
+from email.policy import default
+
+
+class SMTPStub:
+    """
+    Локальная заглушка SMTP-сервера для тестов и разработки.
+
+    Понимает минимальный набор команд (EHLO/HELO, AUTH, MAIL, RCPT, DATA,
+    RSET, NOOP, QUIT), принимает любые учетные данные и складывает принятые
+    письма в список messages вместо реальной доставки. Работает без TLS,
+    поэтому воркер рассылки нужно запускать с EMAIL_TLS=false.
+
+    Attributes:
+        messages (list[EmailMessage]): Принятые письма.
+        connections (int): Количество принятых подключений.
+        reject (int): Сколько следующих писем отклонить временной ошибкой 451.
+
+    Пример использования:
+        async with SMTPStub() as stub:
+            pool = SMTPPool("127.0.0.1", stub.port, use_tls=False)
+            ...
+            assert len(stub.messages) == 1
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self.messages: list[EmailMessage] = []
+        self.connections = 0
+        self.reject = 0
+        self._server: asyncio.Server | None = None
+
+    async def start(self):
+        """Запускает сервер; при port=0 порт выбирается свободный."""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        """Останавливает сервер."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "SMTPStub":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Обслуживает одно SMTP-соединение."""
+        self.connections += 1
+
+        async def reply(line: str):
+            writer.write(f"{line}\r\n".encode())
+            await writer.drain()
+
+        await reply("220 localhost SMTP stub ready")
+        try:
+            while line := await reader.readline():
+                command = line.decode().strip()
+                verb = command.split(" ", 1)[0].upper()
+                if verb == "EHLO":
+                    await reply("250-localhost")
+                    await reply("250-AUTH PLAIN LOGIN")
+                    await reply("250 8BITMIME")
+                elif verb == "HELO":
+                    await reply("250 localhost")
+                elif verb == "AUTH":
+                    await reply("235 2.7.0 Authentication successful")
+                elif verb in ("MAIL", "RCPT", "RSET", "NOOP"):
+                    await reply("250 OK")
+                elif verb == "DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    data = []
+                    while (chunk := await reader.readline()) not in (b".\r\n", b""):
+                        data.append(chunk[1:] if chunk.startswith(b"..") else chunk)
+                    if self.reject:
+                        self.reject -= 1
+                        await reply("451 Temporary failure, try again later")
+                        continue
+                    self.messages.append(
+                        email.message_from_bytes(b"".join(data), policy=default)
+                    )
+                    await reply("250 OK: queued")
+                elif verb == "QUIT":
+                    await reply("221 Bye")
+                    break
+                else:
+                    await reply("502 Command not implemented")
+        finally:
+            writer.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Локальная заглушка SMTP-сервера.")
+    parser.add_argument("--host", default="127.0.0.1", help="Адрес для прослушивания")
+    parser.add_argument("--port", type=int, default=1025, help="Порт для прослушивания")
+    args = parser.parse_args()
+
+    stub = SMTPStub(host=args.host, port=args.port)
+    await stub.start()
+    print(f"SMTP stub listening on {stub.host}:{stub.port}")
+    try:
+        while True:
+            received = len(stub.messages)
+            await asyncio.sleep(1)
+            for message in stub.messages[received:]:
+                print(f"{message['To']}: {message['Subject']}")
+    finally:
+        await stub.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
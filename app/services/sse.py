@@ -0,0 +1,140 @@
+import asyncio
+import json
+from collections import deque
+from typing import AsyncIterator
+
+from app.core.config import settings
+from app.services.rates import RateBoard, RateTick, rate_board
+
+
+class RateEventHub:
+    """
+    Поток Server-Sent Events с курсами валют для HTTP-клиентов.
+
+    Каждое обновление RateBoard кодируется в SSE-событие один раз, и одни и те же
+    байты отдаются всем подписчикам. В событие попадают только валюты, курс
+    которых изменился относительно последнего опубликованного значения больше чем
+    на settings.RATES.THRESHOLD. Последние события хранятся в кольцевом буфере,
+    поэтому клиент, переподключившийся с заголовком Last-Event-ID, получает
+    пропущенные изменения, а если они уже вытеснены — полный снимок.
+
+    Подписчик не имеет собственной очереди и таймеров: все ожидают одно общее
+    событие asyncio.Event, которое будится обновлениями курсов и общим таймером
+    keep-alive, поэтому простаивающее подключение стоит только кадра генератора.
+
+    Формат данных событий:
+        event: snapshot — {"s": 12, "ts": 1712000000, "r": {"EUR": 0.92, ...}};
+        event: delta — {"s": 13, "ts": 1712000060, "r": {"EUR": 0.921}}.
+    Курсы указаны относительно базовой валюты settings.RATES.SOURCE.
+
+    Attributes:
+        board (RateBoard): Таблица актуальных курсов.
+        threshold (float): Минимальное относительное изменение курса для публикации.
+        keepalive (float): Период отправки комментариев keep-alive в секундах.
+    """
+
+    def __init__(
+        self,
+        board: RateBoard,
+        threshold: float,
+        history: int = 256,
+        keepalive: float = 15,
+    ):
+        self.board = board
+        self.threshold = threshold
+        self.keepalive = keepalive
+        self._events: deque[tuple[int, bytes]] = deque(maxlen=history)
+        self._published: dict[str, float] = {}
+        self._snapshot: tuple[int, bytes] | None = None
+        self._horizon = 0
+        self._wakeup = asyncio.Event()
+        self._ticker: asyncio.Task | None = None
+        board.subscribe(self.on_tick)
+
+    @staticmethod
+    def encode(seq: int, event: str, data: dict) -> bytes:
+        """Кодирует SSE-событие."""
+        payload = json.dumps(data, separators=(",", ":"))
+        return f"id: {seq}\nevent: {event}\ndata: {payload}\n\n".encode()
+
+    def snapshot(self) -> bytes:
+        """Событие с полным снимком опубликованных курсов, кешируется до следующего обновления."""
+        if self._snapshot is None or self._snapshot[0] != self.board.seq:
+            data = {
+                "s": self.board.seq,
+                "ts": self.board.timestamp,
+                "r": self._published,
+            }
+            self._snapshot = (
+                self.board.seq,
+                self.encode(self.board.seq, "snapshot", data),
+            )
+        return self._snapshot[1]
+
+    async def on_tick(self, tick: RateTick):
+        """Публикует изменившиеся курсы и будит всех подписчиков."""
+        changed = {}
+        for code, rate in tick.quotes.items():
+            last = self._published.get(code)
+            if last is None or abs(rate - last) >= self.threshold * last:
+                changed[code] = rate
+        self._published.update(changed)
+        if not changed:
+            return
+        data = {"s": tick.seq, "ts": tick.timestamp, "r": changed}
+        if len(self._events) == self._events.maxlen:
+            self._horizon = self._events[0][0]
+        self._events.append((tick.seq, self.encode(tick.seq, "delta", data)))
+        self._wake()
+
+    def _wake(self):
+        self._wakeup.set()
+        self._wakeup = asyncio.Event()
+
+    async def _keepalive(self):
+        while True:
+            await asyncio.sleep(self.keepalive)
+            self._wake()
+
+    def _since(self, seq: int) -> list[tuple[int, bytes]] | None:
+        """События после seq или None, если часть из них уже вытеснена из буфера."""
+        if seq < self._horizon or seq > self.board.seq:
+            return None
+        return [event for event in self._events if event[0] > seq]
+
+    async def stream(self, last_event_id: str | None = None) -> AsyncIterator[bytes]:
+        """
+        Генератор SSE-потока для одного клиента.
+
+        Args:
+            last_event_id (str | None): Значение заголовка Last-Event-ID при переподключении.
+
+        Yields:
+            bytes: Закодированные SSE-события и комментарии keep-alive.
+        """
+        yield b"retry: 5000\n\n"
+        seq = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+        missed = self._since(seq) if seq is not None else None
+        if missed is None:
+            if self.board.seq:
+                yield self.snapshot()
+            seq = self.board.seq
+            missed = []
+        for seq, event in missed:
+            yield event
+
+        if self._ticker is None:
+            self._ticker = asyncio.create_task(self._keepalive())
+        while True:
+            await self._wakeup.wait()
+            events = self._since(seq)
+            if events is None:
+                yield self.snapshot()
+                seq = self.board.seq
+            elif not events:
+                yield b": keepalive\n\n"
+            for seq, event in events or ():
+                yield event
+
+
+rate_events = RateEventHub(rate_board, settings.RATES.THRESHOLD)
@@ -0,0 +1,203 @@
+import asyncio
+import collections
+import contextlib
+import json
+import logging
+
+import aiohttp
+
+from app.core.config import settings
+from app.core.tracing import Span, Trace, Tracer, tracer
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "currency-exchange-api"
+
+
+def _attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+def _span(span: Span) -> dict:
+    data = {
+        "traceId": span.trace.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": span.kind,
+        "startTimeUnixNano": str(span.start),
+        "endTimeUnixNano": str(span.end),
+        "attributes": [_attribute(k, v) for k, v in span.attributes.items()],
+        "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+    }
+    if span.parent_id:
+        data["parentSpanId"] = span.parent_id
+    return data
+
+
+def to_otlp(traces: list[Trace]) -> dict:
+    """Трассы в формате OTLP JSON (ExportTraceServiceRequest)."""
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": [_attribute("service.name", SERVICE_NAME)]},
+                "scopeSpans": [
+                    {
+                        "scope": {"name": "app"},
+                        "spans": [
+                            _span(span) for trace in traces for span in trace.spans
+                        ],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+class TraceExporter:
+    """
+    Фоновая отправка сохраненных трасс.
+
+    Трассы, прошедшие выборку Tracer, кладутся в ограниченную очередь без
+    ожидания (при переполнении самые старые отбрасываются) и раз в interval
+    секунд пачкой уходят в файл OTLP JSON Lines (одна строка на пачку; такой
+    файл читает receiver otlpjsonfile коллектора OpenTelemetry) или в коллектор
+    по OTLP/HTTP. Запись в файл выполняется в потоке, чтобы не блокировать цикл
+    событий.
+
+    Attributes:
+        tracer (Tracer): Трассировщик, которому экспортер передается при запуске.
+        kind (str): "none", "file" или "otlp".
+        path (str): Файл для трасс.
+        endpoint (str): Адрес коллектора OTLP/HTTP.
+        interval (float): Период отправки в секундах.
+    """
+
+    def __init__(
+        self,
+        tracer: Tracer,
+        kind: str,
+        path: str,
+        endpoint: str,
+        interval: float = 1.0,
+        maxsize: int = 1000,
+    ):
+        self.tracer = tracer
+        self.kind = kind
+        self.path = path
+        self.endpoint = endpoint.rstrip("/") + "/v1/traces"
+        self.interval = interval
+        self._queue: collections.deque[Trace] = collections.deque(maxlen=maxsize)
+        self._task: asyncio.Task | None = None
+
+    def enqueue(self, trace: Trace):
+        """Ставит трассу в очередь отправки."""
+        self._queue.append(trace)
+
+    async def start(self):
+        """Включает трассировку и запускает фоновую отправку."""
+        if self.kind == "none":
+            return
+        self.tracer.exporter = self.enqueue
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Выключает трассировку и отправляет оставшиеся трассы."""
+        self.tracer.exporter = None
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+            with contextlib.suppress(Exception):
+                await self.export()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.export()
+            except Exception:
+                logger.exception("failed to export traces")
+
+    async def export(self):
+        """Отправляет накопленные трассы одной пачкой."""
+        traces = []
+        while self._queue:
+            traces.append(self._queue.popleft())
+        if not traces:
+            return
+        payload = to_otlp(traces)
+        if self.kind == "file":
+            await asyncio.to_thread(self._write, json.dumps(payload))
+        else:
+            async with aiohttp.ClientSession() as session:
+                async with session.post(self.endpoint, json=payload) as response:
+                    response.raise_for_status()
+
+    def _write(self, line: str):
+        with open(self.path, "a") as file:
+            file.write(line + "\n")
+
+
+class TracingMiddleware:
+    """
+    ASGI-middleware, открывающее трассу на каждый HTTP-запрос.
+
+    Продолжает трассу из заголовка traceparent, называет корневой спан по
+    шаблону маршрута и возвращает идентификатор трассы в заголовке X-Trace-Id,
+    чтобы медленный ответ можно было найти среди сохраненных трасс.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for key, value in scope["headers"]:
+            if key == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+        span, token = tracer.start_trace(
+            f"{scope['method']} {scope['path']}",
+            traceparent,
+            {"http.method": scope["method"], "http.target": scope["path"]},
+        )
+        trace_id = span.trace.trace_id.encode()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                span.attributes["http.status_code"] = message["status"]
+                if message["status"] >= 500:
+                    span.error = f"HTTP {message['status']}"
+                message.setdefault("headers", [])
+                message["headers"] = [*message["headers"], (b"x-trace-id", trace_id)]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            span.error = repr(e)
+            raise
+        finally:
+            route = scope.get("route")
+            if route is not None:
+                span.name = f"{scope['method']} {route.path}"
+                span.attributes["http.route"] = route.path
+            tracer.end_trace(span, token)
+
+
+trace_exporter = TraceExporter(
+    tracer, settings.TRACE.EXPORTER, settings.TRACE.PATH, settings.TRACE.ENDPOINT
+)
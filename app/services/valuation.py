@@ -0,0 +1,247 @@
+import heapq
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Callable, Iterable
+
+from sqlalchemy import Numeric, bindparam, func, select, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.types import String
+
+from app.api.models import Balance
+from app.services.rates import RateBoard, rate_board
+from app.utils.currencies import get_exchange
+
+CENT = Decimal("0.01")
+
+
+@dataclass
+class Holding:
+    """
+    Оценка суммы в одной валюте.
+
+    Attributes:
+        currency (str): Код валюты.
+        amount (Decimal): Сумма в этой валюте.
+        rate (Decimal): Сколько единиц целевой валюты стоит единица этой валюты.
+        value (Decimal): Оценка суммы в целевой валюте.
+    """
+
+    currency: str
+    amount: Decimal
+    rate: Decimal
+    value: Decimal
+
+
+@dataclass
+class Valuation:
+    """
+    Оценка набора балансов в целевой валюте.
+
+    Attributes:
+        currency (str): Целевая валюта.
+        total (Decimal): Суммарная оценка.
+        holdings (list[Holding]): Оценка по каждой валюте.
+    """
+
+    currency: str
+    total: Decimal = Decimal(0)
+    holdings: list[Holding] = field(default_factory=list)
+
+
+@dataclass
+class AumReport:
+    """
+    Отчет об активах всех пользователей.
+
+    Attributes:
+        totals (Valuation): Суммарная оценка активов по валютам.
+        users (int): Количество пользователей с балансами.
+        top (list[tuple[int, Decimal]]): Крупнейшие пользователи (user_id, оценка).
+    """
+
+    totals: Valuation
+    users: int = 0
+    top: list[tuple[int, Decimal]] = field(default_factory=list)
+
+
+class ValuationService:
+    """
+    Оценка балансов пользователей в любой валюте по общей таблице курсов.
+
+    Курсы берутся из RateBoard воркера; внешний API запрашивается только если
+    таблица еще пуста или в ней нет нужных валют. Все вычисления ведутся в Decimal:
+    балансы сначала суммируются по валютам (в SQL), затем каждая сумма один раз
+    умножается на курс своей валюты, поэтому стоимость оценки зависит от числа
+    валют, а не от числа балансов.
+
+    Attributes:
+        board (RateBoard): Таблица актуальных курсов.
+    """
+
+    def __init__(self, board: RateBoard):
+        self.board = board
+
+    async def rates(self, target: str, currencies: Iterable[str]) -> dict[str, Decimal]:
+        """
+        Курсы валют к целевой валюте.
+
+        Args:
+            target (str): Целевая валюта.
+            currencies (Iterable[str]): Коды оцениваемых валют.
+
+        Returns:
+            dict[str, Decimal]: Сколько единиц target стоит единица каждой валюты.
+        """
+        rates = {target: Decimal(1)}
+        missing = []
+        for code in set(currencies) - {target}:
+            rate = self.board.rate(f"{code}{target}")
+            if rate is None:
+                missing.append(code)
+            else:
+                rates[code] = Decimal(str(rate))
+        if missing:
+            exchange = await get_exchange(source=target, currencies=sorted(missing))
+            for pair, rate in exchange["quotes"].items():
+                if rate:
+                    rates[pair[3:]] = 1 / Decimal(str(rate))
+        return rates
+
+    def _valuate(
+        self, target: str, amounts: dict[str, Decimal], rates: dict[str, Decimal]
+    ) -> Valuation:
+        valuation = Valuation(currency=target)
+        for code in sorted(amounts):
+            if code not in rates:
+                continue
+            value = (amounts[code] * rates[code]).quantize(CENT)
+            valuation.holdings.append(Holding(code, amounts[code], rates[code], value))
+            valuation.total += value
+        return valuation
+
+    async def value_balances(
+        self, balances: Iterable[Balance], target: str
+    ) -> Valuation:
+        """
+        Оценивает уже загруженные балансы одного пользователя.
+
+        Args:
+            balances (Iterable[Balance]): Балансы пользователя.
+            target (str): Целевая валюта.
+
+        Returns:
+            Valuation: Оценка по валютам и итог.
+        """
+        amounts: dict[str, Decimal] = {}
+        for balance in balances:
+            amounts[balance.currency] = (
+                amounts.get(balance.currency, Decimal(0)) + balance.amount
+            )
+        return self._valuate(target, amounts, await self.rates(target, amounts))
+
+    async def value_users(
+        self, session: AsyncSession, user_ids: Iterable[int], target: str
+    ) -> dict[int, Valuation]:
+        """
+        Оценивает балансы набора пользователей одним запросом.
+
+        Args:
+            session (AsyncSession): Сессия базы данных.
+            user_ids (Iterable[int]): Идентификаторы пользователей.
+            target (str): Целевая валюта.
+
+        Returns:
+            dict[int, Valuation]: Оценка каждого пользователя, у которого есть балансы.
+        """
+        stmt = (
+            select(Balance.user_id, Balance.currency, func.sum(Balance.amount))
+            .where(Balance.user_id.in_(list(user_ids)))
+            .group_by(Balance.user_id, Balance.currency)
+        )
+        amounts: dict[int, dict[str, Decimal]] = {}
+        for user_id, currency, amount in await session.execute(stmt):
+            amounts.setdefault(user_id, {})[currency] = amount
+        rates = await self.rates(
+            target, {code for user in amounts.values() for code in user}
+        )
+        return {
+            user_id: self._valuate(target, user, rates)
+            for user_id, user in amounts.items()
+        }
+
+    async def value_all(
+        self,
+        session: AsyncSession,
+        target: str,
+        top: int = 10,
+        sink: Callable[[int, Decimal], None] | None = None,
+    ) -> AumReport:
+        """
+        Оценивает балансы всех пользователей для отчета об активах (AUM).
+
+        Курсы передаются в базу двумя массивами и соединяются с балансами через
+        unnest, так что умножение и суммирование выполняются в numeric за один
+        проход по таблице balances. GROUPING SETS в том же проходе считает и итог
+        по каждой валюте, и итог по каждому пользователю; оценки пользователей
+        читаются потоком и в памяти не накапливаются.
+
+        Args:
+            session (AsyncSession): Сессия базы данных.
+            target (str): Целевая валюта.
+            top (int): Сколько крупнейших пользователей включить в отчет.
+            sink (Callable[[int, Decimal], None] | None): Вызывается для оценки
+                каждого пользователя, например для записи в файл.
+
+        Returns:
+            AumReport: Итоги по валютам, число пользователей и крупнейшие из них.
+        """
+        codes = (await session.execute(select(Balance.currency).distinct())).scalars()
+        rates = await self.rates(target, list(codes))
+
+        rate_table = select(
+            func.unnest(bindparam("codes", type_=ARRAY(String))).label("code"),
+            func.unnest(bindparam("rates", type_=ARRAY(Numeric))).label("rate"),
+        ).subquery("rates")
+        stmt = (
+            select(
+                Balance.user_id,
+                Balance.currency,
+                func.sum(Balance.amount),
+                func.sum(Balance.amount * rate_table.c.rate),
+            )
+            .join(rate_table, rate_table.c.code == Balance.currency)
+            .group_by(
+                func.grouping_sets(tuple_(Balance.user_id), tuple_(Balance.currency))
+            )
+        )
+        result = await session.stream(
+            stmt.execution_options(yield_per=10000),
+            {"codes": list(rates), "rates": list(rates.values())},
+        )
+
+        report = AumReport(totals=Valuation(currency=target))
+        largest: list[tuple[Decimal, int]] = []
+        async for user_id, currency, amount, value in result:
+            value = value.quantize(CENT)
+            if user_id is None:
+                report.totals.holdings.append(
+                    Holding(currency, amount, rates[currency], value)
+                )
+                report.totals.total += value
+                continue
+            report.users += 1
+            if sink is not None:
+                sink(user_id, value)
+            if len(largest) < top:
+                heapq.heappush(largest, (value, user_id))
+            elif value > largest[0][0]:
+                heapq.heapreplace(largest, (value, user_id))
+        report.totals.holdings.sort(key=lambda holding: holding.currency)
+        report.top = [
+            (user_id, value) for value, user_id in sorted(largest, reverse=True)
+        ]
+        return report
+
+
+valuation_service = ValuationService(rate_board)
@@ -1,76 +1,270 @@
-from fastapi import Depends, HTTPException
+import asyncio
+import contextlib
+import json
+import logging
+import time
+
+from fastapi import Depends, HTTPException, status
 from fastapi.websockets import WebSocket, WebSocketDisconnect, WebSocketState
-from fastapi_limiter.depends import WebSocketRateLimiter
 
+from app.core.config import settings
 from app.core.database import get_db_session
+from app.core.metrics import metrics
+from app.core.tracing import tracer
+from app.services.broker import Broker, broker
+from app.services.limiter import WebSocketRateLimiter
+from app.services.rate_stream import rate_stream
 from app.utils.users import get_user_with_token
 
+logger = logging.getLogger(__name__)
+
+
+class Connection:
+    """
+    WebSocket соединение с ограниченной очередью отправки и собственной задачей-писателем.
+
+    Сообщения не отправляются в сокет напрямую, а кладутся в очередь без ожидания;
+    отдельная задача-писатель вычитывает очередь и пишет в сокет. Поэтому медленный
+    клиент не задерживает рассылку остальным. При переполнении очереди срабатывает
+    политика settings.WS.POLICY: "drop" закрывает соединение, "coalesce" отбрасывает
+    самое старое неотправленное сообщение.
+
+    Attributes:
+        user_id (int): Идентификатор пользователя.
+        websocket (WebSocket): Соединение пользователя.
+        sent (int): Количество отправленных сообщений.
+        dropped (int): Количество отброшенных из-за переполнения сообщений.
+        lag (float): Задержка между постановкой в очередь и отправкой последнего сообщения, в секундах.
+        max_lag (float): Максимальная наблюдавшаяся задержка, в секундах.
+    """
+
+    def __init__(
+        self,
+        user_id: int,
+        websocket: WebSocket,
+        maxsize: int = settings.WS.QUEUE,
+        policy: str = settings.WS.POLICY,
+    ):
+        self.user_id = user_id
+        self.websocket = websocket
+        self.policy = policy
+        self.sent = 0
+        self.dropped = 0
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self._queue: asyncio.Queue[tuple[dict, float]] = asyncio.Queue(maxsize)
+        self._writer: asyncio.Task | None = None
+
+    def start(self):
+        """Запускает задачу-писатель."""
+        self._writer = asyncio.create_task(self._write())
+
+    async def stop(self):
+        """Останавливает задачу-писатель, неотправленные сообщения отбрасываются."""
+        if self._writer is not None and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._writer
+        self._writer = None
+
+    @property
+    def queued(self) -> int:
+        """Количество сообщений, ожидающих отправки."""
+        return self._queue.qsize()
+
+    def push(self, frame: dict) -> bool:
+        """
+        Ставит готовый ASGI-фрейм в очередь отправки без ожидания.
+
+        Один и тот же объект фрейма разделяется всеми получателями рассылки.
+
+        Args:
+            frame (dict): Сообщение ASGI вида {"type": "websocket.send", "text": ...}.
+
+        Returns:
+            bool: False, если соединение закрывается из-за переполнения очереди.
+        """
+        if self._writer is None:
+            return False
+        item = (frame, time.monotonic())
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            metrics.inc("ws_dropped_messages_total")
+            if self.policy != "coalesce":
+                self._writer.cancel()
+                self._writer = None
+                asyncio.create_task(self._close(status.WS_1013_TRY_AGAIN_LATER))
+                return False
+            self._queue.get_nowait()
+            self._queue.put_nowait(item)
+        return True
+
+    async def _close(self, code: int):
+        with contextlib.suppress(Exception):
+            await self.websocket.close(code=code)
+
+    async def _write(self):
+        while True:
+            frame, enqueued = await self._queue.get()
+            try:
+                if self.websocket.application_state != WebSocketState.CONNECTED:
+                    return
+                await self.websocket.send(frame)
+            except Exception as e:
+                logger.warning("Error sending message: %s", e)
+                return
+            self.sent += 1
+            self.lag = time.monotonic() - enqueued
+            self.max_lag = max(self.max_lag, self.lag)
+            metrics.observe("ws_send_lag_seconds", (), self.lag)
+
+    def stats(self) -> dict:
+        """Метрики соединения: очередь, отправленные и отброшенные сообщения, задержка."""
+        return {
+            "user_id": self.user_id,
+            "queued": self.queued,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "lag": self.lag,
+            "max_lag": self.max_lag,
+        }
+
 
 class WebSocketManager:
     """
     Менеджер для управления активными WebSocket соединениями.
 
-    Отслеживает активные соединения и предоставляет методы для их управления,
+    Отслеживает активные соединения текущего воркера и предоставляет методы для их управления,
     включая подключение, отключение, отправку сообщений конкретному пользователю
     или всем подключенным пользователям.
+
+    Сообщения отправляются через брокер Redis pub/sub: каждый воркер получает все
+    сообщения и доставляет их только своим локальным соединениям. Поэтому пользователь
+    получает уведомление независимо от того, на какой воркер попал HTTP-запрос.
+    У одного пользователя может быть несколько одновременных соединений.
+
+    Доставка не ждет записи в сокеты: фрейм сообщения создается один раз и кладется
+    в очереди соединений (см. Connection), поэтому время рассылки не зависит
+    от самого медленного клиента.
     """
 
-    def __init__(self):
+    USER_CHANNEL = "ws:user"
+    BROADCAST_CHANNEL = "ws:all"
+
+    def __init__(self, broker: Broker):
         """
-        Инициализирует экземпляр WebSocketManager.
+        Инициализирует экземпляр WebSocketManager и регистрирует обработчики каналов брокера.
+
+        Args:
+            broker (Broker): Брокер сообщений между воркерами.
         """
-        self.active_websockets: dict[int, WebSocket] = {}
+        self.broker = broker
+        self.active_websockets: dict[int, set[Connection]] = {}
+        broker.subscribe(self.USER_CHANNEL, self._deliver_to_user)
+        broker.subscribe(self.BROADCAST_CHANNEL, self._deliver_to_all)
 
-    async def connect(self, user_id: int, websocket: WebSocket):
+    async def connect(self, user_id: int, websocket: WebSocket) -> Connection:
         """
         Принимает WebSocket соединение от пользователя.
 
         Args:
             user_id (int): Идентификатор пользователя.
             websocket (WebSocket): Экземпляр WebSocket соединения пользователя.
+
+        Returns:
+            Connection: Зарегистрированное соединение.
         """
         await websocket.accept()
 
-        self.active_websockets[user_id] = websocket
+        connection = Connection(user_id, websocket)
+        connection.start()
+        self.active_websockets.setdefault(user_id, set()).add(connection)
+        return connection
 
-    async def disconnect(self, user_id: int):
+    async def disconnect(self, connection: Connection):
         """
         Отключает WebSocket соединение пользователя.
 
         Args:
-            user_id (int): Идентификатор пользователя.
+            connection (Connection): Отключаемое соединение пользователя.
         """
-        self.active_websockets.pop(user_id, None)
+        await connection.stop()
+        sockets = self.active_websockets.get(connection.user_id)
+        if sockets is None:
+            return
+        sockets.discard(connection)
+        if not sockets:
+            del self.active_websockets[connection.user_id]
 
+    @tracer.traced("ws.send_to_user")
     async def send_to_user(self, user_id: int, message: str):
         """
-        Отправляет сообщение конкретному пользователю.
+        Отправляет сообщение конкретному пользователю на всех воркерах.
 
         Args:
             user_id (int): Идентификатор пользователя.
             message (str): Сообщение для отправки.
         """
-        if user_id in self.active_websockets:
-            await self.active_websockets[user_id].send_text(message)
+        await self.broker.publish(
+            self.USER_CHANNEL, json.dumps({"user_id": user_id, "message": message})
+        )
 
     async def send_to_all(self, message: str):
         """
-        Отправляет сообщение всем подключенным пользователям.
+        Отправляет сообщение всем подключенным пользователям на всех воркерах.
 
         Args:
             message (str): Сообщение для отправки.
         """
+        await self.broker.publish(self.BROADCAST_CHANNEL, message)
 
-        clients = self.active_websockets.values()
-        for ws in clients:
-            try:
-                if ws.client_state == WebSocketState.CONNECTED:
-                    await ws.send_text(message)
-            except Exception as e:
-                print(f"Error sending message: {e}")
+    @staticmethod
+    def frame(message: str) -> dict:
+        """Создает ASGI-фрейм текстового сообщения, общий для всех получателей."""
+        return {"type": "websocket.send", "text": message}
+
+    async def _deliver_to_user(self, data: str):
+        """Доставляет сообщение из канала USER_CHANNEL локальным соединениям пользователя."""
+        payload = json.loads(data)
+        frame = self.frame(payload["message"])
+        for connection in list(self.active_websockets.get(payload["user_id"], ())):
+            connection.push(frame)
+
+    async def _deliver_to_all(self, message: str):
+        """Доставляет сообщение из канала BROADCAST_CHANNEL всем локальным соединениям."""
+        frame = self.frame(message)
+        for connections in list(self.active_websockets.values()):
+            for connection in list(connections):
+                connection.push(frame)
+
+    def stats(self) -> list[dict]:
+        """
+        Метрики всех локальных соединений воркера.
+
+        Returns:
+            list[dict]: Метрики каждого соединения (см. Connection.stats).
+        """
+        return [
+            connection.stats()
+            for connections in self.active_websockets.values()
+            for connection in connections
+        ]
 
+    def collect(self):
+        """Количество соединений воркера и сообщений в их очередях для метрик."""
+        connections = [
+            connection
+            for connections in self.active_websockets.values()
+            for connection in connections
+        ]
+        yield "ws_connections", (), len(connections)
+        yield "ws_queued_messages", (), sum(c.queued for c in connections)
 
-ws_manager = WebSocketManager()
+
+ws_manager = WebSocketManager(broker)
+metrics.register(ws_manager.collect)
 
 
 async def websocket_(websocket: WebSocket, session=Depends(get_db_session)):
@@ -80,6 +274,11 @@ async def websocket_(websocket: WebSocket, session=Depends(get_db_session)):
     Аутентифицирует пользователя, управляет его подключением через WebSocketManager,
     ограничивает частоту отправляемых сообщений и отслеживает отключение.
 
+    Входящие сообщения обрабатываются протоколом подписок на курсы валютных пар
+    (см. RateStream): {"action": "subscribe", "pairs": ["EURUSD"]} подписывает
+    соединение на пары, {"action": "unsubscribe", "pairs": [...]} — отписывает.
+    Их частота ограничивается правилом "ws:rates", остальных сообщений — "ws".
+
     Args:
         websocket (WebSocket): Экземпляр WebSocket соединения.
         session (Session, optional): Сессия базы данных, зависимость, внедренная через Depends.
@@ -88,14 +287,29 @@ async def websocket_(websocket: WebSocket, session=Depends(get_db_session)):
         WebSocketDisconnect: Исключение, если соединение было прервано.
     """
     user = await get_user_with_token(websocket, session)
-    await ws_manager.connect(user.id, websocket)
+    connection = await ws_manager.connect(user.id, websocket)
     ratelimit = WebSocketRateLimiter(times=1, seconds=5)
+    # Сообщения протокола подписок клиент отправляет пачкой при подключении и
+    # смене набора пар, поэтому они считаются отдельно от прочих сообщений.
+    rates_ratelimit = WebSocketRateLimiter(times=10, seconds=1, rule="ws:rates")
+    tier = "admin" if user.is_admin else "user"
     try:
         while True:
             data = await websocket.receive_text()
+            message = rate_stream.parse(data)
             try:
-                await ratelimit(websocket, context_key=str(user.id))
+                await (ratelimit if message is None else rates_ratelimit)(
+                    websocket, context_key=str(user.id), tier=tier
+                )
             except HTTPException:
-                await websocket.send_text("message sending limit exceeded")
+                connection.push(ws_manager.frame("message sending limit exceeded"))
+                continue
+            if message is None:
+                connection.push(rate_stream.error("Unknown action"))
+            else:
+                connection.push(rate_stream.handle(connection, message))
     except WebSocketDisconnect:
-        await ws_manager.disconnect(user.id)
+        pass
+    finally:
+        rate_stream.unsubscribe(connection)
+        await ws_manager.disconnect(connection)
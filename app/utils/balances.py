@@ -1,20 +1,26 @@
+from collections.abc import Iterable
 from decimal import Decimal
 
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.models import Balance
+from app.core.tracing import tracer
 
 
+@tracer.traced("find_or_create_balance")
 async def find_or_create_balance(
     session: AsyncSession, user_id: int, currency: str, amount: Decimal = 0
 ) -> Balance:
     """
     Находит существующий баланс пользователя в заданной валюте или создает новый.
 
-    Эта функция ищет в базе данных баланс для указанного пользователя и валюты.
-    Если такой баланс найден, он возвращается. Если нет — создается новый баланс
-    с начальной суммой, указанной в параметре `amount`, и этот новый баланс возвращается.
+    Баланс создается запросом INSERT ... ON CONFLICT DO NOTHING, поэтому при
+    параллельном создании одного и того же баланса (например, пополнение и
+    исполнение ордера в новую валюту) оба запроса получают одну строку, а не
+    нарушают уникальность (user_id, currency). Затем баланс блокируется до
+    конца транзакции (SELECT ... FOR UPDATE) и возвращается с актуальной суммой.
 
     Args:
         session (AsyncSession): Сессия подключения к базе данных для выполнения операций.
@@ -30,12 +36,66 @@ async def find_or_create_balance(
         print(balance.amount)  # Выведет сумму баланса пользователя в USD.
     """
 
-    stmt = select(Balance).where(
-        Balance.user_id == user_id, Balance.currency == currency
+    await create_balances(session, [(user_id, currency)], amount)
+    return (await lock_balances(session, user_id, [currency]))[currency]
+
+
+@tracer.traced("create_balances")
+async def create_balances(
+    session: AsyncSession, keys: Iterable[tuple[int, str]], amount: Decimal = 0
+):
+    """
+    Создает недостающие балансы, не трогая существующие.
+
+    Вставка выполняется в порядке ключей через INSERT ... ON CONFLICT DO NOTHING:
+    если баланс в это же время создает другая транзакция, запрос дожидается
+    ее завершения и ничего не вставляет.
+
+    Args:
+        session (AsyncSession): Сессия подключения к базе данных.
+        keys (Iterable[tuple[int, str]]): Пары (идентификатор пользователя, код валюты).
+        amount (Decimal, optional): Начальная сумма новых балансов. По умолчанию равна 0.
+    """
+    rows = [
+        {"user_id": user_id, "currency": currency, "amount": amount}
+        for user_id, currency in sorted(set(keys))
+    ]
+    if rows:
+        stmt = (
+            insert(Balance)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=[Balance.user_id, Balance.currency])
+        )
+        await session.execute(stmt)
+
+
+@tracer.traced("lock_balances")
+async def lock_balances(
+    session: AsyncSession, user_id: int, currencies: Iterable[str]
+) -> dict[str, Balance]:
+    """
+    Блокирует балансы пользователя в заданных валютах до конца транзакции.
+
+    Балансы блокируются в порядке id, как это делает движок ордеров, и
+    перечитываются из базы данных, даже если уже загружены в сессию (например,
+    через User.balances), поэтому изменения суммы не затирают параллельные
+    списания и зачисления. Блокируются только существующие балансы; баланс,
+    который нужно создать, сначала создается через create_balances.
+
+    Args:
+        session (AsyncSession): Сессия подключения к базе данных.
+        user_id (int): Идентификатор пользователя.
+        currencies (Iterable[str]): Коды валют балансов.
+
+    Returns:
+        dict[str, Balance]: Существующие балансы по коду валюты.
+    """
+    stmt = (
+        select(Balance)
+        .where(Balance.user_id == user_id, Balance.currency.in_(list(currencies)))
+        .order_by(Balance.id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
     )
     result = await session.execute(stmt)
-    balance = result.scalars().first()
-    if not balance:
-        balance = Balance(user_id=user_id, currency=currency, amount=amount)
-        session.add(balance)
-    return balance
+    return {balance.currency: balance for balance in result.scalars()}
@@ -0,0 +1,68 @@
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+
+import msgpack
+from fastapi.encoders import jsonable_encoder
+from fastapi_cache.coder import JsonCoder
+
+# Заголовки закодированного значения. Байт 0xC1 не используется в msgpack и не
+# может начинать JSON, поэтому значения, записанные в Redis до перехода на
+# msgpack, по-прежнему читаются как JSON.
+MSGPACK = b"\xc1m"
+MSGPACK_ZLIB = b"\xc1z"
+
+
+def _default(obj):
+    if isinstance(obj, (date, datetime)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return str(obj)
+    return jsonable_encoder(obj)
+
+
+def encode(value, compress: int = 0, level: int = 1) -> bytes:
+    """
+    Кодирует значение в msgpack со сжатием zlib больших значений.
+
+    Даты и Decimal записываются строками, как в ответе JSON, поэтому после
+    декодирования ответ эндпоинта сериализуется так же, как без кеша.
+
+    Args:
+        value: Значение из типов JSON (а также даты, Decimal, схемы pydantic).
+        compress (int): Размер в байтах, начиная с которого значение сжимается; 0 — не сжимать.
+        level (int): Уровень сжатия zlib.
+
+    Returns:
+        bytes: Закодированное значение с заголовком формата.
+    """
+    data = msgpack.packb(value, default=_default)
+    if compress and len(data) >= compress:
+        compressed = zlib.compress(data, level)
+        if len(compressed) < len(data):
+            return MSGPACK_ZLIB + compressed
+    return MSGPACK + data
+
+
+def decode(data: bytes | str):
+    """
+    Декодирует значение, записанное encode() или JSON-строкой.
+
+    JSON-значения, записанные до перехода на msgpack, декодируются через
+    JsonCoder fastapi-cache, чтобы Decimal и даты, закодированные им как
+    {"_spec_type": ...}, вернулись исходными типами.
+
+    Args:
+        data (bytes | str): Значение из Redis.
+
+    Returns:
+        Декодированное значение.
+    """
+    if isinstance(data, str):
+        return JsonCoder.decode(data)
+    header, body = data[:2], memoryview(data)[2:]
+    if header == MSGPACK:
+        return msgpack.unpackb(body)
+    if header == MSGPACK_ZLIB:
+        return msgpack.unpackb(zlib.decompress(body))
+    return JsonCoder.decode(data)
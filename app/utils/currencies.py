@@ -2,6 +2,7 @@ from datetime import date, timedelta
 from functools import wraps
 
 from app.core.config import settings
+from app.core.tracing import tracer
 from app.exceptions import BadRequestException
 from app.services import RedisClient
 from app.services.httpclientsession import http_client
@@ -11,9 +12,12 @@ def check_currencies(func):
     """
     Декоратор для проверки валидности валютных кодов.
 
-    Использует Redis кэш для проверки, что все переданные в функцию коды валют
-    присутствуют в списке поддерживаемых валют. Если хотя бы один код валюты
-    не проходит проверку, будет возбуждено исключение BadRequestException.
+    Использует список валют из кеша (RedisClient.get_currencies) для проверки,
+    что все переданные в функцию коды валют присутствуют в списке поддерживаемых
+    валют. Если хотя бы один код валюты не проходит проверку, будет возбуждено
+    исключение BadRequestException. Список обычно берется из памяти воркера;
+    если его там нет, а маршрут объявляет ключ зависимостью prefetch("currencies"),
+    он читается одним конвейером с кешем fastapi-cache.
 
     Args:
         func: Асинхронная функция, к которой применяется декоратор.
@@ -24,7 +28,7 @@ def check_currencies(func):
 
     @wraps(func)
     async def wrapper(*args, **kwargs):
-        cache = await RedisClient.get_currency("currencies")
+        cache = await RedisClient.get_currencies()
 
         currencies = [
             code.upper()
@@ -72,6 +76,7 @@ def check_time(func):
     return wrapper
 
 
+@tracer.traced("get_exchange")
 async def get_exchange(
     source: str,
     currencies: list[str],
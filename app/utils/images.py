@@ -0,0 +1,30 @@
+import os
+
+from PIL import Image, ImageOps
+
+
+def make_thumbnail(source: str, target: str, size: int) -> str:
+    """
+    Создает миниатюру изображения в формате WebP.
+
+    Выполняется в пуле процессов, поэтому импортирует только Pillow. Миниатюра
+    пишется во временный файл и переименовывается, чтобы читатели никогда не
+    видели недописанный файл.
+
+    Args:
+        source (str): Путь к исходному изображению.
+        target (str): Путь к миниатюре.
+        size (int): Максимальная сторона миниатюры в пикселях.
+
+    Returns:
+        str: Путь к миниатюре.
+    """
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size))
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        partial = f"{target}.{os.getpid()}.part"
+        image.save(partial, "WEBP", quality=80, method=6)
+    os.replace(partial, target)
+    return target
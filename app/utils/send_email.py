@@ -1,45 +1,60 @@
 from email.message import EmailMessage
 
-import aiosmtplib
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.models import Email
 from app.core.config import settings
 
 
-async def send_email_async(subject: str, body: str, to_email: str):
+def enqueue_email(
+    session: AsyncSession, subject: str, body: str, to_email: str
+) -> Email:
     """
-    Асинхронная отправка электронного письма.
+    Постановка электронного письма в исходящую очередь (outbox).
 
-    Функция асинхронно отправляет электронное письмо с использованием SMTP сервера.
-    Поддерживает TLS для безопасной передачи данных. Для отправки используются настройки,
-    указанные в конфигурации приложения (settings).
+    Письмо добавляется в текущую сессию и сохраняется в базе данных вместе
+    с остальными изменениями при коммите транзакции запроса. Если транзакция
+    откатывается, письмо тоже не будет отправлено. Доставкой занимается
+    отдельный воркер рассылки (app/commands/email_worker.py).
 
     Args:
+        session (AsyncSession): Сессия базы данных текущего запроса.
         subject (str): Тема электронного письма.
         body (str): Текстовое содержание письма.
         to_email (str): Адрес электронной почты получателя.
 
+    Returns:
+        Email: Объект письма, добавленный в сессию.
+
     Пример использования:
-        await send_email_async(
+        enqueue_email(
+            session,
             subject="Привет от FastAPI",
             body="Тестовое сообщение от вашего FastAPI приложения.",
-            to_email="recipient@example.com"
+            to_email="recipient@example.com",
         )
+        await session.commit()
+    """
+
+    email = Email(recipient=to_email, subject=subject, body=body)
+    session.add(email)
+    return email
+
+
+def build_message(email: Email) -> EmailMessage:
+    """
+    Формирование MIME-сообщения из записи outbox.
+
+    Args:
+        email (Email): Запись письма из исходящей очереди.
 
-    Важно: Для функционирования необходимо иметь доступ к SMTP-серверу и корректно настроенные
-    параметры в settings.EMAIL, включая имя пользователя и пароль.
+    Returns:
+        EmailMessage: Сообщение, готовое к отправке через SMTP.
     """
 
     message = EmailMessage()
-    message["From"] = "alberv0r@yandex.ru"
-    message["To"] = to_email
-    message["Subject"] = subject
-    message.set_content(body)
-
-    await aiosmtplib.send(
-        message,
-        hostname="smtp.yandex.ru",
-        port=465,
-        username=settings.EMAIL.NAME,
-        password=settings.EMAIL.PASS,
-        use_tls=True,
-    )
+    message["From"] = settings.EMAIL.SENDER or settings.EMAIL.NAME
+    message["To"] = email.recipient
+    message["Subject"] = email.subject
+    message.set_content(email.body)
+    return message
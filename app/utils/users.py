@@ -11,6 +11,7 @@ from app.api.auth.security import verify_access_token
 from app.api.models import User
 from app.api.schemas import BalanceSchema, ResponseUserBalance
 from app.core.database import get_db_session
+from app.core.tracing import tracer
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login/")
 
@@ -40,9 +41,10 @@ async def get_current_user(
     token = verify_access_token(
         token=token, credentials_exception=credentials_exception
     )
-    stmt = select(User).where(token.id == User.id)
-    result = await session.execute(stmt)
-    user = result.scalar_one_or_none()
+    with tracer.span("load_user"):
+        stmt = select(User).where(token.id == User.id)
+        result = await session.execute(stmt)
+        user = result.scalar_one_or_none()
     return user
 
 
@@ -5,8 +5,16 @@ from fastapi import FastAPI
 from sqladmin import Admin
 
 from app.api import router
-from app.api.admin.model import AdminAuth, BalanceModelView, UserModelView
+from app.api.admin.model import (
+    TEMPLATES_DIR,
+    AdminAuth,
+    BalanceModelView,
+    HoldingsDashboardView,
+    ProfilerView,
+    UserModelView,
+)
 from app.api.admin.model import router as admin_router
+from app.api.endpoints.metrics import router as metrics_router
 from app.core import sessionmanager
 from app.core.config import settings
 from app.exceptions import (
@@ -16,20 +24,62 @@ from app.exceptions import (
     request_exception_handler,
 )
 from app.services import RedisClient
+from app.services.alerts import alert_engine
+from app.services.broker import broker
+from app.services.limiter import limiter
+from app.services.loop_monitor import loop_monitor
+from app.services.media import FORM_OVERHEAD, UploadLimitMiddleware, media_store
+from app.services.metrics import MetricsMiddleware, metrics_exporter
+from app.services.orders import order_engine
+from app.services.profiler import ProfilerMiddleware
+from app.services.rates import rate_refresher
+from app.services.redis_tools import RedisBatchMiddleware
+from app.services.reports import holdings_report
+from app.services.tracing import TracingMiddleware, trace_exporter
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    await loop_monitor.start()
     await RedisClient.fastapi_cache_init()
-    await RedisClient.fastapi_limiter_init()
+    await limiter.start()
     await RedisClient.fetch_currency_data()
+    await broker.start()
+    await media_store.start()
+    await alert_engine.load()
+    await order_engine.load()
+    await rate_refresher.start()
+    await order_engine.start()
+    await holdings_report.start()
+    await metrics_exporter.start()
+    await trace_exporter.start()
     yield
+    await trace_exporter.stop()
+    await metrics_exporter.stop()
+    await holdings_report.stop()
+    await order_engine.stop()
+    await rate_refresher.stop()
+    await media_store.stop()
+    await limiter.stop()
+    await broker.stop()
+    await RedisClient.close()
     if sessionmanager.engine is not None:
         await sessionmanager.close()
+    await loop_monitor.stop()
 
 
 app = FastAPI(lifespan=lifespan)
 app.include_router(router)
+app.include_router(metrics_router)
+app.add_middleware(
+    UploadLimitMiddleware,
+    paths=("/api/users/create",),
+    limit=settings.MEDIA.LIMIT + FORM_OVERHEAD,
+)
+app.add_middleware(RedisBatchMiddleware)
+app.add_middleware(TracingMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ProfilerMiddleware)
 
 app.add_exception_handler(BadRequestException, request_exception_handler)
 app.add_exception_handler(CustomException, custom_exception_handler)
@@ -38,9 +88,12 @@ admin = Admin(
     app=app,
     session_maker=sessionmanager.session_maker,
     authentication_backend=AdminAuth(settings.AUTH.KEY),
+    templates_dir=TEMPLATES_DIR,
 )
 admin.add_view(UserModelView)
 admin.add_view(BalanceModelView)
+admin.add_base_view(HoldingsDashboardView)
+admin.add_base_view(ProfilerView)
 app.include_router(admin_router)
 # add_pagination(app)
 
@@ -0,0 +1,297 @@
+import contextlib
+import itertools
+import string
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from functools import partial
+from types import SimpleNamespace
+from unittest import mock
+
+import jwt
+from fastapi_cache.coder import JsonCoder
+from starlette.requests import Request
+
+from app.api.auth import security
+from app.api.auth.security import create_access_token, verify_access_token
+from app.api.models import Balance, User
+from app.api.schemas import (
+    AlertSchema,
+    BalanceSchema,
+    OrderSchema,
+    ResponseCurrency,
+    ResponseUserBalance,
+    ResponseValuation,
+    Token,
+)
+from app.core.config import settings
+from app.exceptions import handlers
+from app.exceptions.handlers import translate_details
+from app.services import RedisClient
+from app.services.provider_stub import CURRENCIES, ProviderStub
+from app.services.redis_tools import BinaryCoder, Decoded
+from app.services.valuation import Holding, Valuation
+from app.utils import codec
+from app.utils import currencies as currency_utils
+from app.utils.currencies import check_currencies, check_time, get_exchange
+from app.utils.users import create_response_user_balance
+from tests.benchmarks.harness import Case
+
+# Список валют из кеша: ~170 кодов, как его возвращает RedisClient.get_currencies.
+CODES = list(CURRENCIES) + [
+    "Q" + "".join(letters)
+    for letters in itertools.islice(
+        itertools.product(string.ascii_uppercase, repeat=2), 170 - len(CURRENCIES)
+    )
+]
+CACHED_CURRENCIES = {code: f"{code} currency" for code in CODES}
+QUOTES = {f"USD{code}": 1.2345 for code in CODES}
+
+
+async def fake_get_currencies():
+    return CACHED_CURRENCIES
+
+
+async def fake_http_client(url: str, params: dict | None = None):
+    return {"success": True, "source": params["source"], "quotes": QUOTES}
+
+
+def fake_translate(text: str, dest: str | None = None):
+    return SimpleNamespace(text=text)
+
+
+@contextlib.contextmanager
+def mocked_io():
+    """Подменяет Redis, внешний API курсов и переводчик ответами из памяти."""
+    with mock.patch.object(
+        RedisClient, "get_currencies", fake_get_currencies
+    ), mock.patch.object(
+        currency_utils, "http_client", fake_http_client
+    ), mock.patch.object(
+        handlers.translator, "translate", fake_translate
+    ):
+        yield
+
+
+async def endpoint(**kwargs):
+    return kwargs
+
+
+def build_user(balances: int = 3) -> User:
+    return User(
+        username="bench",
+        email="bench@example.com",
+        created_at=date(2024, 1, 1),
+        balances=[
+            Balance(currency=code, amount=Decimal("1234.56"))
+            for code in CODES[:balances]
+        ],
+    )
+
+
+def build_request() -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/api/currency/exchange_rate",
+            "headers": [(b"accept-language", b"ru-RU,ru;q=0.9,en;q=0.8")],
+        }
+    )
+
+
+def build_payloads() -> dict[str, dict]:
+    """Большие кешируемые ответы: /timeframe за год и /show_change по всем валютам заглушки."""
+    stub = ProviderStub()
+    codes = list(CURRENCIES)
+    start = date(2023, 1, 1)
+    timeframe = {
+        "success": True,
+        "timeframe": True,
+        "start_date": str(start),
+        "end_date": str(start + timedelta(days=364)),
+        "source": "USD",
+        "quotes": {
+            str(start + timedelta(days=offset)): stub.quotes(
+                "USD", codes, 1672531200 + offset * 86400
+            )
+            for offset in range(365)
+        },
+    }
+    start_quotes = stub.quotes("USD", codes, 1672531200)
+    end_quotes = stub.quotes("USD", codes, 1704067200)
+    change = {
+        "success": True,
+        "change": True,
+        "start_date": "2023-01-01",
+        "end_date": "2024-01-01",
+        "source": "USD",
+        "quotes": {
+            pair: {
+                "start_rate": rate,
+                "end_rate": end_quotes[pair],
+                "change": round(end_quotes[pair] - rate, 6),
+                "change_pct": round((end_quotes[pair] - rate) / rate * 100, 4),
+            }
+            for pair, rate in start_quotes.items()
+        },
+    }
+    return {"timeframe": timeframe, "change": change}
+
+
+def build_codec_cases() -> list[Case]:
+    """
+    Форматы хранения кешированных ответов: JSON (JsonCoder fastapi-cache),
+    msgpack, msgpack со сжатием и чтение из локального уровня кеша.
+    """
+    cases = []
+    for name, payload in build_payloads().items():
+        encoders = {
+            "json": JsonCoder.encode,
+            "msgpack": partial(codec.encode, compress=0),
+            "msgpack_zlib": partial(
+                codec.encode, compress=1, level=settings.CACHE.LEVEL
+            ),
+        }
+        for encoding, encode in encoders.items():
+            data = encode(payload)
+            decode = JsonCoder.decode if encoding == "json" else codec.decode
+            cases.append(
+                Case(
+                    f"codec.{name}.{encoding}.encode",
+                    partial(encode, payload),
+                    size=len(data),
+                )
+            )
+            cases.append(Case(f"codec.{name}.{encoding}.decode", partial(decode, data)))
+        data = BinaryCoder.encode(payload)
+        cases.append(
+            Case(
+                f"codec.{name}.hot.decode",
+                partial(BinaryCoder.decode, Decoded(data, codec.decode(data))),
+                size=len(data),
+            )
+        )
+    return cases
+
+
+def build_cases() -> list[Case]:
+    """Бенчмарки горячих вспомогательных функций и схем ответов."""
+    currency_kwargs = {"source": "usd", "currencies": ["EUR", "RUB", "GBP"]}
+    time_kwargs = {
+        "start_date": date(2020, 1, 1),
+        "end_date": date(2020, 3, 1),
+        "source": "USD",
+    }
+    token = create_access_token(data={"user_id": 42})
+    payload = jwt.decode(token, security.SECRET_KEY, algorithms=[security.ALGORITHM])
+    request = build_request()
+    user = build_user()
+    user_balance = ResponseUserBalance(
+        username=user.username,
+        email=user.email,
+        created_at=user.created_at,
+        balances=[
+            BalanceSchema(amount=balance.amount, currency=balance.currency)
+            for balance in user.balances
+        ],
+    )
+    currency = ResponseCurrency(time=datetime(2024, 1, 1), source="USD", quotes=QUOTES)
+    valuation = Valuation(
+        currency="USD",
+        total=Decimal("3703.68"),
+        holdings=[
+            Holding(code, Decimal("1234.56"), Decimal("1"), Decimal("1234.56"))
+            for code in CODES[:3]
+        ],
+    )
+
+    return [
+        Case(
+            "check_currencies",
+            partial(check_currencies(endpoint), **currency_kwargs),
+            reference=partial(endpoint, **currency_kwargs),
+        ),
+        Case(
+            "check_time",
+            partial(check_time(endpoint), **time_kwargs),
+            reference=partial(endpoint, **time_kwargs),
+        ),
+        Case(
+            "get_exchange",
+            partial(get_exchange, "USD", ["EUR", "RUB", "GBP"]),
+            reference=partial(
+                fake_http_client, url="", params={"source": "USD", "currencies": ""}
+            ),
+        ),
+        Case(
+            "create_response_user_balance", partial(create_response_user_balance, user)
+        ),
+        Case(
+            "create_access_token",
+            partial(create_access_token, data={"user_id": 42}),
+            reference=partial(
+                jwt.encode, payload, security.SECRET_KEY, security.ALGORITHM
+            ),
+        ),
+        Case(
+            "verify_access_token",
+            partial(verify_access_token, token, None),
+            reference=partial(
+                jwt.decode, token, security.SECRET_KEY, algorithms=[security.ALGORITHM]
+            ),
+        ),
+        Case(
+            "translate_details",
+            partial(translate_details, "Incorrect currency code!", request),
+            reference=partial(fake_translate, "Incorrect currency code!", dest="ru"),
+        ),
+        Case(
+            "schemas.Token.validate",
+            partial(
+                Token.model_validate, {"access_token": token, "token_type": "Bearer"}
+            ),
+        ),
+        Case(
+            "schemas.BalanceSchema.validate",
+            partial(
+                BalanceSchema.model_validate, {"amount": "10.5", "currency": "USD"}
+            ),
+        ),
+        Case(
+            "schemas.ResponseUserBalance.validate",
+            partial(ResponseUserBalance.model_validate, user_balance.model_dump()),
+        ),
+        Case(
+            "schemas.ResponseUserBalance.dump_json",
+            user_balance.model_dump_json,
+        ),
+        Case(
+            "schemas.ResponseCurrency.validate",
+            partial(ResponseCurrency.model_validate, currency.model_dump()),
+        ),
+        Case("schemas.ResponseCurrency.dump_json", currency.model_dump_json),
+        Case(
+            "schemas.AlertSchema.validate",
+            partial(
+                AlertSchema.model_validate,
+                {"pair": "EURUSD", "direction": "above", "threshold": "1.1"},
+            ),
+        ),
+        Case(
+            "schemas.OrderSchema.validate",
+            partial(
+                OrderSchema.model_validate,
+                {
+                    "source": "USD",
+                    "currency": "EUR",
+                    "amount": "100.00",
+                    "condition": "le",
+                    "trigger_rate": "0.9",
+                },
+            ),
+        ),
+        Case(
+            "schemas.ResponseValuation.from_attributes",
+            partial(ResponseValuation.model_validate, valuation),
+        ),
+    ] + build_codec_cases()
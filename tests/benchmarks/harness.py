@@ -0,0 +1,182 @@
+import asyncio
+import gc
+import inspect
+import random
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+
+@dataclass
+class Case:
+    """
+    Микробенчмарк одной функции.
+
+    Attributes:
+        name (str): Имя бенчмарка в отчете.
+        func (Callable): Измеряемый вызов без аргументов, синхронный или асинхронный.
+        reference (Callable | None): Вызов того же кода без нашей обертки
+            (библиотека, замоканный ввод-вывод). Если задан, в отчет попадает
+            накладной расход func относительно reference.
+        size (int | None): Размер результата в байтах (для сравнения форматов
+            сериализации); попадает в отчет как bytes.
+    """
+
+    name: str
+    func: Callable
+    reference: Callable | None = None
+    size: int | None = None
+
+
+def make_timer(func: Callable, loop: asyncio.AbstractEventLoop) -> Callable:
+    """
+    Возвращает timer(loops) -> секунды на loops вызовов func.
+
+    Асинхронные функции ожидаются подряд внутри одной корутины, поэтому время
+    запуска цикла событий в замер не входит.
+    """
+    if inspect.iscoroutinefunction(func):
+
+        async def batch(loops: int) -> float:
+            started = time.perf_counter()
+            for _ in range(loops):
+                await func()
+            return time.perf_counter() - started
+
+        return lambda loops: loop.run_until_complete(batch(loops))
+
+    def timer(loops: int) -> float:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        return time.perf_counter() - started
+
+    return timer
+
+
+def calibrate(timer: Callable, min_time: float) -> int:
+    """Подбирает количество вызовов в одном замере (1, 2, 5, 10, 20, ...) не короче min_time."""
+    loops = 1
+    while True:
+        for factor in (1, 2, 5):
+            if timer(loops * factor) >= min_time:
+                return loops * factor
+        loops *= 10
+
+
+def bootstrap_ci(
+    values: list[float], rng: random.Random, rounds: int = 1000
+) -> tuple[float, float]:
+    """95% доверительный интервал медианы методом бутстрепа."""
+    medians = sorted(
+        statistics.median(rng.choices(values, k=len(values))) for _ in range(rounds)
+    )
+    return medians[int(rounds * 0.025)], medians[int(rounds * 0.975) - 1]
+
+
+def run_case(
+    case: Case, loop: asyncio.AbstractEventLoop, repeat: int, min_time: float
+) -> dict:
+    """
+    Измеряет бенчмарк.
+
+    Каждый из repeat замеров — это loops вызовов подряд при отключенном сборщике
+    мусора; результат — время одного вызова в наносекундах. Замеры func и
+    reference чередуются, поэтому дрейф частоты процессора одинаково влияет на
+    оба, а накладной расход считается по парным разностям.
+
+    Returns:
+        dict: Медиана, 95% доверительный интервал, межквартильный размах и
+            минимум в нс, при наличии reference — его медиана и накладной расход.
+    """
+    timer = make_timer(case.func, loop)
+    reference = make_timer(case.reference, loop) if case.reference else None
+    loops = calibrate(timer, min_time)
+    samples, references = [], []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            samples.append(timer(loops) / loops * 1e9)
+            if reference:
+                references.append(reference(loops) / loops * 1e9)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    rng = random.Random(0)
+    quartiles = statistics.quantiles(samples, n=4)
+    result = {
+        "loops": loops,
+        "repeat": repeat,
+        "median_ns": round(statistics.median(samples), 1),
+        "ci_ns": [round(value, 1) for value in bootstrap_ci(samples, rng)],
+        "iqr_ns": round(quartiles[2] - quartiles[0], 1),
+        "min_ns": round(min(samples), 1),
+    }
+    if case.size is not None:
+        result["bytes"] = case.size
+    if reference:
+        overhead = [sample - ref for sample, ref in zip(samples, references)]
+        result["reference_ns"] = round(statistics.median(references), 1)
+        result["overhead_ns"] = round(statistics.median(overhead), 1)
+        result["overhead_ci_ns"] = [
+            round(value, 1) for value in bootstrap_ci(overhead, rng)
+        ]
+    return result
+
+
+def run(
+    cases: list[Case], repeat: int = 30, min_time: float = 0.02, report=None
+) -> dict:
+    """Измеряет все бенчмарки в одном цикле событий; report(name, result) вызывается после каждого."""
+    loop = asyncio.new_event_loop()
+    results = {}
+    try:
+        for case in cases:
+            results[case.name] = run_case(case, loop, repeat, min_time)
+            if report:
+                report(case.name, results[case.name])
+    finally:
+        loop.close()
+    return results
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Сравнивает результаты с сохраненными базовыми.
+
+    Регрессией считается рост медианы больше чем на tolerance (доля), если при
+    этом доверительные интервалы не пересекаются, то есть рост не объясняется
+    шумом замеров. Накладной расход нашего кода проверяется отдельно: его рост
+    больше чем на tolerance от базовой медианы всего вызова считается
+    регрессией, даже если общее время скрыто разбросом библиотечной части.
+    Размер результата (bytes) не зависит от шума и сравнивается напрямую.
+
+    Returns:
+        list[str]: Описания найденных регрессий.
+    """
+    regressions = []
+    for name, base in baseline["benchmarks"].items():
+        now = current["benchmarks"].get(name)
+        if now is None:
+            continue
+        if (
+            now["median_ns"] > base["median_ns"] * (1 + tolerance)
+            and now["ci_ns"][0] > base["ci_ns"][1]
+        ):
+            regressions.append(f"{name}: {base['median_ns']} -> {now['median_ns']} ns")
+        if "overhead_ns" in base and "overhead_ns" in now:
+            if (
+                now["overhead_ns"] > base["overhead_ns"] + base["median_ns"] * tolerance
+                and now["overhead_ci_ns"][0] > base["overhead_ci_ns"][1]
+            ):
+                regressions.append(
+                    f"{name}: overhead {base['overhead_ns']} -> "
+                    f"{now['overhead_ns']} ns"
+                )
+        if "bytes" in base and "bytes" in now:
+            if now["bytes"] > base["bytes"] * (1 + tolerance):
+                regressions.append(f"{name}: {base['bytes']} -> {now['bytes']} bytes")
+    return regressions
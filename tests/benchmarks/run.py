@@ -0,0 +1,78 @@
+"""
+Микробенчмарки горячих вспомогательных функций.
+
+Каждая функция измеряется изолированно, ввод-вывод (Redis, внешний API курсов,
+переводчик) подменен ответами из памяти. Для функций-оберток над библиотекой
+или замоканным вводом-выводом отдельно считается накладной расход нашего кода.
+
+Базовые результаты сравнимы только с прогоном на той же машине.
+
+Пример:
+    python -m tests.benchmarks.run --output bench.json
+    python -m tests.benchmarks.run --baseline bench.json --tolerance 0.2
+"""
+
+import argparse
+import json
+import sys
+
+from tests.benchmarks.cases import build_cases, mocked_io
+from tests.benchmarks.harness import compare, run
+
+
+def print_result(name: str, result: dict):
+    line = (
+        f"{name:<45} {result['median_ns']:>12.1f} ns "
+        f"[{result['ci_ns'][0]:.1f}, {result['ci_ns'][1]:.1f}]"
+    )
+    if "overhead_ns" in result:
+        line += f"  overhead {result['overhead_ns']:.1f} ns"
+    if "bytes" in result:
+        line += f"  {result['bytes']} bytes"
+    print(line, file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Микробенчмарки.")
+    parser.add_argument("--filter", default="", help="Подстрока имени бенчмарка")
+    parser.add_argument("--repeat", type=int, default=30, help="Количество замеров")
+    parser.add_argument(
+        "--min-time", type=float, default=0.02, help="Минимальная длина замера, с"
+    )
+    parser.add_argument("--output", help="Файл для результатов в JSON")
+    parser.add_argument("--baseline", help="Базовые результаты для сравнения")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2, help="Допустимое ухудшение (доля)"
+    )
+    args = parser.parse_args()
+
+    with mocked_io():
+        cases = [case for case in build_cases() if args.filter in case.name]
+        results = run(cases, args.repeat, args.min_time, report=print_result)
+
+    output = json.dumps(
+        {
+            "meta": {"repeat": args.repeat, "min_time": args.min_time},
+            "benchmarks": results,
+        },
+        indent=2,
+    )
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(
+                {"benchmarks": results}, json.load(file), args.tolerance
+            )
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
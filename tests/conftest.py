@@ -0,0 +1,70 @@
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import delete, select, text
+
+from app.api.models import Balance, Email, Order, User
+from app.core import sessionmanager
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def db():
+    """
+    База данных из настроек приложения (схема — после alembic upgrade head).
+
+    Тест пропускается, если PostgreSQL недоступен. Соединения пула закрываются
+    после теста, потому что каждый тест выполняется в своем цикле событий.
+    """
+    try:
+        async with sessionmanager.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    except OSError as exc:
+        await sessionmanager.engine.dispose()
+        pytest.skip(f"PostgreSQL недоступен: {exc}")
+    yield sessionmanager
+    await sessionmanager.engine.dispose()
+
+
+@pytest.fixture
+async def make_user(db):
+    """
+    Создает пользователей с балансами и удаляет их вместе с их данными после теста.
+
+    Пример использования:
+        user = await make_user(USD="100.00", EUR="5")
+    """
+    created = []
+
+    async def make(**balances: str) -> User:
+        name = f"test-{uuid4().hex}"
+        user = User(
+            username=name,
+            password="test",
+            email=f"{name}@example.com",
+            balances=[
+                Balance(currency=currency, amount=Decimal(amount))
+                for currency, amount in balances.items()
+            ],
+        )
+        async with db.session() as session:
+            session.add(user)
+            await session.commit()
+        created.append(user.id)
+        return user
+
+    yield make
+
+    if created:
+        async with db.session() as session:
+            emails = select(User.email).where(User.id.in_(created))
+            await session.execute(delete(Email).where(Email.recipient.in_(emails)))
+            await session.execute(delete(Order).where(Order.user_id.in_(created)))
+            await session.execute(delete(Balance).where(Balance.user_id.in_(created)))
+            await session.execute(delete(User).where(User.id.in_(created)))
+            await session.commit()
@@ -0,0 +1,273 @@
+"""
+Нагрузочный тест приложения.
+
+Поднимает заглушку внешнего API курсов и main:app (uvicorn) как отдельные
+процессы, при необходимости заполняет базу тестовыми пользователями командой
+seed, прогоняет смесь сценариев и пишет в JSON перцентили задержек,
+пропускную способность и долю ошибок по каждому маршруту, а также места,
+где воркеры блокировали цикл событий дольше --block-threshold мс (по
+сводкам LoopMonitor). Новое место блокировки относительно базового прогона
+считается регрессией.
+
+Postgres и Redis берутся из .env, как и у приложения.
+
+Пример:
+    python -m tests.load.run --seed-users 10000 --concurrency 64 --duration 60 \\
+        --mix quotes:5,convert:2,historical:2,login:1 --sockets 500 \\
+        --output load.json --baseline tests/load/baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import aiohttp
+from sqlalchemy import text
+
+from app.api.auth.security import create_access_token
+from app.core import sessionmanager
+from tests.load.scenarios import SCENARIOS, Client, run_http, run_websockets
+from tests.load.stats import Recorder, blocking_sites, compare
+
+ENDPOINTS = {
+    "LIST": "list",
+    "EXCRATES": "live",
+    "CONVERT": "convert",
+    "CHANGE": "change",
+    "HISTORICAL": "historical",
+    "TIMEFRAME": "timeframe",
+}
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    """Разбирает смесь сценариев вида "quotes:5,convert:2"."""
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition(":")
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"Unknown scenario: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def spawn(args: list[str], env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, *args], env=env, stdout=sys.stderr, stderr=sys.stderr
+    )
+
+
+async def wait_ready(url: str, timeout: float = 30):
+    """Ждет, пока сервер начнет отвечать."""
+    deadline = time.perf_counter() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.perf_counter() < deadline:
+            try:
+                async with session.get(url) as response:
+                    if response.status < 500:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not start in {timeout}s")
+
+
+async def load_tokens(prefix: str, count: int) -> list[str]:
+    """Выпускает токены доступа для тестовых пользователей без обращения к /login."""
+    async with sessionmanager.session() as session:
+        ids = (
+            await session.execute(
+                text(
+                    "SELECT id FROM users WHERE username LIKE :pattern "
+                    "ORDER BY id LIMIT :count"
+                ),
+                {"pattern": prefix.replace("_", r"\_") + "%", "count": count},
+            )
+        ).scalars()
+        tokens = [create_access_token(data={"user_id": user_id}) for user_id in ids]
+    await sessionmanager.close()
+    if not tokens:
+        raise RuntimeError(f"No users with prefix {prefix!r}, run with --seed-users")
+    return tokens
+
+
+async def drive(args, base_url: str, tokens: list[str]) -> dict:
+    recorder = Recorder()
+    connector = aiohttp.TCPConnector(limit=0)
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        client = Client(session, base_url, recorder, tokens, args.clients)
+        deadline = time.perf_counter() + args.warmup + args.duration
+        tasks = []
+        if args.concurrency and args.mix:
+            tasks.append(
+                run_http(
+                    client,
+                    args.mix,
+                    args.concurrency,
+                    deadline,
+                    args.random_seed,
+                    users=args.users,
+                    prefix=args.prefix,
+                )
+            )
+        if args.sockets:
+            tasks.append(
+                run_websockets(client, args.sockets, args.pairs.split(","), deadline)
+            )
+
+        async def warmup():
+            await asyncio.sleep(args.warmup)
+            recorder.reset()
+
+        await asyncio.gather(warmup(), *tasks)
+        recorder.stop()
+    return recorder.report()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест приложения.")
+    parser.add_argument("--port", type=int, default=8011, help="Порт приложения")
+    parser.add_argument("--stub-port", type=int, default=8090, help="Порт заглушки API")
+    parser.add_argument("--workers", type=int, default=1, help="Воркеры uvicorn")
+    parser.add_argument(
+        "--stub-latency", type=float, default=0, help="Задержка заглушки API, мс"
+    )
+    parser.add_argument(
+        "--rates-interval", type=int, default=1, help="RATES_INTERVAL приложения, с"
+    )
+    parser.add_argument(
+        "--seed-users", type=int, default=0, help="Заполнить базу перед прогоном"
+    )
+    parser.add_argument(
+        "--prefix", default="load_", help="Префикс тестовых пользователей"
+    )
+    parser.add_argument(
+        "--users", type=int, default=1000, help="Пользователей для сценария login"
+    )
+    parser.add_argument("--tokens", type=int, default=1000, help="Токенов доступа")
+    parser.add_argument(
+        "--clients", type=int, default=100000, help="Виртуальных IP-адресов клиентов"
+    )
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default="quotes:5,convert:2,historical:2,login:1",
+        help="Смесь сценариев: " + ", ".join(SCENARIOS),
+    )
+    parser.add_argument("--concurrency", type=int, default=32, help="HTTP-воркеров")
+    parser.add_argument("--sockets", type=int, default=100, help="WebSocket-клиентов")
+    parser.add_argument("--pairs", default="EURUSD,USDRUB", help="Пары подписки WS")
+    parser.add_argument("--duration", type=float, default=30, help="Длительность, с")
+    parser.add_argument("--warmup", type=float, default=5, help="Прогрев, с")
+    parser.add_argument("--timeout", type=float, default=30, help="Таймаут запроса, с")
+    parser.add_argument("--random-seed", type=int, default=1, help="Seed сценариев")
+    parser.add_argument(
+        "--block-threshold",
+        type=float,
+        default=50,
+        help="Порог блокировки цикла событий воркера, мс",
+    )
+    parser.add_argument("--output", help="Файл для результатов в JSON")
+    parser.add_argument("--baseline", help="Базовый прогон для сравнения")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.1, help="Допустимое ухудшение (доля)"
+    )
+    args = parser.parse_args()
+
+    stub_url = f"http://127.0.0.1:{args.stub_port}/currency_data"
+    env = dict(os.environ)
+    env.update(
+        {f"API_{name}": f"{stub_url}/{path}" for name, path in ENDPOINTS.items()}
+    )
+    env["RATES_INTERVAL"] = str(args.rates_interval)
+    blocking_report = os.path.join(tempfile.mkdtemp(), "blocking.jsonl")
+    env["LOOP_THRESHOLD"] = str(args.block_threshold)
+    env["LOOP_REPORT"] = blocking_report
+
+    if args.seed_users:
+        subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "app.commands.seed",
+                "--users",
+                str(args.seed_users),
+                "--prefix",
+                args.prefix,
+            ],
+            env=env,
+            check=True,
+        )
+        args.users = min(args.users, args.seed_users)
+    tokens = await load_tokens(args.prefix, args.tokens)
+
+    processes = [
+        spawn(
+            [
+                "-m",
+                "app.services.provider_stub",
+                "--port",
+                str(args.stub_port),
+                "--step",
+                str(args.rates_interval),
+                "--latency",
+                str(args.stub_latency),
+            ],
+            env,
+        ),
+        spawn(
+            [
+                "-m",
+                "uvicorn",
+                "main:app",
+                "--port",
+                str(args.port),
+                "--workers",
+                str(args.workers),
+                "--no-access-log",
+            ],
+            env,
+        ),
+    ]
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        await wait_ready(f"{base_url}/docs")
+        report = await drive(args, base_url, tokens)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+    report["blocking"] = blocking_sites(blocking_report)
+    report["meta"] = {
+        "mix": args.mix,
+        "concurrency": args.concurrency,
+        "sockets": args.sockets,
+        "workers": args.workers,
+        "stub_latency_ms": args.stub_latency,
+        "block_threshold_ms": args.block_threshold,
+        "random_seed": args.random_seed,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    print(output)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(report, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,214 @@
+import asyncio
+import itertools
+import json
+import random
+import time
+from datetime import date, timedelta
+
+import aiohttp
+
+from tests.load.stats import Recorder
+
+
+class Client:
+    """
+    HTTP-клиент нагрузочного теста.
+
+    Каждый запрос уходит от имени одного из clients виртуальных клиентов:
+    заголовок X-Forwarded-For, по которому ограничитель различает анонимных
+    клиентов, перебирается по кругу, а токены — по кругу из tokens (запросы с
+    токеном ограничиваются по пользователю). Поэтому ограничитель частоты
+    проверяется на каждом запросе, но не превращает весь прогон в поток
+    ответов 429, если токенов достаточно.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        base_url: str,
+        recorder: Recorder,
+        tokens: list[str],
+        clients: int,
+    ):
+        self.session = session
+        self.base_url = base_url
+        self.recorder = recorder
+        self.tokens = itertools.cycle(tokens)
+        self.addresses = itertools.cycle(
+            f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(clients)
+        )
+
+    def headers(self, token: str | None = None) -> dict:
+        headers = {"X-Forwarded-For": next(self.addresses)}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        return headers
+
+    async def request(
+        self, route: str, method: str, path: str, token: str | None = None, **kwargs
+    ):
+        """Выполняет запрос и записывает задержку под именем route."""
+        started = time.perf_counter()
+        try:
+            async with self.session.request(
+                method, self.base_url + path, headers=self.headers(token), **kwargs
+            ) as response:
+                await response.read()
+                status = response.status
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+            status = type(error).__name__
+        self.recorder.add(route, status, time.perf_counter() - started)
+
+
+async def login_storm(client: Client, rng: random.Random, users: int, prefix: str):
+    """Вход случайного тестового пользователя (проверка bcrypt-хеша на сервере)."""
+    username = f"{prefix}{rng.randrange(users)}"
+    await client.request(
+        "POST /auth/login/",
+        "POST",
+        "/api/auth/login/",
+        data={"username": username, "password": "password"},
+    )
+
+
+async def quote_polling(client: Client, rng: random.Random, **_):
+    """Опрос текущих курсов, списка валют и своего профиля."""
+    token = next(client.tokens)
+    currencies = rng.sample(["EUR", "RUB", "GBP", "JPY", "CNY"], 2)
+    await client.request(
+        "GET /currency/exchange_rate",
+        "GET",
+        "/api/currency/exchange_rate",
+        token,
+        params=[("source", "USD")] + [("currencies", code) for code in currencies],
+    )
+    await client.request("GET /currency/list", "GET", "/api/currency/list", token)
+    await client.request("GET /users/me", "GET", "/api/users/me", token)
+
+
+async def conversions(client: Client, rng: random.Random, **_):
+    """Пополнение баланса и конвертация части суммы в другую валюту."""
+    token = next(client.tokens)
+    await client.request(
+        "PATCH /users/top_up_balance/",
+        "PATCH",
+        "/api/users/top_up_balance/",
+        token,
+        json={"amount": "10", "currency": "USD"},
+    )
+    await client.request(
+        "PATCH /users/change_currency/",
+        "PATCH",
+        "/api/users/change_currency/",
+        token,
+        params={"source": "USD", "currency": rng.choice(["EUR", "RUB"]), "amount": 1},
+    )
+
+
+async def historical(client: Client, rng: random.Random, **_):
+    """Исторические курсы на дату и за период."""
+    token = next(client.tokens)
+    day = date(2020, 1, 1) + timedelta(days=rng.randrange(1000))
+    await client.request(
+        "GET /currency/historical",
+        "GET",
+        "/api/currency/historical",
+        token,
+        params={"historical_date": str(day), "source": "USD", "currencies": "EUR"},
+    )
+    await client.request(
+        "GET /currency/timeframe",
+        "GET",
+        "/api/currency/timeframe",
+        token,
+        params={
+            "start_date": str(day),
+            "end_date": str(day + timedelta(days=rng.randrange(1, 90))),
+            "source": "USD",
+            "currencies": "EUR",
+        },
+    )
+
+
+SCENARIOS = {
+    "login": login_storm,
+    "quotes": quote_polling,
+    "convert": conversions,
+    "historical": historical,
+}
+
+
+async def run_http(
+    client: Client,
+    mix: dict[str, float],
+    concurrency: int,
+    deadline: float,
+    seed: int,
+    **params,
+):
+    """
+    Запускает concurrency воркеров, каждый из которых до deadline выполняет
+    сценарии, выбранные случайно с весами mix.
+    """
+    names, weights = list(mix), list(mix.values())
+
+    async def worker(number: int):
+        rng = random.Random(seed * 10007 + number)
+        while time.perf_counter() < deadline:
+            scenario = SCENARIOS[rng.choices(names, weights)[0]]
+            await scenario(client, rng, **params)
+
+    await asyncio.gather(*(worker(number) for number in range(concurrency)))
+
+
+async def run_websockets(
+    client: Client, sockets: int, pairs: list[str], deadline: float
+):
+    """
+    Подключает sockets WebSocket-клиентов, подписывает их на пары и до deadline
+    принимает рассылку курсов.
+
+    Записываются время от подключения до снимка курсов ("WS subscribe") и
+    разброс доставки одного обновления по всем соединениям ("WS fan-out"):
+    сколько после первого получателя его получил каждый следующий.
+    """
+    arrivals: dict[int, list[float]] = {}
+
+    async def socket():
+        token = next(client.tokens)
+        started = time.perf_counter()
+        try:
+            async with client.session.ws_connect(
+                client.base_url.replace("http", "ws", 1) + "/api/users/ws/",
+                headers=client.headers(token),
+            ) as ws:
+                await ws.send_str(json.dumps({"action": "subscribe", "pairs": pairs}))
+                while (remaining := deadline - time.perf_counter()) > 0:
+                    try:
+                        message = await ws.receive(timeout=remaining)
+                    except asyncio.TimeoutError:
+                        break
+                    if message.type != aiohttp.WSMsgType.TEXT:
+                        break
+                    try:
+                        data = json.loads(message.data)
+                    except ValueError:
+                        continue
+                    if not isinstance(data, dict):
+                        continue
+                    if data.get("t") == "snapshot":
+                        client.recorder.add(
+                            "WS subscribe", 101, time.perf_counter() - started
+                        )
+                    elif data.get("t") == "delta":
+                        arrivals.setdefault(data["s"], []).append(time.perf_counter())
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+            client.recorder.add(
+                "WS subscribe", type(error).__name__, time.perf_counter() - started
+            )
+
+    await asyncio.gather(*(socket() for _ in range(sockets)))
+    for times in arrivals.values():
+        first = min(times)
+        for arrived in times:
+            client.recorder.add("WS fan-out", 101, arrived - first)
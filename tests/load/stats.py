@@ -0,0 +1,131 @@
+import json
+import math
+import time
+from collections import Counter, defaultdict
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Перцентиль q (0..100) по методу ближайшего ранга."""
+    if not values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(values)))
+    return values[rank - 1]
+
+
+class Recorder:
+    """
+    Сбор задержек и статусов ответов по маршрутам.
+
+    Статус 429 (сработал ограничитель частоты запросов) учитывается отдельно от
+    ошибок: он показывает настройку лимитов, а не сбой приложения.
+    """
+
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, Counter] = defaultdict(Counter)
+        self.started = time.perf_counter()
+        self.finished: float | None = None
+        self.recording = True
+
+    def add(self, route: str, status: int | str, latency: float):
+        """Записывает один ответ; latency — в секундах."""
+        if not self.recording:
+            return
+        self.latencies[route].append(latency * 1000)
+        self.statuses[route][str(status)] += 1
+
+    def reset(self):
+        """Сбрасывает накопленные данные (после прогрева)."""
+        self.latencies.clear()
+        self.statuses.clear()
+        self.started = time.perf_counter()
+
+    def stop(self):
+        self.recording = False
+        self.finished = time.perf_counter()
+
+    def report(self) -> dict:
+        """Сводка по маршрутам: количество, пропускная способность, ошибки, перцентили в мс."""
+        duration = (self.finished or time.perf_counter()) - self.started
+        routes = {}
+        for route in sorted(self.latencies):
+            values = sorted(self.latencies[route])
+            statuses = self.statuses[route]
+            errors = sum(
+                count
+                for status, count in statuses.items()
+                if not status.isdigit() or int(status) >= 500
+            )
+            limited = statuses.get("429", 0)
+            routes[route] = {
+                "count": len(values),
+                "rps": round(len(values) / duration, 2),
+                "errors": errors,
+                "error_rate": round(errors / len(values), 4),
+                "limited": limited,
+                "p50": round(percentile(values, 50), 2),
+                "p95": round(percentile(values, 95), 2),
+                "p99": round(percentile(values, 99), 2),
+                "max": round(values[-1], 2),
+                "statuses": dict(statuses),
+            }
+        return {"duration": round(duration, 2), "routes": routes}
+
+
+def blocking_sites(path: str) -> dict:
+    """
+    Места блокировки цикла событий из сводок воркеров (LOOP_REPORT), объединенные по месту.
+
+    Returns:
+        dict: {место: {"count", "max_ms", "stack"}}, отсортированный по количеству.
+    """
+    sites: dict[str, dict] = {}
+    try:
+        with open(path) as file:
+            lines = file.read().splitlines()
+    except FileNotFoundError:
+        return {}
+    for line in lines:
+        for site, entry in json.loads(line)["sites"].items():
+            merged = sites.setdefault(site, {**entry, "count": 0, "max_ms": 0.0})
+            merged["count"] += entry["count"]
+            merged["max_ms"] = max(merged["max_ms"], entry["max_ms"])
+    return dict(sorted(sites.items(), key=lambda item: -item[1]["count"]))
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Сравнивает прогон с сохраненным базовым.
+
+    Регрессией считается рост p95/p99 или доли ошибок либо падение пропускной
+    способности больше чем на tolerance (доля) относительно базового прогона,
+    а также блокировка цикла событий в месте, которого нет в базовом прогоне.
+
+    Returns:
+        list[str]: Описания найденных регрессий.
+    """
+    regressions = []
+    for route, base in baseline["routes"].items():
+        now = current["routes"].get(route)
+        if now is None:
+            regressions.append(f"{route}: missing in current run")
+            continue
+        for metric in ("p95", "p99"):
+            if base[metric] and now[metric] > base[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{route}: {metric} {base[metric]} -> {now[metric]} ms"
+                )
+        if base["rps"] and now["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{route}: rps {base['rps']} -> {now['rps']}")
+        if now["error_rate"] > base["error_rate"] + tolerance / 10:
+            regressions.append(
+                f"{route}: error_rate {base['error_rate']} -> {now['error_rate']}"
+            )
+    if "blocking" in baseline:
+        for site, entry in current.get("blocking", {}).items():
+            if site not in baseline["blocking"]:
+                regressions.append(
+                    f"new event loop blocking in {site}: "
+                    f"{entry['count']} times, up to {entry['max_ms']} ms\n{entry['stack']}"
+                )
+    return regressions
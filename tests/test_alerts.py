@@ -0,0 +1,54 @@
+import contextlib
+
+import pytest
+from sqlalchemy import event
+
+from app.api.models import Alert
+from app.services.alerts import AlertEngine
+from app.services.broker import Broker
+from app.services.rates import RateBoard
+
+pytestmark = pytest.mark.anyio
+
+
+@contextlib.contextmanager
+def on_alerts_select(engine, callback):
+    """Вызывает callback, когда движок выполняет запрос загрузки алертов."""
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith("SELECT") and "FROM alerts" in statement:
+            callback()
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before)
+    try:
+        yield
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", before)
+
+
+async def test_changes_during_load_are_applied(db, make_user):
+    user = await make_user()
+    async with db.session() as session:
+        kept, removed = (
+            Alert(user_id=user.id, pair="EURXTS", direction="above", threshold=2),
+            Alert(user_id=user.id, pair="EURXTS", direction="above", threshold=3),
+        )
+        session.add_all([kept, removed])
+        await session.commit()
+    engine = AlertEngine(RateBoard("USD"), Broker())
+    created_id = 2**62
+
+    def change():
+        # Изменения других воркеров, пришедшие через брокер во время запроса:
+        # алерт, созданный после начала снимка, и удаление алерта из снимка,
+        # а также повтор добавления алерта, уже попавшего в снимок.
+        engine.add(created_id, "EURXTS", "above", 2.5)
+        engine.remove(removed.id, "EURXTS", "above", 3.0)
+        engine.add(kept.id, "EURXTS", "above", 2.0)
+
+    with on_alerts_select(db.engine, change):
+        await engine.load()
+
+    alerts = engine.pairs["EURXTS"]
+    assert alerts.ids["above"].tolist() == [kept.id, created_id]
+    assert alerts.thresholds["above"].tolist() == [2.0, 2.5]
@@ -0,0 +1,67 @@
+import asyncio
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select, update
+
+from app.api.models import Balance, User
+from app.utils.balances import find_or_create_balance, lock_balances
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_locked_balances_are_reread_from_database(db, make_user):
+    user = await make_user(USD="100.00", EUR="10.00")
+    async with db.session() as session:
+        loaded = await session.scalar(select(User).where(User.id == user.id))
+        assert {b.currency for b in loaded.balances} == {"USD", "EUR"}
+
+        async with db.session() as other:
+            await other.execute(
+                update(Balance)
+                .where(Balance.user_id == user.id)
+                .values(amount=Balance.amount + 1)
+            )
+            await other.commit()
+
+        balances = await lock_balances(session, user.id, ["USD", "EUR", "GBP"])
+        usd = await find_or_create_balance(session, user.id, "USD")
+        gbp = await find_or_create_balance(session, user.id, "GBP", Decimal("5"))
+
+        assert {c: b.amount for c, b in balances.items()} == {
+            "USD": Decimal("101.00"),
+            "EUR": Decimal("11.00"),
+        }
+        assert usd is balances["USD"]
+        assert gbp.amount == Decimal("5")
+        await session.rollback()
+
+
+async def test_concurrent_creation_shares_one_balance(db, make_user):
+    user = await make_user(USD="1.00")
+    async with db.session() as first, db.session() as second:
+        balance = await find_or_create_balance(first, user.id, "XTS")
+        balance.amount += Decimal("5")
+        await first.flush()
+
+        async def top_up():
+            other = await find_or_create_balance(second, user.id, "XTS")
+            other.amount += Decimal("7")
+            await second.commit()
+
+        # Вторая транзакция ждет, пока первая не завершится, и получает ее баланс.
+        task = asyncio.create_task(top_up())
+        await asyncio.sleep(0.1)
+        assert not task.done()
+        await first.commit()
+        await task
+
+    async with db.session() as session:
+        amounts = (
+            await session.scalars(
+                select(Balance.amount).where(
+                    Balance.user_id == user.id, Balance.currency == "XTS"
+                )
+            )
+        ).all()
+    assert amounts == [Decimal("12.00")]
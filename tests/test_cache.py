@@ -0,0 +1,143 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import msgpack
+import pytest
+from fastapi_cache.coder import JsonCoder
+
+from app.services import redis_tools
+from app.services.redis_tools import BinaryCoder, Decoded, HotCache
+from app.utils import codec
+
+VALUE = {
+    "rate": Decimal("92.501200"),
+    "date": date(2024, 4, 1),
+    "updated": datetime(2024, 4, 1, 12, 30, 5),
+    "history": [{"currency": "USD", "amount": 1.5}, None, True],
+}
+# Так значение VALUE отдает эндпоинт в JSON-ответе.
+EXPECTED = {
+    "rate": "92.501200",
+    "date": "2024-04-01",
+    "updated": "2024-04-01T12:30:05",
+    "history": [{"currency": "USD", "amount": 1.5}, None, True],
+}
+
+
+def test_msgpack_round_trip():
+    data = codec.encode(VALUE)
+
+    assert data[:2] == codec.MSGPACK == b"\xc1m"
+    assert codec.decode(data) == EXPECTED
+
+
+def test_large_values_are_compressed():
+    value = {"history": [VALUE] * 100}
+    # Порог сравнивается с размером msgpack без заголовка.
+    size = len(codec.encode(value)) - 2
+
+    small = codec.encode(VALUE, compress=size)
+    data = codec.encode(value, compress=size)
+
+    assert small[:2] == codec.MSGPACK
+    assert data[:2] == codec.MSGPACK_ZLIB == b"\xc1z"
+    assert len(data) < size
+    assert codec.decode(data) == {"history": [EXPECTED] * 100}
+
+
+def test_incompressible_value_is_stored_uncompressed():
+    value = bytes(range(256))
+
+    data = codec.encode(value, compress=1)
+
+    assert data[:2] == codec.MSGPACK
+    assert codec.decode(data) == value
+
+
+@pytest.mark.parametrize("convert", [str, str.encode])
+def test_legacy_json_value(convert):
+    data = convert(JsonCoder.encode(VALUE))
+
+    # JsonCoder возвращает даты со временем pendulum в UTC.
+    assert codec.decode(data) == {
+        **VALUE,
+        "updated": VALUE["updated"].replace(tzinfo=timezone.utc),
+    }
+
+
+def test_header_is_not_valid_msgpack_or_json():
+    # Байт 0xC1 зарезервирован в msgpack и не может начинать JSON.
+    with pytest.raises(msgpack.exceptions.FormatError):
+        msgpack.unpackb(codec.MSGPACK + b"\x90")
+    with pytest.raises(ValueError):
+        JsonCoder.decode(codec.MSGPACK)
+
+
+def test_binary_coder_returns_hot_value():
+    data = BinaryCoder.encode(VALUE)
+
+    assert BinaryCoder.decode(data) == EXPECTED
+    assert BinaryCoder.decode(Decoded(data, "hot")) == "hot"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Подменяет часы HotCache; clock.now сдвигается вручную."""
+
+    class Clock:
+        now = 1000.0
+
+    clock = Clock()
+    monkeypatch.setattr(redis_tools.time, "monotonic", lambda: clock.now)
+    return clock
+
+
+def value(size: int) -> Decoded:
+    return Decoded(b"x" * size, size)
+
+
+def test_hot_cache_expires_with_local_ttl(clock):
+    cache = HotCache(limit=100, ttl=5)
+    cache.put("key", value(10), ttl=60)
+
+    clock.now += 4
+    remaining, hit = cache.get("key")
+    assert (remaining, hit.value) == (56, 10)
+
+    clock.now += 1
+    assert cache.get("key") is None
+    assert cache._size == 0
+
+
+def test_hot_cache_expires_with_redis_ttl(clock):
+    cache = HotCache(limit=100, ttl=5)
+    cache.put("key", value(10), ttl=2)
+    cache.put("forever", value(10))
+
+    clock.now += 2
+    assert cache.get("key") is None
+    assert cache.get("forever") == (3, value(10))
+
+
+def test_hot_cache_evicts_least_recently_read(clock):
+    cache = HotCache(limit=30, ttl=5)
+    for key in "abc":
+        cache.put(key, value(10))
+    cache.get("a")
+
+    cache.put("d", value(10))
+
+    assert [key for key in "abcd" if cache.get(key)] == ["a", "c", "d"]
+    assert cache._size == 30
+
+
+def test_hot_cache_skips_values_over_limit(clock):
+    cache = HotCache(limit=30, ttl=5)
+    cache.put("a", value(10))
+
+    cache.put("big", value(31))
+    cache.put("a", value(20))
+
+    assert cache.get("big") is None
+    assert cache.get("a")[1].value == 20
+    assert cache._size == 20
@@ -0,0 +1,319 @@
+import contextlib
+import json
+from decimal import Decimal
+from types import SimpleNamespace
+from urllib.parse import urlencode
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import delete, event, select, text
+from sqlalchemy.dialects.postgresql import insert
+from starlette.requests import Request
+
+from app.api.admin.pagination import KeysetPaginationMixin
+from app.api.auth.security import create_access_token, login
+from app.api.endpoints import alerts as alert_endpoints
+from app.api.endpoints import orders as order_endpoints
+from app.api.endpoints import users as user_endpoints
+from app.api.models import Alert, Balance, CurrencyRate, Email, Order, User
+from app.services.alerts import AlertEngine
+from app.services.broker import Broker
+from app.services.mailer import EmailWorker
+from app.services.orders import OrderEngine
+from app.services.rates import RateBoard
+from app.services.redis_tools import RedisClient
+from app.services.reports import HoldingsReport
+from app.services.valuation import ValuationService
+from app.services.websocket_manager import ws_manager
+from app.utils.users import get_current_user
+from main import admin
+
+pytestmark = pytest.mark.anyio
+
+USERS = 20000
+CURRENCIES = ["USD", "EUR", "RUB", "GBP", "JPY", "CNY", "CHF", "KZT"]
+
+# Справочные таблицы размером в десятки строк, полный просмотр которых дешевле индекса.
+SMALL_TABLES = {"currency_rates", "holding_totals"}
+
+
+async def seed(db, prefix: str, users: int) -> list[str]:
+    """
+    Заполняет базу пользователями с балансами, алертами, ордерами и письмами.
+
+    Возвращает валюты, курсы которых добавлены в currency_rates.
+    """
+
+    pattern = {"pattern": f"{prefix}%"}
+    async with db.session() as session:
+        rows = [{"currency": code, "rate": 1, "reference": 1} for code in CURRENCIES]
+        stmt = insert(CurrencyRate).values(rows).on_conflict_do_nothing()
+        rates = (await session.scalars(stmt.returning(CurrencyRate.currency))).all()
+        await session.execute(
+            text(
+                """
+                INSERT INTO users (username, password, email, created_at, is_admin)
+                SELECT CAST(:prefix AS varchar) || i, 'x',
+                       CAST(:prefix AS varchar) || i || '@example.com',
+                       current_date - (i % 1000), false
+                FROM generate_series(1, :users) AS i
+                """
+            ),
+            {"prefix": prefix, "users": users},
+        )
+        await session.execute(
+            text(
+                """
+                INSERT INTO balances (user_id, currency, amount)
+                SELECT u.id, codes[1 + (u.id + k) % cardinality(codes)],
+                       round(exp((u.id * 7919 + k * 104729) % 1000 / 90.0)::numeric, 2)
+                FROM users u, generate_series(0, 2) AS k,
+                     CAST(:codes AS varchar[]) AS codes
+                WHERE u.username LIKE :pattern
+                """
+            ),
+            {**pattern, "codes": CURRENCIES},
+        )
+        await session.execute(
+            text(
+                """
+                INSERT INTO alerts (user_id, pair, direction, threshold, created_at)
+                SELECT id, 'EURUSD', 'above', 1 + (id % 100) / 100.0, now()
+                FROM users
+                WHERE username LIKE :pattern AND id % 10 = 0
+                """
+            ),
+            pattern,
+        )
+        await session.execute(
+            text(
+                """
+                INSERT INTO orders (user_id, source, currency, amount, condition,
+                                    trigger_rate, status, created_at)
+                SELECT u.id, b.currency, 'EUR', 10, 'le', 0.5, 'open', now()
+                FROM users u
+                JOIN balances b ON b.user_id = u.id AND b.currency <> 'EUR'
+                WHERE u.username LIKE :pattern AND u.id % 10 = 0
+                """
+            ),
+            pattern,
+        )
+        await session.execute(
+            text(
+                """
+                INSERT INTO fills (order_id, user_id, rate, amount_from, amount_to,
+                                   created_at)
+                SELECT o.id, o.user_id, 0.9, o.amount, o.amount * 0.9, now()
+                FROM orders o
+                JOIN users u ON u.id = o.user_id
+                WHERE u.username LIKE :pattern AND o.id % 2 = 0
+                """
+            ),
+            pattern,
+        )
+        await session.execute(
+            text(
+                """
+                INSERT INTO emails (recipient, subject, body, status, attempts,
+                                    next_attempt_at, created_at, sent_at)
+                SELECT email, 'seed', 'seed', 'sent', 1, now(), now(), now()
+                FROM users
+                WHERE username LIKE :pattern
+                """
+            ),
+            pattern,
+        )
+        await session.commit()
+    async with db.connect() as connection:
+        await connection.execute(text("ANALYZE"))
+    return rates
+
+
+async def cleanup(db, prefix: str, rates: list[str]):
+    """Удаляет пользователей с префиксом prefix вместе с их данными и курсы rates."""
+
+    async with db.session() as session:
+        await session.execute(
+            delete(CurrencyRate).where(CurrencyRate.currency.in_(rates))
+        )
+        users = select(User.id).where(User.username.startswith(prefix))
+        emails = select(User.email).where(User.username.startswith(prefix))
+        await session.execute(delete(Email).where(Email.recipient.in_(emails)))
+        await session.execute(delete(Order).where(Order.user_id.in_(users)))
+        await session.execute(delete(Alert).where(Alert.user_id.in_(users)))
+        await session.execute(delete(Balance).where(Balance.user_id.in_(users)))
+        await session.execute(delete(User).where(User.id.in_(users)))
+        await session.commit()
+
+
+@pytest.fixture
+async def explain_data(db):
+    prefix = f"explain_{uuid4().hex[:8]}_"
+    rates = []
+    try:
+        rates = await seed(db, prefix, USERS)
+        yield prefix
+    finally:
+        await cleanup(db, prefix, rates)
+
+
+@pytest.fixture
+def board(monkeypatch):
+    """Курсы и внешние сервисы горячих путей без Redis и внешнего API."""
+
+    board = RateBoard("USD")
+    board.quotes = {code: 1 + i / 10 for i, code in enumerate(CURRENCIES)}
+
+    async def get_currencies():
+        return {code: code for code in CURRENCIES}
+
+    async def get_exchange(source: str, currencies: list[str]):
+        return {
+            "quotes": {f"{source}{c}": board.rate(f"{source}{c}") for c in currencies}
+        }
+
+    async def ignore(*args, **kwargs):
+        pass
+
+    monkeypatch.setattr(RedisClient, "get_currencies", get_currencies)
+    monkeypatch.setattr(user_endpoints, "get_exchange", get_exchange)
+    monkeypatch.setattr(ws_manager, "send_to_user", ignore)
+    monkeypatch.setattr(order_endpoints.order_engine, "publish", ignore)
+    monkeypatch.setattr(alert_endpoints.alert_engine, "publish", ignore)
+    return board
+
+
+@contextlib.contextmanager
+def captured_statements(engine):
+    """Собирает SELECT, UPDATE и DELETE, выполненные движком внутри блока."""
+
+    statements: dict[str, tuple] = {}
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if executemany:
+            return
+        if statement.lstrip("( \n").upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            statements.setdefault(statement, parameters)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+
+class AbortingPool:
+    """Пул SMTP, прерывающий пачку писем, чтобы не менять чужие письма outbox."""
+
+    class Abort(Exception):
+        pass
+
+    async def send(self, message):
+        raise self.Abort
+
+
+def list_request(**params: str) -> Request:
+    query = urlencode(params).encode()
+    return Request({"type": "http", "query_string": query, "headers": []})
+
+
+async def run_hot_paths(db, board: RateBoard, prefix: str):
+    """Выполняет запросы приложения теми же функциями, что эндпоинты и воркеры."""
+
+    async with db.session() as session:
+        user_id, username = (
+            await session.execute(
+                select(User.id, User.username)
+                .where(User.username.startswith(prefix), User.id % 10 == 0)
+                .order_by(User.id)
+                .limit(1)
+            )
+        ).one()
+        orders = (
+            await session.scalars(select(Order.id).where(Order.user_id == user_id))
+        ).all()
+        alerts = (
+            await session.scalars(
+                select(Alert.id).where(Alert.user_id.in_([user_id, user_id + 10]))
+            )
+        ).all()
+
+    async with db.session() as session:
+        with contextlib.suppress(HTTPException, ValueError):
+            await login(SimpleNamespace(username=username, password="x"), session)
+        token = create_access_token(data={"user_id": user_id})
+        user = await get_current_user(token, session)
+        await user_endpoints.update_balance(
+            SimpleNamespace(currency="EUR", amount=Decimal("5")), user, session
+        )
+        source = next(b.currency for b in user.balances if b.currency != "EUR")
+        await user_endpoints.convert_user_currency(
+            request=None,
+            source=source,
+            currency="EUR",
+            amount=Decimal("1"),
+            user=user,
+            session=session,
+        )
+        await alert_endpoints.list_alerts(user=user, session=session)
+        await order_endpoints.list_orders(user=user, session=session)
+        await order_endpoints.cancel_order(orders[0], user=user, session=session)
+        await alert_endpoints.delete_alert(alerts[0], user=user, session=session)
+        await ValuationService(board).value_users(session, [user_id], "USD")
+
+    await OrderEngine(board, Broker())._execute_batch(orders[1:])
+    await AlertEngine(board, Broker())._dispatch_batch(alerts[1:])
+    async with db.session() as session:
+        with contextlib.suppress(AbortingPool.Abort):
+            await EmailWorker(AbortingPool()).process_batch(session)
+
+    report = HoldingsReport(board, interval=60)
+    await report.holdings()
+    await report.top_users()
+
+    for view in admin.views:
+        if not isinstance(view, KeysetPaginationMixin):
+            continue
+        for column in view._sort_fields:
+            cursor = (await view.list(list_request(sortBy=column))).last
+            await view.list(list_request(sortBy=column, after=cursor))
+            await view.list(list_request(sortBy=column, sort="desc", before=cursor))
+        await view.list(list_request(search=username if view.model is User else "US"))
+
+
+def seq_scans(plan: dict) -> list[str]:
+    """Таблицы, которые план читает полным просмотром."""
+
+    found = []
+    if plan.get("Node Type") == "Seq Scan":
+        if plan.get("Relation Name") not in SMALL_TABLES:
+            found.append(plan.get("Relation Name"))
+    for child in plan.get("Plans", []):
+        found += seq_scans(child)
+    return found
+
+
+async def test_queries_use_indexes(db, board, explain_data):
+    with captured_statements(db.engine) as statements:
+        await run_hot_paths(db, board, explain_data)
+
+    queries = "\n".join(statements)
+    assert "FOR UPDATE SKIP LOCKED" in queries
+    assert "UPDATE alerts" in queries
+    assert "FROM user_totals" in queries
+
+    failures = []
+    async with db.connect() as connection:
+        for statement, parameters in statements.items():
+            result = await connection.exec_driver_sql(
+                f"EXPLAIN (FORMAT JSON) {statement}", parameters
+            )
+            plan = result.scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            tables = seq_scans(plan[0]["Plan"])
+            if tables:
+                query = " ".join(statement.split())
+                failures.append(f"seq scan on {', '.join(tables)}: {query}")
+    assert not failures, "\n".join(failures)
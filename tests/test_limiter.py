@@ -0,0 +1,174 @@
+import time
+from datetime import datetime, timedelta
+
+import jwt
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+from starlette.websockets import WebSocket
+
+from app.core.config import settings
+from app.services import limiter as limiter_module
+from app.services.limiter import (
+    HybridLimiter,
+    TokenBucket,
+    WebSocketRateLimiter,
+    _identify,
+)
+from app.services.redis_tools import RedisClient
+
+pytestmark = pytest.mark.anyio
+
+
+class FakePipeline:
+    """Конвейер, возвращающий заданные остатки общих ведер вместо Redis."""
+
+    def __init__(self, remaining, on_execute=None):
+        self.remaining = remaining
+        self.on_execute = on_execute
+        self.calls = []
+
+    async def execute(self):
+        if self.on_execute is not None:
+            self.on_execute()
+        if isinstance(self.remaining, Exception):
+            raise self.remaining
+        return self.remaining
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """Подменяет конвейер Redis; pipeline.set(...) задает ответ следующей сверки."""
+
+    class Holder:
+        pipe: FakePipeline
+
+        def set(self, remaining, on_execute=None):
+            self.pipe = FakePipeline(remaining, on_execute)
+
+    holder = Holder()
+    monkeypatch.setattr(RedisClient, "pipeline", lambda *args, **kwargs: holder.pipe)
+    return holder
+
+
+@pytest.fixture
+def hybrid():
+    limiter = HybridLimiter(sync=1, rules={}, tiers={})
+
+    async def script(keys, args, client):
+        client.calls.append((keys, args))
+
+    limiter._script = script
+    return limiter
+
+
+def test_bucket_waits_for_refill():
+    bucket = TokenBucket(capacity=2, rate=1, now=0)
+
+    assert bucket.take(0) == 0
+    assert bucket.take(0) == 0
+    assert bucket.take(0) == pytest.approx(1)
+    assert bucket.take(0.5) == pytest.approx(0.5)
+    assert bucket.take(1) == 0
+    assert bucket.spent == 3
+
+
+async def test_reconcile_sends_spent_and_carries_debt(hybrid, pipeline):
+    for _ in range(4):
+        assert hybrid.hit("/route", "user:1", "user", times=10, seconds=10) == 0
+    pipeline.set(["-3"])
+
+    await hybrid.reconcile()
+
+    ((keys, args),) = pipeline.pipe.calls
+    assert keys == ["limiter:/route:user:1"]
+    assert args[2] == 4
+    bucket = hybrid._buckets["/route:user:1"]
+    assert bucket.spent == 0
+    assert bucket.tokens == pytest.approx(-3, abs=0.01)
+    # Долг отсрочивает следующий запрос, пока ведро не пополнится до токена.
+    assert hybrid.hit("/route", "user:1", "user", times=10, seconds=10) > 3
+
+
+async def test_reconcile_keeps_tokens_taken_during_sync(hybrid, pipeline):
+    hybrid.hit("/route", "user:1", "user", times=10, seconds=10)
+
+    def hit_during_sync():
+        hybrid.hit("/route", "user:1", "user", times=10, seconds=10)
+        hybrid.hit("/route", "user:1", "user", times=10, seconds=10)
+
+    pipeline.set(["9"], on_execute=hit_during_sync)
+
+    await hybrid.reconcile()
+
+    bucket = hybrid._buckets["/route:user:1"]
+    assert bucket.spent == 2
+    assert bucket.tokens == pytest.approx(7, abs=0.01)
+
+
+async def test_reconcile_drops_idle_buckets(hybrid, pipeline):
+    hybrid.hit("/route", "user:1", "user", times=10, seconds=10)
+    pipeline.set(["9"])
+    await hybrid.reconcile()
+    bucket = hybrid._buckets["/route:user:1"]
+    bucket.updated -= 1
+
+    pipeline.set(["10"])
+    await hybrid.reconcile()
+
+    assert hybrid._buckets == {}
+
+
+async def test_reconcile_restores_spent_on_failure(hybrid, pipeline):
+    for _ in range(3):
+        hybrid.hit("/route", "user:1", "user", times=10, seconds=10)
+    pipeline.set(ConnectionError("redis is down"))
+
+    with pytest.raises(ConnectionError):
+        await hybrid.reconcile()
+
+    bucket = hybrid._buckets["/route:user:1"]
+    assert bucket.spent == 3
+    assert bucket.tokens == pytest.approx(7, abs=0.01)
+
+
+def request_with(token: str) -> Request:
+    headers = [(b"authorization", f"Bearer {token}".encode())]
+    return Request({"type": "http", "headers": headers})
+
+
+def test_identity_cache_expires_with_token(monkeypatch):
+    expire = datetime.utcnow() + timedelta(seconds=60)
+    token = jwt.encode(
+        {"user_id": 7, "expire": expire.strftime("%Y-%m-%d %H:%M:%S")},
+        settings.AUTH.KEY,
+        "HS256",
+    )
+
+    assert _identify(request_with(token)) == ("user:7", "user")
+
+    later = time.time() + 120
+    monkeypatch.setattr(limiter_module.time, "time", lambda: later)
+    assert _identify(request_with(token)) == ("", "anonymous")
+
+
+def test_identity_cache_rejects_invalid_token():
+    assert _identify(request_with("not-a-token")) == ("", "anonymous")
+
+
+async def test_websocket_rules_have_separate_buckets(monkeypatch):
+    hybrid = HybridLimiter(sync=1, rules={"ws:rates": "2/60"}, tiers={})
+    monkeypatch.setattr(limiter_module, "limiter", hybrid)
+    ws = WebSocket({"type": "websocket", "headers": []}, None, None)
+    messages = WebSocketRateLimiter(times=1, seconds=60)
+    subscriptions = WebSocketRateLimiter(times=10, seconds=1, rule="ws:rates")
+
+    await messages(ws, context_key="7")
+    await subscriptions(ws, context_key="7")
+    await subscriptions(ws, context_key="7")
+
+    for ratelimit in (messages, subscriptions):
+        with pytest.raises(HTTPException) as error:
+            await ratelimit(ws, context_key="7")
+        assert error.value.status_code == 429
+    assert sorted(hybrid._buckets) == ["ws:7", "ws:rates:7"]
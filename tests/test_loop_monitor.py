@@ -0,0 +1,64 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services import loop_monitor
+from app.services.loop_monitor import LoopMonitor
+
+pytestmark = pytest.mark.anyio
+
+
+def short_block():
+    time.sleep(0.15)
+
+
+def long_block():
+    time.sleep(0.4)
+
+
+async def run_blocks(*blocks, pause: float = 0.05) -> dict[str, dict]:
+    """Блокирует цикл функциями blocks под контролем монитора и возвращает места по имени функции."""
+    monitor = LoopMonitor(interval=0.01, threshold=0.05, cooldown=60)
+    await monitor.start()
+    try:
+        for block in blocks:
+            await asyncio.sleep(pause)
+            block()
+        await asyncio.sleep(0.05)
+    finally:
+        await monitor.stop()
+
+    return {site.rsplit(":", 1)[1]: entry for site, entry in monitor.sites.items()}
+
+
+async def test_blocks_are_attributed_to_their_sites():
+    sites = await run_blocks(long_block, short_block, short_block)
+
+    assert sorted(sites) == ["long_block", "short_block"]
+    assert sites["long_block"]["count"] == 1
+    assert sites["short_block"]["count"] == 2
+    assert 350 <= sites["long_block"]["max_ms"] < 550
+    assert 100 <= sites["short_block"]["max_ms"] < 300
+    assert "long_block" in sites["long_block"]["stack"]
+
+
+async def test_block_ending_during_stack_capture(monkeypatch):
+    find_site = loop_monitor.blocking_site
+    calls = []
+
+    def slow_blocking_site(frame):
+        site = find_site(frame)
+        calls.append(site)
+        if len(calls) == 1:
+            # Блокировка заканчивается, и проба выполняется раньше, чем
+            # поток успевает записать найденное место.
+            time.sleep(0.5)
+        return site
+
+    monkeypatch.setattr(loop_monitor, "blocking_site", slow_blocking_site)
+
+    sites = await run_blocks(long_block, short_block, pause=0.6)
+
+    assert 350 <= sites["long_block"]["max_ms"] < 550
+    assert 100 <= sites["short_block"]["max_ms"] < 300
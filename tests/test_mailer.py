@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, text
+
+from app.api.models import Email
+from app.core.config import settings
+from app.services.mailer import EmailWorker, SMTPPool
+from app.services.smtp_stub import SMTPStub
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def stub():
+    async with SMTPStub() as stub:
+        yield stub
+
+
+@pytest.fixture
+async def pool(stub):
+    pool = SMTPPool("127.0.0.1", stub.port, use_tls=False, size=1)
+    yield pool
+    await pool.close()
+
+
+async def enqueue(db, recipient: str) -> int:
+    async with db.session() as session:
+        email = Email(recipient=recipient, subject="Тест", body="Тело письма")
+        session.add(email)
+        await session.commit()
+        return email.id
+
+
+async def load(db, email_id: int) -> Email:
+    async with db.session() as session:
+        return await session.scalar(select(Email).where(Email.id == email_id))
+
+
+async def test_email_is_sent(db, make_user, stub, pool):
+    user = await make_user()
+    email_id = await enqueue(db, user.email)
+
+    await EmailWorker(pool).run(once=True)
+
+    email = await load(db, email_id)
+    assert (email.status, email.attempts, email.last_error) == ("sent", 1, None)
+    assert email.sent_at is not None
+    assert [message["To"] for message in stub.messages] == [user.email]
+
+
+async def test_failed_email_is_retried_later(db, make_user, stub, pool):
+    user = await make_user()
+    email_id = await enqueue(db, user.email)
+    worker = EmailWorker(pool)
+    stub.reject = 1
+
+    started = datetime.utcnow()
+    async with db.session() as session:
+        assert await worker.process_batch(session) == 1
+    finished = datetime.utcnow()
+
+    email = await load(db, email_id)
+    assert (email.status, email.attempts) == ("pending", 1)
+    assert "451" in email.last_error
+    delay = worker.retry_delay(1)
+    assert delay == timedelta(seconds=settings.EMAIL.BACKOFF)
+    assert started + delay <= email.next_attempt_at <= finished + delay
+    assert stub.messages == []
+    # До истечения задержки письмо не забирается повторно.
+    async with db.session() as session:
+        assert await worker.process_batch(session) == 0
+
+
+async def test_email_fails_after_retries(db, make_user, stub, pool):
+    user = await make_user()
+    email_id = await enqueue(db, user.email)
+    stub.reject = settings.EMAIL.RETRIES + 1
+
+    # Без задержки повторные попытки выполняются подряд до исчерпания.
+    await EmailWorker(pool, backoff=0).run(once=True)
+
+    email = await load(db, email_id)
+    assert (email.status, email.attempts) == ("failed", settings.EMAIL.RETRIES)
+    assert stub.reject == 1
+    assert stub.messages == []
+
+
+async def test_server_default_is_utc(db, make_user, stub, pool):
+    user = await make_user()
+    async with db.session() as session:
+        await session.execute(text("SET LOCAL TIME ZONE 'Asia/Vladivostok'"))
+        email_id = (
+            await session.execute(
+                text(
+                    "INSERT INTO emails (recipient, subject, body) "
+                    "VALUES (:recipient, 'Тест', 'Тело письма') RETURNING id"
+                ),
+                {"recipient": user.email},
+            )
+        ).scalar()
+        await session.commit()
+
+    email = await load(db, email_id)
+    assert abs(email.created_at - datetime.utcnow()) < timedelta(minutes=1)
+    assert email.next_attempt_at == email.created_at
+
+    await EmailWorker(pool).run(once=True)
+
+    assert (await load(db, email_id)).status == "sent"
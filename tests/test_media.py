@@ -0,0 +1,118 @@
+import pytest
+from starlette.requests import Request
+
+from app.api.endpoints.media import get_media
+from app.exceptions import handlers
+from app.services.media import UploadLimitMiddleware, media_store
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def no_translation(monkeypatch):
+    monkeypatch.setattr(handlers, "translate_details", lambda string, request: string)
+
+
+async def call(middleware, chunks: list[bytes], headers: list[tuple[bytes, bytes]]):
+    """Отправляет запрос частями chunks и возвращает отправленные сообщения и прочитанные части."""
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/upload",
+        "query_string": b"",
+        "headers": headers,
+    }
+    incoming = [
+        {"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1}
+        for i, chunk in enumerate(chunks)
+    ]
+    pulled = []
+    sent = []
+
+    async def receive():
+        pulled.append(incoming[len(pulled)])
+        return pulled[-1]
+
+    async def send(message):
+        sent.append(message)
+
+    await middleware(scope, receive, send)
+    return sent, pulled
+
+
+async def reading_app(scope, receive, send):
+    """Приложение, дочитывающее тело до конца, как разбор формы FastAPI."""
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        if not message.get("more_body"):
+            break
+    await send({"type": "http.response.start", "status": 201, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def test_rejects_declared_length_without_reading_body():
+    middleware = UploadLimitMiddleware(reading_app, ("/upload",), limit=10)
+
+    sent, pulled = await call(middleware, [b"x" * 20], [(b"content-length", b"20")])
+
+    assert sent[0]["status"] == 413
+    assert pulled == []
+
+
+async def test_stops_reading_once_limit_is_exceeded():
+    middleware = UploadLimitMiddleware(reading_app, ("/upload",), limit=10)
+
+    sent, pulled = await call(middleware, [b"x" * 6] * 5, [])
+
+    assert [m["status"] for m in sent if m["type"] == "http.response.start"] == [413]
+    assert len(pulled) == 2
+
+
+async def test_passes_small_body():
+    middleware = UploadLimitMiddleware(reading_app, ("/upload",), limit=10)
+
+    sent, pulled = await call(middleware, [b"x" * 5, b"x" * 5], [])
+
+    assert sent[0]["status"] == 201
+    assert len(pulled) == 2
+
+
+DIGEST = "ab" * 32
+
+
+def media_request(etag: str) -> Request:
+    return Request({"type": "http", "headers": [(b"if-none-match", etag.encode())]})
+
+
+@pytest.fixture
+def media_root(tmp_path, monkeypatch):
+    monkeypatch.setattr(media_store, "root", tmp_path)
+    monkeypatch.setattr(media_store, "thumbs", tmp_path / "thumbs")
+    (tmp_path / "thumbs").mkdir()
+    return tmp_path
+
+
+async def test_cached_thumbnail_is_not_modified_without_disk(media_root):
+    etag = f'"{DIGEST}-{media_store.size}"'
+
+    response = await get_media(f"{DIGEST}.png", media_request(etag))
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+
+
+async def test_original_served_instead_of_thumbnail_is_replaced_once_ready(media_root):
+    (media_root / f"{DIGEST}.png").write_bytes(b"png")
+    request = media_request(f'"{DIGEST}"')
+
+    response = await get_media(f"{DIGEST}.png", request)
+    assert response.status_code == 304
+    assert response.headers["cache-control"] == "public, max-age=60"
+
+    media_store.thumbnail_path(f"{DIGEST}.png").write_bytes(b"webp")
+    response = await get_media(f"{DIGEST}.png", request)
+    assert response.status_code == 200
+    assert response.headers["etag"] == f'"{DIGEST}-{media_store.size}"'
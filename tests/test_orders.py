@@ -0,0 +1,99 @@
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+
+from app.api.models import Balance, Email, Order
+from app.services.broker import Broker
+from app.services.orders import OrderBook, OrderEngine
+from app.services.rates import RateBoard
+from app.services.websocket_manager import ws_manager
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    async def send_to_user(user_id, message):
+        pass
+
+    monkeypatch.setattr(ws_manager, "send_to_user", send_to_user)
+    board = RateBoard("USD")
+    board.quotes = {"USD": 1.0, "EUR": 0.9}
+    return OrderEngine(board, Broker())
+
+
+async def create_orders(db, user, *orders: tuple[str, str, str]) -> list[Order]:
+    rows = [
+        Order(user_id=user.id, source=source, currency=currency, amount=Decimal(amount))
+        for source, currency, amount in orders
+    ]
+    async with db.session() as session:
+        session.add_all(rows)
+        await session.commit()
+    return rows
+
+
+async def user_balances(db, user) -> dict[str, Decimal]:
+    async with db.session() as session:
+        result = await session.execute(
+            select(Balance.currency, Balance.amount).where(Balance.user_id == user.id)
+        )
+        return dict(result.all())
+
+
+async def test_batch_credits_balance_drained_by_earlier_order(db, make_user, engine):
+    user = await make_user(USD="100.00")
+    orders = await create_orders(
+        db, user, ("USD", "EUR", "100.00"), ("EUR", "USD", "50.00")
+    )
+
+    await engine._execute_batch([order.id for order in orders])
+
+    eur = round(Decimal("100.00") * Decimal(str(engine.board.rate("USDEUR"))), 2)
+    usd = round(Decimal("50.00") * Decimal(str(engine.board.rate("EURUSD"))), 2)
+    assert await user_balances(db, user) == {"EUR": eur - 50, "USD": usd}
+
+
+async def test_order_without_rate_is_rejected_with_own_reason(db, make_user, engine):
+    user = await make_user(USD="100.00")
+    (order,) = await create_orders(db, user, ("USD", "XXX", "10.00"))
+
+    await engine._execute_batch([order.id])
+
+    async with db.session() as session:
+        status = await session.scalar(select(Order.status).where(Order.id == order.id))
+        body = await session.scalar(
+            select(Email.body).where(Email.recipient == user.email)
+        )
+    assert status == "rejected"
+    assert "no exchange rate for USD/XXX" in body
+    assert await user_balances(db, user) == {"USD": Decimal("100.00")}
+
+
+async def test_failed_batch_returns_orders_to_book(engine):
+    async def fail(ids):
+        raise ConnectionError
+
+    engine.book.add(1, "USDEUR", "ge", 0.5, None)
+    engine.book.add(2, "USDEUR", "ge", 2.0, None)
+    engine._execute_batch = fail
+
+    await engine.execute(engine.book.pop_triggered("USDEUR", 0.9))
+
+    assert len(engine.book) == 2
+    assert engine.book.pop_triggered("USDEUR", 0.9) == [1]
+
+
+def test_order_book_forgets_done_and_cancelled_orders():
+    book = OrderBook()
+    book.add(1, "USDEUR", "le", 1.0, None)
+    book.add(2, "USDEUR", "le", 1.0, None)
+
+    assert book.pop_triggered("USDEUR", 0.9) == [1, 2]
+    book.done([1])
+    book.cancel(2)
+    book.restore([1, 2])
+
+    assert len(book) == 0
+    assert book.pop_triggered("USDEUR", 0.5) == []
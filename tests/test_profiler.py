@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+from starlette.requests import Request
+
+from app.api.admin.model import ProfilerView
+from app.services.profiler import ProfilerMiddleware, profiler
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("seconds", ["abc", "nan", "inf"])
+async def test_profiler_run_rejects_bad_seconds(seconds):
+    request = Request(
+        {"type": "http", "query_string": f"seconds={seconds}".encode(), "headers": []}
+    )
+
+    response = await ProfilerView().profiler_run(request)
+
+    assert response.status_code == 400
+
+
+async def test_profiled_stream_is_forwarded_before_it_ends(monkeypatch):
+    saved = {}
+
+    async def save(profile, profile_id=None):
+        saved[profile_id] = profile
+        return profile_id
+
+    monkeypatch.setattr(profiler, "verify", lambda token: True)
+    monkeypatch.setattr(profiler, "save", save)
+    sent = []
+    first_event = asyncio.Event()
+    close = asyncio.Event()
+
+    async def stream(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send(
+            {"type": "http.response.body", "body": b"data: 1\n\n", "more_body": True}
+        )
+        first_event.set()
+        await close.wait()
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/api/currency/stream",
+        "headers": [(b"x-profile", b"token")],
+    }
+    task = asyncio.create_task(ProfilerMiddleware(stream)(scope, None, send))
+    await first_event.wait()
+
+    assert [message["type"] for message in sent] == [
+        "http.response.start",
+        "http.response.body",
+    ]
+    headers = dict(sent[0]["headers"])
+    assert saved == {}
+
+    close.set()
+    await task
+    assert list(saved) == [headers[b"x-profile-id"].decode()]
@@ -0,0 +1,85 @@
+import heapq
+import random
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import delete, select
+
+from app.api.models import Balance, CurrencyRate, User, UserTotal
+from app.services.rates import RateBoard
+from app.services.reports import HoldingsReport
+
+pytestmark = pytest.mark.anyio
+
+CURRENCIES = ("XTS", "XBA", "XBB")
+
+
+@pytest.fixture
+async def rates(db):
+    yield
+    async with db.session() as session:
+        await session.execute(
+            delete(CurrencyRate).where(CurrencyRate.currency.in_(CURRENCIES))
+        )
+        await session.commit()
+
+
+async def test_top_users_matches_full_valuation(db, make_user, rates):
+    generator = random.Random(7)
+    for _ in range(40):
+        await make_user(
+            **{
+                code: str(generator.randint(1, 100000))
+                for code in generator.sample([*CURRENCIES, "XXX"], 2)
+            }
+        )
+    board = RateBoard("USD")
+    board.quotes = {"XTS": 1.0, "XBA": 0.9, "XBB": 92.5}
+    report = HoldingsReport(board, interval=60)
+    await report.refresh()
+    # Курсы после сохранения опорных: XBA подорожала, XBB подешевела.
+    board.quotes = {"XTS": 1.0, "XBA": 0.6, "XBB": 120.0}
+
+    top = await report.top_users(limit=5)
+
+    async with db.session() as session:
+        stored = dict(
+            (await session.execute(select(CurrencyRate.currency, CurrencyRate.rate)))
+            .tuples()
+            .all()
+        )
+        rates = {
+            code: 1 / Decimal(str(board.quotes[code])) if code in board.quotes else rate
+            for code, rate in stored.items()
+        }
+        values = {}
+        stmt = select(User.username, Balance.currency, Balance.amount).join(User)
+        for username, code, amount in await session.execute(stmt):
+            if code in rates:
+                values[username] = values.get(username, 0) + amount * rates[code]
+    expected = heapq.nlargest(5, values.items(), key=lambda item: item[1])
+    assert top == [
+        (username, value.quantize(Decimal("0.01"))) for username, value in expected
+    ]
+
+
+async def test_user_totals_follow_balances_and_rates(db, make_user, rates):
+    user = await make_user(XTS="100", XBA="10")
+    board = RateBoard("USD")
+    board.quotes = {"XTS": 1.0}
+    report = HoldingsReport(board, interval=60)
+    await report.refresh()
+    board.quotes = {"XTS": 1.0, "XBA": 0.5}
+    await report.refresh()
+
+    async with db.session() as session:
+        balance = await session.scalar(
+            select(Balance).where(Balance.user_id == user.id, Balance.currency == "XTS")
+        )
+        balance.amount = Decimal("40")
+        await session.commit()
+
+        value = await session.scalar(
+            select(UserTotal.value).where(UserTotal.user_id == user.id)
+        )
+    assert value == Decimal("60")